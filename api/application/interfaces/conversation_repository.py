@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from api.domain.entities import Conversation
+from api.domain.entities import Conversation, ConversationSession
 
 class IConversationRepository(ABC):
     @abstractmethod
@@ -7,7 +7,59 @@ class IConversationRepository(ABC):
         """Retrieve a conversation by user ID."""
         pass
 
+    @abstractmethod
+    def get_conversation_histories(self, user_ids: list[str]) -> dict[str, list[Conversation]]:
+        """Retrieve the conversations of many users in a single round trip."""
+        pass
+
     @abstractmethod
     def save_conversation(self, conversation: Conversation) -> None:
         """Save a conversation."""
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def get_session(self, user_id: str) -> ConversationSession | None:
+        """Retrieve the LLM context saved for a user, if any."""
+        pass
+
+    @abstractmethod
+    def save_session(self, session: ConversationSession) -> None:
+        """Save the LLM context of a user."""
+        pass
+
+    @abstractmethod
+    def clear_session(self, user_id: str) -> None:
+        """Forget the LLM context of a user."""
+        pass
+
+
+class IAsyncConversationRepository(ABC):
+    @abstractmethod
+    async def aget_conversation_history(self, user_id: str) -> list[Conversation]:
+        """Asynchronously retrieve a conversation by user ID."""
+        pass
+
+    @abstractmethod
+    async def aget_conversation_histories(self, user_ids: list[str]) -> dict[str, list[Conversation]]:
+        """Asynchronously retrieve the conversations of many users in a single round trip."""
+        pass
+
+    @abstractmethod
+    async def asave_conversation(self, conversation: Conversation) -> None:
+        """Asynchronously save a conversation."""
+        pass
+
+    @abstractmethod
+    async def aget_session(self, user_id: str) -> ConversationSession | None:
+        """Asynchronously retrieve the LLM context saved for a user, if any."""
+        pass
+
+    @abstractmethod
+    async def asave_session(self, session: ConversationSession) -> None:
+        """Asynchronously save the LLM context of a user."""
+        pass
+
+    @abstractmethod
+    async def aclear_session(self, user_id: str) -> None:
+        """Asynchronously forget the LLM context of a user."""
+        pass
@@ -7,10 +7,20 @@ class IDatabaseRepository(ABC):
         """add a conversation chunk to the database."""
         pass
 
+    @abstractmethod
+    def add_chunks(self, chunks: list[DocumentChunk]) -> None:
+        """add many embedded chunks to the database in bulk requests."""
+        pass
+
     @abstractmethod
     def search_similar(self, query_embedding: list[float], n_results: int = 5, filter: dict = None) -> list[dict]:
         """search for similar conversation chunks based on the query embedding."""
         pass
+
+    @abstractmethod
+    def search_similar_many(self, query_embeddings: list[list[float]], n_results: int = 5, filter: dict = None) -> dict:
+        """search for the chunks similar to each query embedding in a single request, one result list per query."""
+        pass
     
     @abstractmethod
     def is_empty(self) -> bool:
@@ -21,3 +31,30 @@ class IDatabaseRepository(ABC):
     def has_source(self, file_name: str) -> bool:
         """Check if a document with the given source already exists in the database."""
         pass
+
+    @abstractmethod
+    def get_manifest(self) -> dict[str, dict]:
+        """Return the content_hash and ingest_signature stored for every source."""
+        pass
+
+    @abstractmethod
+    def delete_sources(self, file_names: list[str]) -> None:
+        """Delete every chunk that belongs to the given sources."""
+        pass
+
+    @abstractmethod
+    def flush(self) -> None:
+        """Make the writes done so far durable and visible to other readers."""
+        pass
+
+
+class IAsyncDatabaseRepository(ABC):
+    @abstractmethod
+    async def asearch_similar(self, query_embedding: list[float], n_results: int = 5, filter: dict = None) -> list[dict]:
+        """Asynchronously search for similar conversation chunks based on the query embedding."""
+        pass
+
+    @abstractmethod
+    async def asearch_similar_many(self, query_embeddings: list[list[float]], n_results: int = 5, filter: dict = None) -> dict:
+        """Asynchronously search for the chunks similar to each query embedding in a single request."""
+        pass
@@ -1,10 +1,21 @@
 from abc import ABC, abstractmethod
+from typing import Callable, Iterator
 from api.domain.entities import Document, DocumentChunk
 
 class IDocumentLoader(ABC):
     @abstractmethod
-    def load_pdfs(self, folder_path: str) -> list[Document]:
-        """Load a PDF file and return its text content."""
+    def list_sources(self, folder_path: str) -> dict[str, str]:
+        """Return the content hash of every PDF in the folder, keyed by file name."""
+        pass
+
+    @abstractmethod
+    def get_chunk_settings(self) -> dict:
+        """Return the parameters that determine how documents are chunked."""
+        pass
+
+    @abstractmethod
+    def load_pdfs(self, folder_path: str, skip: Callable[[str], bool] = None) -> Iterator[Document]:
+        """Yield the PDF documents of a folder as their text is extracted, ignoring the files matched by skip."""
         pass
     
     @abstractmethod
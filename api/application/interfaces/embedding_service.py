@@ -7,6 +7,11 @@ class IEmbeddingService(ABC):
         """Generate an embedding for the given text."""
         pass
 
+    @abstractmethod
+    def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Generate the embeddings of many texts in a single model call."""
+        pass
+
     @abstractmethod
     def embed(self, chunk: DocumentChunk) -> None:
         """Generate an embedding for the given text."""
@@ -26,3 +31,15 @@ class IEmbeddingService(ABC):
     def get_model_name(self) -> str:
         """Return the name of the embedding model."""
         pass
+
+
+class IAsyncEmbeddingService(ABC):
+    @abstractmethod
+    async def aget_embedding(self, text: str) -> list[float]:
+        """Asynchronously generate an embedding for the given text."""
+        pass
+
+    @abstractmethod
+    async def aget_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Asynchronously generate the embeddings of many texts in a single model call."""
+        pass
@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+
+class IIngestionStatusRepository(ABC):
+    @abstractmethod
+    def get_status(self) -> dict:
+        """Return the status of the last or current ingestion run, shared by every replica."""
+        pass
+
+    @abstractmethod
+    def set_status(self, status: dict) -> None:
+        """Publish the status of the current ingestion run."""
+        pass
+
+    @abstractmethod
+    def acquire_lock(self, owner: str, ttl: int) -> bool:
+        """Take the ingestion lock for ttl seconds, returning False if another owner holds it."""
+        pass
+
+    @abstractmethod
+    def refresh_lock(self, owner: str, ttl: int) -> bool:
+        """Extend the lock while the owner is still ingesting."""
+        pass
+
+    @abstractmethod
+    def release_lock(self, owner: str) -> None:
+        """Release the lock if it is still held by the owner."""
+        pass
@@ -0,0 +1,34 @@
+from abc import ABC, abstractmethod
+from typing import Any
+from api.domain.entities import DocumentChunk
+
+class ILexicalIndex(ABC):
+    @abstractmethod
+    def add_chunks(self, chunks: list[DocumentChunk]) -> None:
+        """Index the terms of many chunks."""
+        pass
+
+    @abstractmethod
+    def search(self, query: str, n_results: int = 5) -> dict[str, list[list[Any]]]:
+        """Return the best matching chunks for the query terms, shaped like a vector search result."""
+        pass
+
+    @abstractmethod
+    async def asearch(self, query: str, n_results: int = 5) -> dict[str, list[list[Any]]]:
+        """Asynchronously return the best matching chunks for the query terms."""
+        pass
+
+    @abstractmethod
+    def get_manifest(self) -> dict[str, dict]:
+        """Return the content_hash and ingest_signature indexed for every source."""
+        pass
+
+    @abstractmethod
+    def delete_sources(self, file_names: list[str]) -> None:
+        """Remove every chunk that belongs to the given sources."""
+        pass
+
+    @abstractmethod
+    def flush(self) -> None:
+        """Persist the index so other readers can load it."""
+        pass
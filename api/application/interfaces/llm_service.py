@@ -1,7 +1,36 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable
 
 class ILLMService(ABC):
     @abstractmethod
     def generate_response(self, prompt: str, max_tokens: int = 500) -> str:
         """Generate a response based on the given prompt and optional context."""
         pass
+
+
+class IAsyncLLMService(ABC):
+    @abstractmethod
+    async def agenerate_response(self, prompt: str, max_tokens: int = 500, user_id: str = None, context: list[int] = None, on_context: Callable[[list[int]], None] = None) -> str:
+        """Asynchronously generate a response based on the given prompt, user_id identifies the caller for scheduling.
+
+        A context returned by a previous call continues that conversation, on_context receives the new one.
+        """
+        pass
+
+    @abstractmethod
+    def astream_response(self, prompt: str, max_tokens: int = 500, user_id: str = None, context: list[int] = None, on_context: Callable[[list[int]], None] = None) -> AsyncIterator[str]:
+        """Asynchronously yield response tokens as the LLM generates them, user_id identifies the caller for scheduling.
+
+        A context returned by a previous call continues that conversation, on_context receives the new one once the stream ends.
+        """
+        pass
+
+    @abstractmethod
+    async def awarm_up(self, prompt_prefix: str = "") -> None:
+        """Load the model into memory and prime the given prompt prefix."""
+        pass
+
+    @abstractmethod
+    async def ais_model_loaded(self) -> bool:
+        """Check whether the model is currently resident in memory."""
+        pass
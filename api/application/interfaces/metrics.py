@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+from typing import ContextManager
+
+class IMetrics(ABC):
+    @abstractmethod
+    def time(self, name: str, **attributes) -> ContextManager:
+        """Time the enclosed block as a span and record its duration in seconds in the name histogram."""
+        pass
+
+    @abstractmethod
+    def observe(self, name: str, value: float, **attributes) -> None:
+        """Record a value in the name histogram."""
+        pass
+
+    @abstractmethod
+    def increment(self, name: str, value: int = 1, **attributes) -> None:
+        """Add to the name counter."""
+        pass
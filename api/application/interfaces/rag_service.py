@@ -1,8 +1,25 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable
+from api.domain.entities import Answer
 
 class IRAGService(ABC):
     
     @abstractmethod
-    def generate_response(self, user_id: str, user_query: str) -> str:
+    async def generate_response(self, user_id: str, user_query: str) -> Answer:
         """Generate an answer based on the query and retrieved context."""
         pass
+
+    @abstractmethod
+    async def generate_responses(self, requests: list[tuple[str, str]]) -> list[Answer | Exception]:
+        """Answer many (user_id, query) pairs at once, a failed item holds its exception instead of an answer."""
+        pass
+
+    @abstractmethod
+    def stream_response(self, user_id: str, user_query: str, on_answer: Callable[[Answer], None] = None) -> AsyncIterator[str]:
+        """Yield answer tokens as they are generated, saving the full answer once done and passing it to on_answer."""
+        pass
+
+    @abstractmethod
+    async def warm_up(self) -> None:
+        """Load the LLM and prime the fixed part of the prompt before the first request."""
+        pass
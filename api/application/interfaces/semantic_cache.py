@@ -0,0 +1,17 @@
+from abc import ABC, abstractmethod
+
+class ISemanticCache(ABC):
+    @abstractmethod
+    async def lookup(self, query_embedding: list[float], context_ids: list[str]) -> str | None:
+        """Return a stored answer for a near-duplicate query retrieved with the same context, if any."""
+        pass
+
+    @abstractmethod
+    async def store(self, query: str, query_embedding: list[float], context_ids: list[str], answer: str) -> None:
+        """Store the answer generated for a query and its retrieved context."""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Invalidate every stored answer."""
+        pass
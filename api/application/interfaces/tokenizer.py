@@ -0,0 +1,7 @@
+from abc import ABC, abstractmethod
+
+class ITokenizer(ABC):
+    @abstractmethod
+    def count_tokens(self, text: str) -> int:
+        """Return the number of tokens the target model uses for the text."""
+        pass
@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
+from typing import Callable
 
 class ITrainService(ABC):
     @abstractmethod
-    def train(self, user_id: str, user_query: str) -> None:
-        """Train the model with the company information."""
+    def train(self, progress: Callable[[dict], None] = None) -> None:
+        """Train the model with the company information, reporting progress counters along the way."""
         pass
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from api.application.interfaces.train_service import ITrainService
+from api.application.interfaces.database_repository import IDatabaseRepository
+from api.application.interfaces.ingestion_status_repository import IIngestionStatusRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _lower_priority(nice: int) -> None:
+    """On Linux every thread has its own nice value, and the PDF worker processes it forks inherit it."""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), nice)
+    except (AttributeError, OSError) as e:
+        logger.warning(f"Could not lower the ingestion thread priority: {str(e)}")
+
+
+class IngestionService:
+    """Runs TrainService outside of the request path.
+
+    A lock shared through the status repository makes sure a single replica ingests at a time,
+    and the progress it publishes there is what every replica reports on the ingest endpoint.
+    Background runs use a dedicated thread with a raised nice value, so parsing and encoding
+    yield the CPU to the request path. The corpus version published with the status changes
+    only when a run actually added, changed or removed documents.
+    """
+
+    def __init__(self, train_service: ITrainService, status_repo: IIngestionStatusRepository, database_repo: IDatabaseRepository, lock_ttl: int = 600, nice: int = 10, version_interval: float = 5.0):
+        self.train_service = train_service
+        self.status_repo = status_repo
+        self.database_repo = database_repo
+        self.lock_ttl = lock_ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.version_interval = version_interval
+        self._ready = False
+        self._corpus_version = ""
+        self._version_checked = -version_interval
+        self._task: asyncio.Future = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingestion", initializer=_lower_priority, initargs=(nice,))
+
+    def run(self, trigger: str = "manual") -> dict:
+        """Runs an incremental ingestion in the calling thread, returns None if another run holds the lock."""
+        if not self.status_repo.acquire_lock(self.owner, self.lock_ttl):
+            logger.info("Ingestion already running elsewhere, skipping")
+            return None
+        return self._execute(self._begin(trigger))
+
+    async def start(self, trigger: str = "manual") -> bool:
+        """Starts a run on a worker thread, returns False if one is already in progress."""
+        if self._task and not self._task.done():
+            return False
+        if not await asyncio.to_thread(self.status_repo.acquire_lock, self.owner, self.lock_ttl):
+            return False
+        status = await asyncio.to_thread(self._begin, trigger)
+        self._task = asyncio.get_running_loop().run_in_executor(self._executor, self._execute, status)
+        return True
+
+    async def wait(self) -> None:
+        """Waits for the run started by this replica, if any."""
+        if self._task:
+            await asyncio.shield(self._task)
+
+    def status(self) -> dict:
+        return self.status_repo.get_status()
+
+    def is_ready(self) -> bool:
+        """Ready once the store has documents, from a previous run or volume, or after a successful run."""
+        if not self._ready:
+            self._ready = bool(self.status().get("last_success_at")) or not self.database_repo.is_empty()
+        return self._ready
+
+    def corpus_version(self) -> str:
+        """Version of the indexed documents, read from the shared status at most once per version_interval."""
+        now = time.monotonic()
+        if now - self._version_checked >= self.version_interval:
+            self._corpus_version = str(self.status().get("corpus_version") or "")
+            self._version_checked = now
+        return self._corpus_version
+
+    def _begin(self, trigger: str) -> dict:
+        """Publishes the running status, called while holding the lock."""
+        previous = self.status_repo.get_status()
+        status = {
+            "state": "running",
+            "trigger": trigger,
+            "owner": self.owner,
+            "started_at": time.time(),
+            "last_success_at": previous.get("last_success_at"),
+            "corpus_version": previous.get("corpus_version")
+        }
+        self.status_repo.set_status(status)
+        logger.info(f"Ingestion started by {trigger}")
+        return status
+
+    def _execute(self, status: dict) -> dict:
+        """Runs TrainService, publishing its counters and extending the lock after every batch."""
+        def progress(counters: dict) -> None:
+            status.update(counters)
+            self.status_repo.set_status(status)
+            self.status_repo.refresh_lock(self.owner, self.lock_ttl)
+
+        try:
+            self.train_service.train(progress=progress)
+            status.update(state="completed", last_success_at=time.time())
+            if status.get("documents_changed") or status.get("documents_removed") or not status.get("corpus_version"):
+                status["corpus_version"] = str(time.time_ns())
+            self._ready = True
+        except Exception as e:
+            logger.error(f"Error ingesting documents: {str(e)}")
+            status.update(state="failed", error=str(e))
+        finally:
+            status.update(finished_at=time.time(), duration_s=round(time.time() - status["started_at"], 2))
+            self.status_repo.set_status(status)
+            self.status_repo.release_lock(self.owner)
+        logger.info(f"Ingestion {status['state']} in {status['duration_s']}s")
+        return status
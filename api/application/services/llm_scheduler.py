@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import math
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Callable
+from api.application.interfaces.llm_service import IAsyncLLMService
+from api.domain.exceptions import OverloadedError, UserRateLimitedError
+
+logger = logging.getLogger(__name__)
+
+
+class LLMScheduler(IAsyncLLMService):
+    """Admission control in front of the LLM.
+
+    At most max_concurrency generations run at once. Waiting requests are kept in one queue per
+    user and served round-robin, so a chatty user cannot starve the others. Requests are rejected
+    up front when the queue is full, when their user already has max_queue_per_user requests waiting,
+    or when the estimated wait exceeds max_wait; requests that wait longer than max_wait are shed.
+    """
+
+    def __init__(self, llm_service: IAsyncLLMService, max_concurrency: int = 2, max_queue: int = 50, max_queue_per_user: int = 3, max_wait: float = 60):
+        self.llm_service = llm_service
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.max_wait = max_wait
+        self._in_flight = 0
+        self._waiting = 0
+        self._queues: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+        self._wait_times: deque[float] = deque(maxlen=1000)
+        self._service_times: deque[float] = deque(maxlen=100)
+        self._counters = {"admitted": 0, "rejected_queue_full": 0, "rejected_user_limit": 0, "shed_deadline": 0}
+
+    async def agenerate_response(self, prompt: str, max_tokens: int = 500, user_id: str = None, context: list[int] = None, on_context: Callable[[list[int]], None] = None) -> str:
+        """Waits for a generation slot and then generates the response."""
+        started = await self._acquire(user_id)
+        try:
+            return await self.llm_service.agenerate_response(prompt, max_tokens, user_id=user_id, context=context, on_context=on_context)
+        finally:
+            self._release(started)
+
+    async def astream_response(self, prompt: str, max_tokens: int = 500, user_id: str = None, context: list[int] = None, on_context: Callable[[list[int]], None] = None) -> AsyncIterator[str]:
+        """Waits for a generation slot and holds it until the stream ends."""
+        started = await self._acquire(user_id)
+        try:
+            async for token in self.llm_service.astream_response(prompt, max_tokens, user_id=user_id, context=context, on_context=on_context):
+                yield token
+        finally:
+            self._release(started)
+
+    async def awarm_up(self, prompt_prefix: str = "") -> None:
+        """Warm-up runs once at startup, outside of the queue."""
+        await self.llm_service.awarm_up(prompt_prefix)
+
+    async def ais_model_loaded(self) -> bool:
+        """Check whether the model is currently resident in memory."""
+        return await self.llm_service.ais_model_loaded()
+
+    def stats(self) -> dict:
+        """Return queue depth, wait times and rejection counters."""
+        waits = sorted(self._wait_times)
+        return {
+            **self._counters,
+            "in_flight": self._in_flight,
+            "queue_depth": self._waiting,
+            "users_waiting": len(self._queues),
+            "wait_ms_avg": round(1000 * sum(waits) / len(waits), 1) if waits else 0,
+            "wait_ms_p95": round(1000 * waits[int(0.95 * (len(waits) - 1))], 1) if waits else 0,
+            "service_ms_avg": round(1000 * self._average_service_time(), 1)
+        }
+
+    async def _acquire(self, user_id: str) -> float:
+        """Returns once a slot is granted, with the loop time at which the generation started."""
+        loop = asyncio.get_running_loop()
+        if self._in_flight < self.max_concurrency and not self._waiting:
+            self._in_flight += 1
+            return self._admit(0)
+
+        user_id = user_id or "anonymous"
+        if self._waiting >= self.max_queue:
+            self._counters["rejected_queue_full"] += 1
+            raise OverloadedError("LLM queue is full", retry_after=self._retry_after(self._waiting))
+        user_queue = self._queues.get(user_id)
+        if user_queue and len(user_queue) >= self.max_queue_per_user:
+            self._counters["rejected_user_limit"] += 1
+            raise UserRateLimitedError(f"User {user_id} has too many pending requests", retry_after=self._retry_after(self._waiting))
+        estimated_wait = self._estimated_wait(self._waiting + 1)
+        if estimated_wait > self.max_wait:
+            self._counters["shed_deadline"] += 1
+            raise OverloadedError("Estimated LLM wait exceeds the deadline", retry_after=math.ceil(estimated_wait))
+
+        future = loop.create_future()
+        self._queues.setdefault(user_id, deque()).append(future)
+        self._waiting += 1
+        enqueued = loop.time()
+        try:
+            await asyncio.wait({future}, timeout=self.max_wait)
+        except asyncio.CancelledError:
+            if future.done():
+                self._release(None)
+            else:
+                self._dequeue(user_id, future)
+            raise
+        if not future.done():
+            self._dequeue(user_id, future)
+            self._counters["shed_deadline"] += 1
+            raise OverloadedError("Timed out waiting for an LLM slot", retry_after=self._retry_after(self._waiting))
+        return self._admit(loop.time() - enqueued)
+
+    def _admit(self, waited: float) -> float:
+        self._counters["admitted"] += 1
+        self._wait_times.append(waited)
+        return asyncio.get_running_loop().time()
+
+    def _release(self, started: float) -> None:
+        """Frees the slot and grants it to the next user in round-robin order."""
+        if started is not None:
+            self._service_times.append(asyncio.get_running_loop().time() - started)
+        self._in_flight -= 1
+        while self._in_flight < self.max_concurrency and self._queues:
+            user_id, user_queue = next(iter(self._queues.items()))
+            future = user_queue.popleft()
+            self._waiting -= 1
+            if user_queue:
+                self._queues.move_to_end(user_id)
+            else:
+                del self._queues[user_id]
+            self._in_flight += 1
+            future.set_result(None)
+
+    def _dequeue(self, user_id: str, future: asyncio.Future) -> None:
+        user_queue = self._queues.get(user_id)
+        if user_queue and future in user_queue:
+            user_queue.remove(future)
+            self._waiting -= 1
+            if not user_queue:
+                del self._queues[user_id]
+        future.cancel()
+
+    def _average_service_time(self) -> float:
+        return sum(self._service_times) / len(self._service_times) if self._service_times else 0.0
+
+    def _estimated_wait(self, position: int) -> float:
+        """Waves of max_concurrency requests ahead of this one, each taking the average service time."""
+        return math.ceil(position / self.max_concurrency) * self._average_service_time()
+
+    def _retry_after(self, position: int) -> int:
+        return max(1, math.ceil(self._estimated_wait(position)))
@@ -0,0 +1,18 @@
+from contextlib import nullcontext
+from typing import ContextManager
+from api.application.interfaces.metrics import IMetrics
+
+_NULL_CONTEXT = nullcontext()
+
+
+class NullMetrics(IMetrics):
+    """Used when metrics are disabled, every call is a no-op that allocates nothing."""
+
+    def time(self, name: str, **attributes) -> ContextManager:
+        return _NULL_CONTEXT
+
+    def observe(self, name: str, value: float, **attributes) -> None:
+        pass
+
+    def increment(self, name: str, value: int = 1, **attributes) -> None:
+        pass
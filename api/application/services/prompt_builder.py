@@ -0,0 +1,92 @@
+import logging
+import re
+from api.application.interfaces.tokenizer import ITokenizer
+from api.domain.entities import Conversation
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+class PromptBuilder:
+    """Assembles the RAG prompt within a fixed token budget.
+
+    The template and the question are always kept. Context chunks are packed in relevance order
+    after dropping near-duplicates and the text repeated by the splitter's chunk_overlap. History
+    gets whatever budget the context leaves, newest turns first, so the oldest turns are trimmed first.
+    """
+
+    def __init__(self, template: str, tokenizer: ITokenizer, token_budget: int = 768, history_share: float = 0.3, overlap_chars: int = 50, duplicate_threshold: float = 0.8):
+        self.template = template
+        self.tokenizer = tokenizer
+        self.token_budget = token_budget
+        self.history_share = history_share
+        self.overlap_chars = overlap_chars
+        self.duplicate_threshold = duplicate_threshold
+
+    def build(self, user_query: str, documents: list[str], history: list[Conversation]) -> str:
+        """Builds the prompt, history is expected newest first as returned by the conversation repository."""
+        fixed_tokens = self.tokenizer.count_tokens(self._render(user_query, "", ""))
+        available = max(self.token_budget - fixed_tokens, 0)
+
+        context, context_tokens, dropped, skipped = self._pack_context(documents, int(available * (1 - self.history_share)))
+        turns, history_tokens = self._pack_history(history, available - context_tokens)
+
+        logger.info(
+            f"Prompt budget {self.token_budget} tokens: fixed={fixed_tokens}, "
+            f"context={context_tokens} ({len(context)}/{len(documents)} chunks, {dropped} duplicates, {skipped} over budget), "
+            f"history={history_tokens} ({len(turns)}/{len(history)} turns)"
+        )
+        return self._render(user_query, "\n".join(context), "\n".join(reversed(turns)))
+
+    def _render(self, user_query: str, context: str, history: str) -> str:
+        return self.template.format(
+            context=context,
+            history=history if history else "No hay historial previo",
+            user_query=user_query
+        )
+
+    def _pack_context(self, documents: list[str], budget: int) -> tuple[list[str], int, int, int]:
+        kept, used, dropped, skipped = [], 0, 0, 0
+        for document in documents:
+            text = self._strip_overlap(kept, document)
+            if not text.strip() or any(self._similarity(text, other) >= self.duplicate_threshold for other in kept):
+                dropped += 1
+                continue
+            tokens = self.tokenizer.count_tokens(text)
+            if used + tokens > budget:
+                skipped += 1
+                continue
+            kept.append(text)
+            used += tokens
+        return kept, used, dropped, skipped
+
+    def _pack_history(self, history: list[Conversation], budget: int) -> tuple[list[str], int]:
+        turns, used = [], 0
+        for conversation in history:
+            turn = f"User: {conversation.user_msg}\nBot: {conversation.bot_msg}"
+            tokens = self.tokenizer.count_tokens(turn)
+            if used + tokens > budget:
+                break
+            turns.append(turn)
+            used += tokens
+        return turns, used
+
+    def _strip_overlap(self, kept: list[str], text: str) -> str:
+        """Removes the text a chunk repeats from the end or start of an already kept neighbouring chunk."""
+        for other in kept:
+            for size in range(min(self.overlap_chars, len(other), len(text)), 9, -1):
+                if other.endswith(text[:size]):
+                    text = text[size:]
+                    break
+                if other.startswith(text[-size:]):
+                    text = text[:-size]
+                    break
+        return text
+
+    def _similarity(self, first: str, second: str) -> float:
+        first_words = set(_WORD_PATTERN.findall(first.lower()))
+        second_words = set(_WORD_PATTERN.findall(second.lower()))
+        if not first_words or not second_words:
+            return 0.0
+        return len(first_words & second_words) / len(first_words | second_words)
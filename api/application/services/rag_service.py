@@ -1,25 +1,72 @@
+import asyncio
 import logging
-from api.application.interfaces.database_repository import IDatabaseRepository
-from api.application.interfaces.conversation_repository import IConversationRepository
-from api.application.interfaces.embedding_service import IEmbeddingService
-from api.application.interfaces.llm_service import ILLMService
+import time
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+from api.application.interfaces.database_repository import IAsyncDatabaseRepository
+from api.application.interfaces.conversation_repository import IAsyncConversationRepository
+from api.application.interfaces.embedding_service import IAsyncEmbeddingService
+from api.application.interfaces.llm_service import IAsyncLLMService
+from api.application.interfaces.lexical_index import ILexicalIndex
 from api.application.interfaces.rag_service import IRAGService
-from api.domain.entities import Conversation
+from api.application.interfaces.semantic_cache import ISemanticCache
+from api.application.interfaces.tokenizer import ITokenizer
+from api.application.interfaces.metrics import IMetrics
+from api.application.services.null_metrics import NullMetrics
+from api.application.services.prompt_builder import PromptBuilder
+from api.domain.entities import Answer, Conversation, ConversationSession, RetrievedContext
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 class RAGService(IRAGService):
     def __init__(
         self,
-        conversation_repo: IConversationRepository,
-        database_repo: IDatabaseRepository,
-        embedding_service: IEmbeddingService,
-        llm_service: ILLMService
+        conversation_repo: IAsyncConversationRepository,
+        database_repo: IAsyncDatabaseRepository,
+        embedding_service: IAsyncEmbeddingService,
+        llm_service: IAsyncLLMService,
+        semantic_cache: ISemanticCache = None,
+        lexical_index: ILexicalIndex = None,
+        n_results: int = 5,
+        n_candidates: int = 10,
+        rrf_k: int = 60,
+        tokenizer: ITokenizer = None,
+        prompt_token_budget: int = 768,
+        chunk_overlap: int = 50,
+        metrics: IMetrics = None,
+        batch_concurrency: int = 2,
+        context_reuse: bool = False,
+        context_reuse_max_tokens: int = 3072,
+        session_version: Callable[[], str] = None,
+        max_tokens: int = 200,
+        num_ctx: int = None
     ):
         self.conversation_repo = conversation_repo
         self.database_repo = database_repo
         self.embedding_service = embedding_service
         self.llm_service = llm_service
+        self.semantic_cache = semantic_cache
+        self.lexical_index = lexical_index
+        self.n_results = n_results
+        self.n_candidates = n_candidates
+        self.rrf_k = rrf_k
+        self.batch_concurrency = batch_concurrency
+        self.max_tokens = max_tokens
+        self.context_reuse = context_reuse
+        self.context_reuse_max_tokens = context_reuse_max_tokens
+        if context_reuse and num_ctx:
+            # The reused context, the new prompt and the answer all have to fit in the context window of the model
+            limit = num_ctx - prompt_token_budget - max_tokens
+            if limit <= 0:
+                # Reuse only saves prefill time, so a window too small for it turns it off instead of failing startup
+                logger.error(f"Disabling context reuse, num_ctx {num_ctx} leaves no room for it after a prompt of {prompt_token_budget} tokens and an answer of {max_tokens}")
+                self.context_reuse = False
+            elif context_reuse_max_tokens > limit:
+                logger.warning(f"Capping context_reuse_max_tokens from {context_reuse_max_tokens} to {limit} to fit num_ctx {num_ctx}")
+                self.context_reuse_max_tokens = limit
+        self.session_version = session_version
+        self.metrics = metrics or NullMetrics()
         self.system_prompt = (
             "You are an expert assistant that answers questions based on the provided context."
             "If the answer is not in the context, clearly state that you do not have that information.\n\n"
@@ -27,57 +74,298 @@ class RAGService(IRAGService):
             "Conversation History:\n{history}\n\n"
             "Instruction: Answer the following question concisely and precisely: {user_query}"
         )
+        # Follow-up turn of a reused LLM context, the instructions and history are already in it
+        self.continuation_prompt = (
+            "Context:\n{context}\n\n"
+            "Instruction: Answer the following question concisely and precisely: {user_query}"
+        )
+        self.prompt_builder = PromptBuilder(
+            template=self.system_prompt,
+            tokenizer=tokenizer,
+            token_budget=prompt_token_budget,
+            overlap_chars=chunk_overlap
+        ) if tokenizer else None
+        self.continuation_builder = PromptBuilder(
+            template=self.continuation_prompt,
+            tokenizer=tokenizer,
+            token_budget=prompt_token_budget,
+            overlap_chars=chunk_overlap
+        ) if tokenizer else None
 
 
-    def generate_response(self, user_id: str, user_query: str) -> str:
+    async def generate_response(self, user_id: str, user_query: str) -> Answer:
         """Generates a response for the user based on their query and conversation history"""
-        logger.info(f"Generated response for user {user_id} with query: {user_query}")
-        conversation_history = self._format_history(self.conversation_repo.get_conversation_history(user_id))
-
-        context_documents = self._get_relevant_documents(user_query)
-        
-        prompt = self._build_prompt(
-            user_query=user_query,
-            context="\n".join(context_documents),
-            history=conversation_history
-        )
-        
-        llm_response = self.llm_service.generate_response(prompt)
-        
-        self.conversation_repo.save_conversation(
-            Conversation(
-                user_id=user_id,
-                user_msg=user_query,
-                bot_msg=llm_response
+        logger.debug(f"Generating response for user {user_id} with query: {user_query}")
+        with self.metrics.time("rag.request", mode="chat"):
+            history, context, session = await self._gather(user_id, user_query)
+
+            cached_response = await self._cached_response(context)
+            if cached_response is not None:
+                await self._save(user_id, user_query, cached_response)
+                await self._save_session(session, [])
+                return Answer(response=cached_response, cached=True)
+
+            prompt = self._build_prompt(user_query, context, history, session)
+            llm_contexts = []
+            with self.metrics.time("rag.llm", mode="chat"):
+                llm_response = await self.llm_service.agenerate_response(prompt, self.max_tokens, user_id=user_id, **self._continuation(session, llm_contexts))
+
+            await self._save(user_id, user_query, llm_response)
+            await self._save_session(session, llm_contexts)
+            await self._cache_response(user_query, context, llm_response)
+            return Answer(response=llm_response)
+
+    async def generate_responses(self, requests: list[tuple[str, str]]) -> list[Answer | Exception]:
+        """Answers many (user_id, query) pairs with one embedding call, one vector search and one history fetch.
+
+        Histories are read once before any answer is saved, so messages of the same user within a batch
+        do not see each other. Batches always send the full prompt and drop the reused LLM context of
+        their users. At most batch_concurrency LLM calls of the batch are queued at a time, which keeps
+        a batch from tripping the per-user queue limit of the scheduler. An item that fails holds its
+        exception instead of an answer.
+        """
+        if not requests:
+            return []
+        logger.debug(f"Generating {len(requests)} batched responses")
+        self.metrics.increment("rag.batch.queries", len(requests))
+        with self.metrics.time("rag.request", mode="batch"):
+            user_ids = list(dict.fromkeys(user_id for user_id, _ in requests))
+            histories, contexts = await asyncio.gather(
+                self._timed("rag.history", self.conversation_repo.aget_conversation_histories(user_ids)),
+                self._timed("rag.retrieval", self._get_relevant_documents_many([user_query for _, user_query in requests]))
             )
+            if self.context_reuse:
+                await asyncio.gather(*(self.conversation_repo.aclear_session(user_id) for user_id in user_ids))
+            slots = asyncio.Semaphore(self.batch_concurrency)
+
+            async def answer(user_id: str, user_query: str, context: RetrievedContext) -> Answer:
+                cached_response = await self._cached_response(context)
+                if cached_response is not None:
+                    await self._save(user_id, user_query, cached_response)
+                    return Answer(response=cached_response, cached=True)
+
+                prompt = self._build_prompt(user_query, context, histories.get(user_id, []))
+                async with slots:
+                    with self.metrics.time("rag.llm", mode="batch"):
+                        llm_response = await self.llm_service.agenerate_response(prompt, self.max_tokens, user_id=user_id)
+
+                await self._save(user_id, user_query, llm_response)
+                await self._cache_response(user_query, context, llm_response)
+                return Answer(response=llm_response)
+
+            return await asyncio.gather(
+                *(answer(user_id, user_query, context) for (user_id, user_query), context in zip(requests, contexts)),
+                return_exceptions=True
+            )
+
+    async def stream_response(self, user_id: str, user_query: str, on_answer: Callable[[Answer], None] = None) -> AsyncIterator[str]:
+        """Streams the response tokens for the user and saves the full answer once the stream ends,
+        on_answer receives the full answer and whether it came from the semantic cache"""
+        logger.debug(f"Streaming response for user {user_id} with query: {user_query}")
+        # Spans cannot stay open across yields, the generator may resume in another task
+        started = time.perf_counter()
+        history, context, session = await self._gather(user_id, user_query)
+
+        cached_response = await self._cached_response(context)
+        if cached_response is not None:
+            yield cached_response
+            await self._save(user_id, user_query, cached_response)
+            await self._save_session(session, [])
+            self.metrics.observe("rag.request.duration", time.perf_counter() - started, mode="stream")
+            if on_answer:
+                on_answer(Answer(response=cached_response, cached=True))
+            return
+
+        prompt = self._build_prompt(user_query, context, history, session)
+        tokens = []
+        llm_contexts = []
+        llm_started = time.perf_counter()
+        async for token in self.llm_service.astream_response(prompt, self.max_tokens, user_id=user_id, **self._continuation(session, llm_contexts)):
+            if not tokens:
+                self.metrics.observe("rag.llm.first_token.duration", time.perf_counter() - llm_started)
+            tokens.append(token)
+            yield token
+        self.metrics.observe("rag.llm.duration", time.perf_counter() - llm_started, mode="stream")
+
+        llm_response = "".join(tokens).strip()
+        await self._save(user_id, user_query, llm_response)
+        await self._save_session(session, llm_contexts)
+        await self._cache_response(user_query, context, llm_response)
+        self.metrics.observe("rag.request.duration", time.perf_counter() - started, mode="stream")
+        if on_answer:
+            on_answer(Answer(response=llm_response))
+
+    async def warm_up(self) -> None:
+        """Loads the LLM and primes everything in the prompt that precedes the retrieved context"""
+        await self.llm_service.awarm_up(self.system_prompt.split("{context}")[0])
+
+    async def _gather(self, user_id: str, user_query: str) -> tuple[list[Conversation], RetrievedContext, ConversationSession]:
+        """Fetches the conversation history, the relevant documents and the LLM session concurrently"""
+        return await asyncio.gather(
+            self._timed("rag.history", self.conversation_repo.aget_conversation_history(user_id)),
+            self._timed("rag.retrieval", self._get_relevant_documents(user_query)),
+            self._load_session(user_id)
         )
-        
-        return llm_response
 
-    def _format_history(self, history: list[Conversation]) -> str:
-        """Formats the conversation history for the prompt"""
-        logger.info(f"Formatting conversation history {history}")
-        return "\n".join(
-            [f"User: {conversation.user_msg}\nBot: {conversation.bot_msg}" 
-             for conversation in reversed(history)]
+    async def _load_session(self, user_id: str) -> ConversationSession | None:
+        """Returns the LLM context saved for the user, or a new empty session when it was built with
+        another model or corpus version or grew past context_reuse_max_tokens. None when reuse is off."""
+        if not self.context_reuse:
+            return None
+        version = await asyncio.to_thread(self.session_version) if self.session_version else ""
+        session = await self.conversation_repo.aget_session(user_id)
+        if session and session.context and session.version == version and len(session.context) <= self.context_reuse_max_tokens:
+            self.metrics.increment("rag.session", result="continued")
+            return session
+        self.metrics.increment("rag.session", result="reset" if session else "new")
+        return ConversationSession(user_id=user_id, version=version)
+
+    def _continuation(self, session: ConversationSession, llm_contexts: list[list[int]]) -> dict:
+        """Arguments that make the LLM continue the session and hand back the extended context"""
+        if session is None:
+            return {}
+        return {"context": session.context, "on_context": llm_contexts.append}
+
+    async def _save_session(self, session: ConversationSession, llm_contexts: list[list[int]]) -> None:
+        """Stores the context the LLM returned, or forgets the session when the answer did not come from it"""
+        if session is None:
+            return
+        if llm_contexts:
+            session.context = llm_contexts[-1]
+            await self.conversation_repo.asave_session(session)
+        elif session.context:
+            await self.conversation_repo.aclear_session(session.user_id)
+
+    async def _timed(self, stage: str, awaitable: Awaitable[T]) -> T:
+        with self.metrics.time(stage):
+            return await awaitable
+
+    async def _save(self, user_id: str, user_query: str, response: str) -> None:
+        with self.metrics.time("rag.save"):
+            await self.conversation_repo.asave_conversation(
+                Conversation(
+                    user_id=user_id,
+                    user_msg=user_query,
+                    bot_msg=response
+                )
+            )
+
+    async def _cached_response(self, context: RetrievedContext) -> str | None:
+        """Returns a previous answer to a near-duplicate query retrieved with the same chunks.
+        Queries that retrieved nothing all share the same empty context, so they are never cached"""
+        if not self.semantic_cache or not context.ids:
+            return None
+        with self.metrics.time("rag.semantic_cache.lookup"):
+            cached_response = await self.semantic_cache.lookup(context.query_embedding, context.ids)
+        self.metrics.increment("rag.semantic_cache.lookups", result="hit" if cached_response is not None else "miss")
+        if cached_response is not None:
+            logger.info("semantic cache hit, skipping LLM call")
+        return cached_response
+
+    async def _cache_response(self, user_query: str, context: RetrievedContext, response: str) -> None:
+        if self.semantic_cache and response and context.ids:
+            with self.metrics.time("rag.semantic_cache.store"):
+                await self.semantic_cache.store(user_query, context.query_embedding, context.ids, response)
+
+    async def _get_relevant_documents(self, user_query: str) -> RetrievedContext:
+        """Search for relevant documents based on the user query.
+
+        With a lexical index, BM25 and vector search run concurrently and their rankings
+        are merged with reciprocal rank fusion, so exact terms are found without widening the context.
+        """
+        logger.debug(f"Searching for relevant documents for query: {user_query}")
+        if not self.lexical_index:
+            query_embedding, results = await self._vector_search(user_query, self.n_results)
+            return self._to_context(query_embedding, [results])
+
+        (query_embedding, vector_results), lexical_results = await asyncio.gather(
+            self._vector_search(user_query, self.n_candidates),
+            self._timed("rag.lexical_search", self.lexical_index.asearch(user_query, n_results=self.n_candidates))
         )
+        return self._to_context(query_embedding, [vector_results, lexical_results])
+
+    async def _vector_search(self, user_query: str, n_results: int) -> tuple[list[float], dict]:
+        with self.metrics.time("rag.embedding"):
+            query_embedding = await self.embedding_service.aget_embedding(user_query)
+        with self.metrics.time("rag.vector_search"):
+            results = await self.database_repo.asearch_similar(query_embedding, n_results=n_results)
+        return query_embedding, results
+
+    async def _get_relevant_documents_many(self, user_queries: list[str]) -> list[RetrievedContext]:
+        """Retrieves the documents of many queries, encoding them together and searching the vectors in one request"""
+        n_results = self.n_candidates if self.lexical_index else self.n_results
+
+        async def vector_search() -> tuple[list[list[float]], dict]:
+            with self.metrics.time("rag.embedding", mode="batch"):
+                query_embeddings = await self.embedding_service.aget_embeddings(user_queries)
+            with self.metrics.time("rag.vector_search", mode="batch"):
+                results = await self.database_repo.asearch_similar_many(query_embeddings, n_results=n_results)
+            return query_embeddings, results
 
-    def _get_relevant_documents(self, user_query: str) -> list[str]:
-        """Search for relevant documents based on the user query"""
-        logger.info(f"Searching for relevant documents for query: {user_query}")
-        query_embedding = self.embedding_service.get_embedding(user_query)
-        results = self.database_repo.search_similar(query_embedding, n_results=5)
-        
-        if not results or not results.get('documents') or not results['documents'][0]:
+        if not self.lexical_index:
+            query_embeddings, results = await vector_search()
+            lexical_results = [None] * len(user_queries)
+        else:
+            (query_embeddings, results), lexical_results = await asyncio.gather(
+                vector_search(),
+                self._timed("rag.lexical_search", asyncio.gather(
+                    *(self.lexical_index.asearch(user_query, n_results=self.n_candidates) for user_query in user_queries)
+                ))
+            )
+        return [
+            self._to_context(query_embedding, [
+                {"ids": [results["ids"][i]], "documents": [results["documents"][i]]},
+                lexical_results[i]
+            ])
+            for i, query_embedding in enumerate(query_embeddings)
+        ]
+
+    def _to_context(self, query_embedding: list[float], rankings: list[dict]) -> RetrievedContext:
+        """Fuses the rankings with reciprocal rank fusion and keeps the best n_results chunks"""
+        scores: dict[str, float] = {}
+        documents: dict[str, str] = {}
+        for results in rankings:
+            if not results or not results.get('documents') or not results['documents'][0]:
+                continue
+            for rank, (chunk_id, document) in enumerate(zip(results['ids'][0], results['documents'][0])):
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + 1 / (self.rrf_k + rank + 1)
+                documents[chunk_id] = document
+
+        if not scores:
             logger.info("documents not found for the query")
-            return []
-        return results['documents'][0]
+            return RetrievedContext(query_embedding=query_embedding)
+        ids = sorted(scores, key=scores.get, reverse=True)[:self.n_results]
+        return RetrievedContext(
+            query_embedding=query_embedding,
+            ids=ids,
+            documents=[documents[chunk_id] for chunk_id in ids]
+        )
+
+    def _build_prompt(self, user_query: str, context: RetrievedContext, history: list[Conversation], session: ConversationSession = None) -> str:
+        """Builds the prompt for the LLM, within the token budget when a tokenizer is configured.
 
-    def _build_prompt(self, user_query: str, context: str, history: str) -> str:
-        """Builds the prompt for the LLM"""
-        logger.info("building prompt for LLM")
+        A session that already holds an LLM context only gets the new documents and question.
+        """
+        logger.debug("building prompt for LLM")
+        with self.metrics.time("rag.prompt"):
+            if session and session.context:
+                return self._format_continuation(user_query, context)
+            return self._format_prompt(user_query, context, history)
+
+    def _format_continuation(self, user_query: str, context: RetrievedContext) -> str:
+        if self.continuation_builder:
+            return self.continuation_builder.build(user_query, context.documents, [])
+        return self.continuation_prompt.format(context="\n".join(context.documents), user_query=user_query)
+
+    def _format_prompt(self, user_query: str, context: RetrievedContext, history: list[Conversation]) -> str:
+        if self.prompt_builder:
+            return self.prompt_builder.build(user_query, context.documents, history)
+        formatted_history = "\n".join(
+            [f"User: {conversation.user_msg}\nBot: {conversation.bot_msg}" 
+             for conversation in reversed(history)]
+        )
         return self.system_prompt.format(
-            context=context,
-            history=history if history else "No hay historial previo",
+            context="\n".join(context.documents),
+            history=formatted_history if formatted_history else "No hay historial previo",
             user_query=user_query
-        )
\ No newline at end of file
+        )
@@ -1,29 +1,138 @@
+import hashlib
+import json
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator
 from api.application.interfaces.train_service import ITrainService
 from api.application.interfaces.document_loader import IDocumentLoader
 from api.application.interfaces.embedding_service import IEmbeddingService
 from api.application.interfaces.database_repository import IDatabaseRepository
+from api.application.interfaces.lexical_index import ILexicalIndex
+from api.application.interfaces.semantic_cache import ISemanticCache
+from api.application.interfaces.metrics import IMetrics
+from api.application.services.null_metrics import NullMetrics
+from api.domain.entities import Document, DocumentChunk
 
 logger = logging.getLogger(__name__)
 
 class TrainService(ITrainService):
-    def __init__(self, folder_path: str, document_loader:IDocumentLoader, database_repo=IDatabaseRepository, embedding_service=IEmbeddingService):
+    def __init__(self, folder_path: str, document_loader:IDocumentLoader, database_repo=IDatabaseRepository, embedding_service=IEmbeddingService, batch_size: int = 64, semantic_cache: ISemanticCache = None, lexical_index: ILexicalIndex = None, metrics: IMetrics = None):
         """Initialize the TrainService with a DocumentLoader instance."""
         self.document_loader = document_loader
         self.embeding_service = embedding_service
         self.database_repo = database_repo
         self.folder_path = folder_path
+        self.batch_size = batch_size
+        self.semantic_cache = semantic_cache
+        self.lexical_index = lexical_index
+        self.metrics = metrics or NullMetrics()
 
-    def train(self) -> None:
-        """Train the model with the company information."""
-        documents = self.document_loader.load_pdfs(self.folder_path)
+    def train(self, progress: Callable[[dict], None] = None) -> None:
+        """Train the model with the company information.
+
+        The folder is diffed against the manifests of the database and lexical index, so only new or
+        changed documents are embedded and the chunks of changed or removed ones are evicted.
+        Chunks are encoded in batches and written with one bulk request per batch.
+        While batch N is being written to the database, batch N+1 is already encoding.
+        progress, if given, receives the document and chunk counters after every written batch.
+        """
+        with self.metrics.time("ingest.run"):
+            self._train(progress or (lambda counters: None))
+
+    def _train(self, report: Callable[[dict], None]) -> None:
+        with self.metrics.time("ingest.list_sources"):
+            sources = self.document_loader.list_sources(self.folder_path)
+        signature = self._ingest_signature()
+        with self.metrics.time("ingest.manifest"):
+            manifests = [store.get_manifest() for store in self._stores()]
+
+        # A document is up to date only if every store indexed the same version of it
+        changed = {
+            name for name, content_hash in sources.items()
+            if any(manifest.get(name) != {"content_hash": content_hash, "ingest_signature": signature} for manifest in manifests)
+        }
+        indexed = set().union(*(manifest.keys() for manifest in manifests))
+        stale = (indexed - sources.keys()) | (changed & indexed)
+        if stale:
+            logger.info(f"Removing chunks of {len(stale)} removed or changed documents")
+            with self.metrics.time("ingest.delete"):
+                for store in self._stores():
+                    store.delete_sources(sorted(stale))
+        logger.info(f"{len(changed)} documents to index, {len(sources) - len(changed)} unchanged")
+        counters = {
+            "documents_total": len(sources),
+            "documents_changed": len(changed),
+            "documents_removed": len(stale - changed),
+            "documents_loaded": 0,
+            "chunks_indexed": 0
+        }
+        report(counters)
+        if changed:
+            self._index(changed, sources, signature, counters, report)
+        if stale or changed:
+            with self.metrics.time("ingest.flush"):
+                for store in self._stores():
+                    store.flush()
+            if self.semantic_cache:
+                # Cached answers were generated from the previous corpus
+                self.semantic_cache.clear()
+
+    def _index(self, changed: set[str], sources: dict[str, str], signature: str, counters: dict, report: Callable[[dict], None]) -> None:
+        """Encode and write the chunks of the changed documents, overlapping encoding with writes."""
+        documents = self.document_loader.load_pdfs(self.folder_path, skip=lambda name: name not in changed)
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-writer") as writer:
+            pending: Future = None
+            for batch in self._batches(self._new_chunks(documents, sources, signature, counters)):
+                with self.metrics.time("ingest.embed"):
+                    self.embeding_service.embed_all(batch)
+                if pending:
+                    pending.result()
+                    report(counters)
+                logger.info(f"Writing batch of {len(batch)} chunks")
+                pending = writer.submit(self._write, batch, counters)
+            if pending:
+                pending.result()
+                report(counters)
+
+    def _stores(self) -> list:
+        """The vector database and, when enabled, the lexical index, both kept in sync with the folder."""
+        return [self.database_repo] + ([self.lexical_index] if self.lexical_index else [])
+
+    def _write(self, batch: list[DocumentChunk], counters: dict) -> None:
+        with self.metrics.time("ingest.write"):
+            for store in self._stores():
+                store.add_chunks(batch)
+        counters["chunks_indexed"] += len(batch)
+        self.metrics.increment("ingest.chunks", len(batch))
+
+    def _ingest_signature(self) -> str:
+        """Hash of the chunking and model parameters, a change in any of them invalidates every stored chunk."""
+        settings = {**self.document_loader.get_chunk_settings(), "model": self.embeding_service.get_model_name()}
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+
+    def _new_chunks(self, documents: Iterable[Document], sources: dict[str, str], signature: str, counters: dict) -> Iterator[DocumentChunk]:
+        """Yield the chunks of every loaded document tagged with its manifest entry."""
         for document in documents:
-            if not self.database_repo.has_source(document.name):
-                logger.info(f"Loading document: {document.name}")
-                chunks = self.document_loader.split_text(document)
-                for chunk in chunks:
-                    self.embeding_service.embed(chunk)
-                    self.database_repo.add_chunk(chunk)
-            else:
-                logger.info(f"Document {document.name} already exists in the database, skipping.")
-        
\ No newline at end of file
+            logger.info(f"Loading document: {document.name}")
+            counters["documents_loaded"] += 1
+            chunks = self.document_loader.split_text(document)
+            for chunk in chunks:
+                # The manifest only trusts the hash once all chunk_count chunks of the document are stored
+                chunk.metadata = {
+                    **(chunk.metadata or {}),
+                    "content_hash": sources[document.name],
+                    "ingest_signature": signature,
+                    "chunk_count": len(chunks)
+                }
+                yield chunk
+
+    def _batches(self, chunks: Iterable[DocumentChunk]) -> Iterator[list[DocumentChunk]]:
+        """Group chunks into lists of at most batch_size elements."""
+        batch = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -7,6 +7,11 @@ class Conversation(BaseModel):
     bot_msg: str
     timestamp: datetime = datetime.now()
 
+class ConversationSession(BaseModel):
+    user_id: str
+    version: str = ""
+    context: list[int] = []
+
 class Document(BaseModel):
     content: str
     name: str
@@ -16,3 +21,13 @@ class DocumentChunk(BaseModel):
     source: str
     chunk_id: str = None
     embedding: list[float] = None
+    metadata: dict = None
+
+class RetrievedContext(BaseModel):
+    query_embedding: list[float]
+    ids: list[str] = []
+    documents: list[str] = []
+
+class Answer(BaseModel):
+    response: str
+    cached: bool = False
@@ -0,0 +1,10 @@
+class OverloadedError(Exception):
+    """Raised when a request is rejected to protect the LLM backend, retry_after is in seconds."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class UserRateLimitedError(OverloadedError):
+    """Raised when a single user already has too many requests waiting."""
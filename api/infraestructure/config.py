@@ -5,28 +5,103 @@ class AppSettings(BaseSettings):
     app_name: str = "Chatbot RAG"
     description: str = "Chatbot"
     log_level: str = "INFO"
+    # Loads the embedding model in the background and skips the blocking Ollama check, so the port is bound sooner
+    fast_startup: bool = os.getenv("FAST_STARTUP", "false").lower() == "true"
     
     folder_path: str = "./documents"
+    loader_max_workers: int = int(os.getenv("LOADER_MAX_WORKERS", os.cpu_count() or 1))
+    pdf_extraction_backend: str = os.getenv("PDF_EXTRACTION_BACKEND", "auto")
+    pdf_page_cache_enabled: bool = os.getenv("PDF_PAGE_CACHE_ENABLED", "true").lower() == "true"
+    pdf_page_cache_path: str = os.getenv("PDF_PAGE_CACHE_PATH", "./vector_store/pages")
     
     redis_host: str = os.getenv("REDIS_HOST", "redis")
     redis_port: int = int(os.getenv("REDIS_PORT", 6379))
     redis_db: int =  int(os.getenv("REDIS_DB", 0))
 
+    vector_store_backend: str = os.getenv("VECTOR_STORE_BACKEND", "chroma")
+    vector_store_path: str = os.getenv("VECTOR_STORE_PATH", "./vector_store")
+    vector_store_index: str = os.getenv("VECTOR_STORE_INDEX", "flat")
+
+    lexical_index_enabled: bool = os.getenv("LEXICAL_INDEX_ENABLED", "true").lower() == "true"
+    lexical_index_path: str = os.getenv("LEXICAL_INDEX_PATH", "./vector_store/lexical_index.json")
+
+    rag_n_results: int = int(os.getenv("RAG_N_RESULTS", 3))
+    rag_n_candidates: int = int(os.getenv("RAG_N_CANDIDATES", 10))
+
     chroma_host: str = os.getenv("CHROMA_HOST", "chroma-db")
     chroma_port: int = int(os.getenv("CHROMA_PORT", 8000))
     chroma_auth_token: str = os.getenv("CHROMA_AUTH_TOKEN", "")
     chroma_collection: str = "documents"
+
+    # Stored in Chroma, so it is skipped with the embedded vector store backend
+    semantic_cache_enabled: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    semantic_cache_collection: str = os.getenv("SEMANTIC_CACHE_COLLECTION", "documents_answers")
+    semantic_cache_threshold: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95))
+    semantic_cache_ttl: int = int(os.getenv("SEMANTIC_CACHE_TTL", 86400))
     
     chunk_size: int = 700
     chunk_overlap: int = 50
+    ingest_batch_size: int = int(os.getenv("INGEST_BATCH_SIZE", 64))
+    ingest_on_startup: bool = os.getenv("INGEST_ON_STARTUP", "true").lower() == "true"
+    ingest_lock_ttl: int = int(os.getenv("INGEST_LOCK_TTL", 600))
+    ingest_nice: int = int(os.getenv("INGEST_NICE", 10))
+    document_watcher_enabled: bool = os.getenv("DOCUMENT_WATCHER_ENABLED", "false").lower() == "true"
+    document_watcher_debounce_ms: int = int(os.getenv("DOCUMENT_WATCHER_DEBOUNCE_MS", 2000))
     
     embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_backend: str = os.getenv("EMBEDDING_BACKEND", "torch")
+    embedding_onnx_path: str = os.getenv("EMBEDDING_ONNX_PATH", "./models/onnx")
+    chunk_embedding_store_enabled: bool = os.getenv("CHUNK_EMBEDDING_STORE_ENABLED", "true").lower() == "true"
+    chunk_embedding_store_path: str = os.getenv("CHUNK_EMBEDDING_STORE_PATH", "./vector_store/embeddings")
+    embedding_max_workers: int = int(os.getenv("EMBEDDING_MAX_WORKERS", 2))
+    embedding_batch_enabled: bool = os.getenv("EMBEDDING_BATCH_ENABLED", "true").lower() == "true"
+    embedding_batch_max_size: int = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", 32))
+    embedding_batch_max_wait_ms: float = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", 5))
+    embedding_cache_enabled: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    embedding_cache_size: int = int(os.getenv("EMBEDDING_CACHE_SIZE", 1024))
+    embedding_cache_ttl: int = int(os.getenv("EMBEDDING_CACHE_TTL", 86400))
+    # One model per host served by the leader worker over a Unix socket, instead of one per uvicorn worker
+    embedding_shared: bool = os.getenv("EMBEDDING_SHARED", "false").lower() == "true"
+    embedding_socket_path: str = os.getenv("EMBEDDING_SOCKET_PATH", "/tmp/meli-bot-embedding.sock")
+    embedding_connect_timeout: float = float(os.getenv("EMBEDDING_CONNECT_TIMEOUT", 60))
+    # The worker holding this lock ingests and watches the documents, empty lets every worker try
+    worker_leader_lock_path: str = os.getenv("WORKER_LEADER_LOCK_PATH", "/tmp/meli-bot-leader.lock")
     
     ollama_host: str = os.getenv("OLLAMA_HOST", "localhost")
-    ollama_port: str = int(os.getenv("OLLAMA_PORT", "11434"))
+    ollama_port: int = int(os.getenv("OLLAMA_PORT", "11434"))
     ollama_model: str = os.getenv("OLLAMA_MODEL", "phi3:instruct")
     ollama_model_prompt_format: str = os.getenv("OLLAMA_MODEL_PROMPT_FORMAT", "<|user|>\n{prompt}<|end|>\n<|assistant|>")
     ollama_timeout: int = int(os.getenv("OLLAMA_TIMEOUT", 240))
+    ollama_num_ctx: int = int(os.getenv("OLLAMA_NUM_CTX", 1024))
+    ollama_keep_alive: str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    ollama_pool_size: int = int(os.getenv("OLLAMA_POOL_SIZE", 10))
+    ollama_connect_timeout: float = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", 5))
+    ollama_warm_up: bool = os.getenv("OLLAMA_WARM_UP", "true").lower() == "true"
+    # host:port[;model[;max_concurrency]] entries separated by commas, overrides ollama_host and ollama_port
+    ollama_endpoints: str = os.getenv("OLLAMA_ENDPOINTS", "")
+    ollama_probe_interval: float = float(os.getenv("OLLAMA_PROBE_INTERVAL", 10))
+
+    llm_scheduler_enabled: bool = os.getenv("LLM_SCHEDULER_ENABLED", "true").lower() == "true"
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", 2))
+    llm_max_queue: int = int(os.getenv("LLM_MAX_QUEUE", 50))
+    llm_max_queue_per_user: int = int(os.getenv("LLM_MAX_QUEUE_PER_USER", 3))
+    llm_max_wait: float = float(os.getenv("LLM_MAX_WAIT", 60))
+
+    # Longest answer the LLM may generate, in tokens. With PROMPT_TOKEN_BUDGET and the prompt format it has to fit in OLLAMA_NUM_CTX
+    llm_max_tokens: int = int(os.getenv("LLM_MAX_TOKENS", 200))
+    llm_context_reuse: bool = os.getenv("LLM_CONTEXT_REUSE", "false").lower() == "true"
+    llm_context_reuse_max_tokens: int = int(os.getenv("LLM_CONTEXT_REUSE_MAX_TOKENS", 3072))
+    llm_context_reuse_ttl: int = int(os.getenv("LLM_CONTEXT_REUSE_TTL", 3600))
+
+    chat_batch_max_size: int = int(os.getenv("CHAT_BATCH_MAX_SIZE", 64))
+    chat_batch_concurrency: int = int(os.getenv("CHAT_BATCH_CONCURRENCY", 2))
+
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    otel_service_name: str = os.getenv("OTEL_SERVICE_NAME", "meli-bot")
+    otel_exporter_otlp_endpoint: str = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")
+
+    prompt_token_budget: int = int(os.getenv("PROMPT_TOKEN_BUDGET", 768))
+    prompt_tokenizer: str = os.getenv("PROMPT_TOKENIZER", "")
 
     class Config:
         env_file = ".env"
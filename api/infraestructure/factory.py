@@ -0,0 +1,157 @@
+import logging
+from api.application.interfaces.embedding_service import IEmbeddingService
+from api.application.interfaces.tokenizer import ITokenizer
+from api.application.services.llm_scheduler import LLMScheduler
+from api.infraestructure.config import AppSettings
+from api.infraestructure.services.chunk_embedding_store import ChunkEmbeddingStore
+from api.infraestructure.services.document_loader import DocumentLoader
+from api.infraestructure.services.embedding_batcher import EmbeddingBatcher
+from api.infraestructure.services.embedding_cache import EmbeddingCache
+from api.infraestructure.services.llm_pool import LLMNode, LLMPool, parse_endpoints
+from api.infraestructure.services.llm_service import LLMService
+
+logger = logging.getLogger(__name__)
+
+# Builders shared by the API, the ingestion job and the load test, so the three wire the components the same way
+
+
+def build_database_repo(settings: AppSettings):
+    # Backend modules are imported on demand so a deployment never pays for the clients it does not use
+    if settings.vector_store_backend == "embedded":
+        from api.infraestructure.repositories.embedded_database_repository import EmbeddedDatabaseRepository
+        return EmbeddedDatabaseRepository(path= settings.vector_store_path, index_type= settings.vector_store_index)
+    from api.infraestructure.repositories.database_repository import DatabaseRepository
+    return DatabaseRepository(host= settings.chroma_host, port= settings.chroma_port, collection_name= settings.chroma_collection, auth_token= settings.chroma_auth_token)
+
+
+def build_semantic_cache(settings: AppSettings):
+    if not settings.semantic_cache_enabled:
+        return None
+    if settings.vector_store_backend == "embedded":
+        # The answers live in a Chroma collection, and the embedded backend is meant to run without a Chroma server
+        logger.info("Semantic cache disabled, it is stored in Chroma and VECTOR_STORE_BACKEND is embedded")
+        return None
+    from api.infraestructure.repositories.semantic_cache_repository import SemanticCacheRepository
+    return SemanticCacheRepository(
+        host= settings.chroma_host,
+        port= settings.chroma_port,
+        collection_name= settings.semantic_cache_collection,
+        auth_token= settings.chroma_auth_token,
+        similarity_threshold= settings.semantic_cache_threshold,
+        ttl= settings.semantic_cache_ttl
+    )
+
+
+def build_lexical_index(settings: AppSettings):
+    if not settings.lexical_index_enabled:
+        return None
+    from api.infraestructure.repositories.lexical_index_repository import LexicalIndexRepository
+    return LexicalIndexRepository(path= settings.lexical_index_path)
+
+
+def build_document_loader(settings: AppSettings) -> DocumentLoader:
+    return DocumentLoader(
+        chunk_size= settings.chunk_size,
+        chunk_overlap= settings.chunk_overlap,
+        max_workers= settings.loader_max_workers,
+        pdf_backend= settings.pdf_extraction_backend,
+        page_cache_path= settings.pdf_page_cache_path if settings.pdf_page_cache_enabled else None
+    )
+
+
+def embedding_model_name(settings: AppSettings) -> str:
+    """Name the embedding service reports, known without loading the model."""
+    return f"{settings.embedding_model_name}@int8" if settings.embedding_backend == "onnx-int8" else settings.embedding_model_name
+
+
+def build_embedding_model(settings: AppSettings):
+    if settings.embedding_backend in ("onnx", "onnx-int8"):
+        from api.infraestructure.services.onnx_embedding_service import OnnxEmbeddingService
+        return OnnxEmbeddingService(model_name= settings.embedding_model_name, model_path= settings.embedding_onnx_path, quantized= settings.embedding_backend == "onnx-int8", max_workers= settings.embedding_max_workers)
+    from api.infraestructure.services.embedding_service import EmbeddingService
+    return EmbeddingService(model_name= settings.embedding_model_name, max_workers= settings.embedding_max_workers)
+
+
+def build_chunk_embedding_store(embedding_service: IEmbeddingService, settings: AppSettings, stats_providers: dict = None) -> IEmbeddingService:
+    """Wraps the model with the on-disk store of chunk vectors when it is enabled."""
+    if not settings.chunk_embedding_store_enabled:
+        return embedding_service
+    embedding_service = ChunkEmbeddingStore(embedding_service, path= settings.chunk_embedding_store_path)
+    if stats_providers is not None:
+        stats_providers["chunk_embedding_store"] = embedding_service.stats
+    return embedding_service
+
+
+def build_query_embedding_service(embedding_service: IEmbeddingService, settings: AppSettings, stats_providers: dict = None, redis_client=None, batching: bool = True) -> IEmbeddingService:
+    """Wraps the embedding service with the batcher and the query embedding cache, as enabled.
+    Without a redis_client the cache only keeps its in-process tier."""
+    stats_providers = {} if stats_providers is None else stats_providers
+    if batching and settings.embedding_batch_enabled:
+        embedding_service = EmbeddingBatcher(
+            embedding_service,
+            max_batch_size= settings.embedding_batch_max_size,
+            max_wait_ms= settings.embedding_batch_max_wait_ms,
+            max_concurrent_batches= settings.embedding_max_workers
+        )
+        stats_providers["embedding_batcher"] = embedding_service.stats
+    if settings.embedding_cache_enabled:
+        embedding_service = EmbeddingCache(
+            embedding_service,
+            redis_client= redis_client,
+            max_size= settings.embedding_cache_size,
+            ttl= settings.embedding_cache_ttl
+        )
+        stats_providers["embedding_cache"] = embedding_service.stats
+    return embedding_service
+
+
+def build_llm_service(settings: AppSettings, metrics=None, verify_connection: bool = True):
+    """Returns the LLM service and how many generations it can run at once."""
+    if not settings.ollama_endpoints:
+        llm_service = LLMService(base_url= settings.ollama_host, port= settings.ollama_port, model_name=settings.ollama_model, timeout=settings.ollama_timeout, prompt_format=settings.ollama_model_prompt_format, num_ctx=settings.ollama_num_ctx, keep_alive=settings.ollama_keep_alive, pool_size=settings.ollama_pool_size, connect_timeout=settings.ollama_connect_timeout, metrics=metrics, verify_connection=verify_connection)
+        return llm_service, settings.llm_max_concurrency
+    llm_service = LLMPool(
+        [
+            LLMNode(
+                name= f"{endpoint.host}:{endpoint.port}",
+                service= LLMService(base_url= endpoint.host, port= endpoint.port, model_name= endpoint.model, timeout=settings.ollama_timeout, prompt_format=settings.ollama_model_prompt_format, num_ctx=settings.ollama_num_ctx, keep_alive=settings.ollama_keep_alive, pool_size=settings.ollama_pool_size, connect_timeout=settings.ollama_connect_timeout, metrics=metrics, verify_connection=False),
+                max_concurrency= endpoint.max_concurrency
+            )
+            for endpoint in parse_endpoints(settings.ollama_endpoints, settings.ollama_model, settings.llm_max_concurrency)
+        ],
+        probe_interval= settings.ollama_probe_interval,
+        metrics= metrics
+    )
+    # The admission queue then admits as many generations as all the nodes can run together
+    return llm_service, llm_service.capacity
+
+
+def build_llm_scheduler(llm_service, max_concurrency: int, settings: AppSettings, stats_providers: dict = None):
+    """Wraps the LLM service with the admission queue when it is enabled."""
+    stats_providers = {} if stats_providers is None else stats_providers
+    if isinstance(llm_service, LLMPool):
+        stats_providers["llm_pool"] = llm_service.stats
+    if not settings.llm_scheduler_enabled:
+        return llm_service
+    llm_service = LLMScheduler(
+        llm_service,
+        max_concurrency= max_concurrency,
+        max_queue= settings.llm_max_queue,
+        max_queue_per_user= settings.llm_max_queue_per_user,
+        max_wait= settings.llm_max_wait
+    )
+    stats_providers["llm_scheduler"] = llm_service.stats
+    return llm_service
+
+
+def check_context_window(settings: AppSettings, tokenizer: ITokenizer) -> None:
+    """Warns when the longest prompt, the prompt_format around it and the answer do not fit in num_ctx,
+    since Ollama then drops the start of the prompt."""
+    wrapper_tokens = tokenizer.count_tokens(settings.ollama_model_prompt_format.replace("{prompt}", ""))
+    needed = settings.prompt_token_budget + wrapper_tokens + settings.llm_max_tokens
+    if needed > settings.ollama_num_ctx:
+        logger.warning(
+            f"OLLAMA_NUM_CTX {settings.ollama_num_ctx} is smaller than the sum of PROMPT_TOKEN_BUDGET {settings.prompt_token_budget}, "
+            f"the {wrapper_tokens} tokens of OLLAMA_MODEL_PROMPT_FORMAT and LLM_MAX_TOKENS {settings.llm_max_tokens}, "
+            f"long prompts will be truncated"
+        )
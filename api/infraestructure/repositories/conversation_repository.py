@@ -1,28 +1,27 @@
 import redis
+import redis.asyncio as aioredis
 import json
 import logging
 from datetime import datetime
 from typing import List
-from api.domain.entities import Conversation
-from api.application.interfaces.conversation_repository import IConversationRepository
+from api.domain.entities import Conversation, ConversationSession
+from api.application.interfaces.conversation_repository import IConversationRepository, IAsyncConversationRepository
 
 logger = logging.getLogger(__name__)
 
-class ConversationRepository(IConversationRepository):
+class ConversationRepository(IConversationRepository, IAsyncConversationRepository):
     """Repository to manage conversation history using Redis"""
 
-    def __init__(self, host: str = "redis", port: int = 6379, db: int = 0):
+    def __init__(self, host: str = "redis", port: int = 6379, db: int = 0, session_ttl: int = 3600):
         self.client = redis.Redis(host, port, db, decode_responses=True)
+        self.async_client = aioredis.Redis(host=host, port=port, db=db, decode_responses=True)
+        self.session_ttl = session_ttl
 
     def save_conversation(self, conversation: Conversation) -> None:
         """Saves a conversation in Redis, storing the last 10 interactions per user"""
-        logger.info(f"saving conversation for user {conversation.user_id}")
-        key = f"conversations:{conversation.user_id}"
-        interaction = json.dumps({
-            "user": conversation.user_msg,
-            "bot": conversation.bot_msg,
-            "timestamp": conversation.timestamp.isoformat()
-        })
+        logger.debug(f"saving conversation for user {conversation.user_id}")
+        key = self._key(conversation.user_id)
+        interaction = self._serialize(conversation)
         try:
             with self.client.pipeline() as pipe:
                 pipe.lpush(key, interaction)
@@ -32,11 +31,105 @@ class ConversationRepository(IConversationRepository):
             logger.error(f"Error saving conversation to Redis: {str(e)}")
             raise Exception(f"Error saving conversation to Redis: {str(e)}")
 
+    async def asave_conversation(self, conversation: Conversation) -> None:
+        """Saves a conversation in Redis without blocking the event loop"""
+        logger.debug(f"saving conversation for user {conversation.user_id}")
+        key = self._key(conversation.user_id)
+        interaction = self._serialize(conversation)
+        try:
+            async with self.async_client.pipeline() as pipe:
+                pipe.lpush(key, interaction)
+                pipe.ltrim(key, 0, 9)
+                await pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Error saving conversation to Redis: {str(e)}")
+            raise Exception(f"Error saving conversation to Redis: {str(e)}")
+
     def get_conversation_history(self, user_id: str) -> List[Conversation]:
         """Gets the last 10 interactions of a user from Redis"""
-        key = f"conversations:{user_id}"
-        interactions = self.client.lrange(key, 0, 9)
-        
+        interactions = self.client.lrange(self._key(user_id), 0, 9)
+        return self._deserialize(user_id, interactions)
+
+    async def aget_conversation_history(self, user_id: str) -> List[Conversation]:
+        """Gets the last 10 interactions of a user from Redis without blocking the event loop"""
+        interactions = await self.async_client.lrange(self._key(user_id), 0, 9)
+        return self._deserialize(user_id, interactions)
+
+    def get_conversation_histories(self, user_ids: list[str]) -> dict[str, List[Conversation]]:
+        """Gets the last 10 interactions of many users in a single pipelined round trip"""
+        with self.client.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.lrange(self._key(user_id), 0, 9)
+            results = pipe.execute()
+        return {user_id: self._deserialize(user_id, interactions) for user_id, interactions in zip(user_ids, results)}
+
+    async def aget_conversation_histories(self, user_ids: list[str]) -> dict[str, List[Conversation]]:
+        """Gets the last 10 interactions of many users in a single pipelined round trip without blocking the event loop"""
+        async with self.async_client.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.lrange(self._key(user_id), 0, 9)
+            results = await pipe.execute()
+        return {user_id: self._deserialize(user_id, interactions) for user_id, interactions in zip(user_ids, results)}
+
+    def get_session(self, user_id: str) -> ConversationSession | None:
+        """Gets the LLM context saved for a user"""
+        return self._deserialize_session(user_id, self.client.get(self._session_key(user_id)))
+
+    async def aget_session(self, user_id: str) -> ConversationSession | None:
+        """Gets the LLM context saved for a user without blocking the event loop"""
+        return self._deserialize_session(user_id, await self.async_client.get(self._session_key(user_id)))
+
+    def save_session(self, session: ConversationSession) -> None:
+        """Saves the LLM context of a user, it expires after session_ttl seconds without a new turn"""
+        try:
+            self.client.set(self._session_key(session.user_id), self._serialize_session(session), ex=self.session_ttl)
+        except redis.RedisError as e:
+            logger.error(f"Error saving session to Redis: {str(e)}")
+            raise Exception(f"Error saving session to Redis: {str(e)}")
+
+    async def asave_session(self, session: ConversationSession) -> None:
+        """Saves the LLM context of a user without blocking the event loop"""
+        try:
+            await self.async_client.set(self._session_key(session.user_id), self._serialize_session(session), ex=self.session_ttl)
+        except redis.RedisError as e:
+            logger.error(f"Error saving session to Redis: {str(e)}")
+            raise Exception(f"Error saving session to Redis: {str(e)}")
+
+    def clear_session(self, user_id: str) -> None:
+        """Forgets the LLM context of a user"""
+        self.client.delete(self._session_key(user_id))
+
+    async def aclear_session(self, user_id: str) -> None:
+        """Forgets the LLM context of a user without blocking the event loop"""
+        await self.async_client.delete(self._session_key(user_id))
+
+    def _key(self, user_id: str) -> str:
+        return f"conversations:{user_id}"
+
+    def _session_key(self, user_id: str) -> str:
+        return f"sessions:{user_id}"
+
+    def _serialize_session(self, session: ConversationSession) -> str:
+        return json.dumps({"version": session.version, "context": session.context})
+
+    def _deserialize_session(self, user_id: str, item: str) -> ConversationSession | None:
+        if not item:
+            return None
+        try:
+            data = json.loads(item)
+            return ConversationSession(user_id=user_id, version=data["version"], context=data["context"])
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Discarding unreadable session of user {user_id}: {str(e)}")
+            return None
+
+    def _serialize(self, conversation: Conversation) -> str:
+        return json.dumps({
+            "user": conversation.user_msg,
+            "bot": conversation.bot_msg,
+            "timestamp": conversation.timestamp.isoformat()
+        })
+
+    def _deserialize(self, user_id: str, interactions: list[str]) -> List[Conversation]:
         history = []
         try:
             for item in interactions:
@@ -51,4 +144,4 @@ class ConversationRepository(IConversationRepository):
         except Exception as e:
             logger.error(f"Error retrieving conversation history: {str(e)}")
             raise Exception(f"Error retrieving conversation history: {str(e)}")
-        return history
\ No newline at end of file
+        return history
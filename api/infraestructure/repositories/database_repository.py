@@ -1,14 +1,16 @@
+import asyncio
 import chromadb
 import logging
 from typing import Any
 from chromadb.config import Settings
 from chromadb.errors import ChromaError
-from api.application.interfaces.database_repository import IDatabaseRepository
+from api.application.interfaces.database_repository import IDatabaseRepository, IAsyncDatabaseRepository
 from api.domain.entities import DocumentChunk
+from api.infraestructure.repositories.manifest import build_manifest
 
 logger = logging.getLogger(__name__)
 
-class DatabaseRepository(IDatabaseRepository):
+class DatabaseRepository(IDatabaseRepository, IAsyncDatabaseRepository):
     _instance = None
 
     def __init__(self, host: str = "chroma-db", port: int = "8000", collection_name: str = "documents", auth_token: str = ""):
@@ -28,6 +30,7 @@ class DatabaseRepository(IDatabaseRepository):
                 )
             )
             self.client.heartbeat()
+            self.max_batch_size = self.client.get_max_batch_size()
             self.collection = self.client.get_or_create_collection(
                 name=collection_name,
                 metadata={"hnsw:space": "cosine"}  # Métrica de similitud - coseno recomendada para embeddings de texto
@@ -48,6 +51,20 @@ class DatabaseRepository(IDatabaseRepository):
         except ChromaError as e:
             raise ValueError(f"Failed to add document: {str(e)}") from e
 
+    def add_chunks(self, chunks: list[DocumentChunk]) -> None:
+        """Upserts many document chunks, one request per server max batch size."""
+        try:
+            for start in range(0, len(chunks), self.max_batch_size):
+                batch = chunks[start:start + self.max_batch_size]
+                self.collection.upsert(
+                    ids=[chunk.chunk_id for chunk in batch],
+                    embeddings=[chunk.embedding for chunk in batch],
+                    documents=[chunk.text for chunk in batch],
+                    metadatas=[{**(chunk.metadata or {}), "source": chunk.source} for chunk in batch]
+                )
+        except ChromaError as e:
+            raise ValueError(f"Failed to add documents: {str(e)}") from e
+
 
     def search_similar(self, query_embedding: list[float], n_results: int = 5, filter: dict = None) -> dict[str, list[list[Any]]]:
         """Searches for similar document chunks based on the query embedding."""
@@ -60,6 +77,25 @@ class DatabaseRepository(IDatabaseRepository):
         except ChromaError as e:
             raise ValueError(f"Search failed: {str(e)}") from e
 
+    async def asearch_similar(self, query_embedding: list[float], n_results: int = 5, filter: dict = None) -> dict[str, list[list[Any]]]:
+        """Searches for similar document chunks off the event loop, the Chroma HttpClient is blocking."""
+        return await asyncio.to_thread(self.search_similar, query_embedding, n_results, filter)
+
+    def search_similar_many(self, query_embeddings: list[list[float]], n_results: int = 5, filter: dict = None) -> dict[str, list[list[Any]]]:
+        """Searches for the chunks similar to every query embedding in one request, results are in query order."""
+        try:
+            return self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=filter
+            )
+        except ChromaError as e:
+            raise ValueError(f"Search failed: {str(e)}") from e
+
+    async def asearch_similar_many(self, query_embeddings: list[list[float]], n_results: int = 5, filter: dict = None) -> dict[str, list[list[Any]]]:
+        """Searches for the chunks similar to every query embedding off the event loop."""
+        return await asyncio.to_thread(self.search_similar_many, query_embeddings, n_results, filter)
+
     def is_empty(self) -> bool:
         """Verifies if the database is empty."""
         try:
@@ -78,4 +114,31 @@ class DatabaseRepository(IDatabaseRepository):
             )
             return len(results["ids"]) > 0
         except ChromaError as e:
-            raise ValueError(f"Failed to check sources: {str(e)}") from e
\ No newline at end of file
+            raise ValueError(f"Failed to check sources: {str(e)}") from e
+
+    def get_manifest(self) -> dict[str, dict]:
+        """Builds the per-source manifest from the metadata stored with each chunk."""
+        metadatas = []
+        try:
+            offset = 0
+            while True:
+                page = self.collection.get(include=["metadatas"], limit=self.max_batch_size, offset=offset)
+                metadatas.extend(page["metadatas"])
+                if len(page["ids"]) < self.max_batch_size:
+                    return build_manifest(metadatas)
+                offset += len(page["ids"])
+        except ChromaError as e:
+            raise ValueError(f"Failed to read manifest: {str(e)}") from e
+
+    def delete_sources(self, file_names: list[str]) -> None:
+        """Deletes the chunks of many sources in a single request."""
+        if not file_names:
+            return
+        try:
+            self.collection.delete(where={"source": {"$in": list(file_names)}})
+        except ChromaError as e:
+            raise ValueError(f"Failed to delete sources: {str(e)}") from e
+
+    def flush(self) -> None:
+        """Chroma persists every write as it happens."""
+        pass
@@ -0,0 +1,310 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Any
+import numpy as np
+from api.application.interfaces.database_repository import IDatabaseRepository, IAsyncDatabaseRepository
+from api.domain.entities import DocumentChunk
+from api.infraestructure.repositories.manifest import build_manifest
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+_CURRENT = "CURRENT"
+_EMBEDDINGS = "embeddings.npy"
+_RECORDS = "records.json"
+_HNSW_INDEX = "index.bin"
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalizes rows so that cosine similarity becomes a dot product."""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _matches(metadata: dict, where: dict) -> bool:
+    """Evaluates the subset of the Chroma where syntax used by the application."""
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for operator, operand in condition.items():
+                if operator == "$eq" and value != operand:
+                    return False
+                if operator == "$ne" and value == operand:
+                    return False
+                if operator == "$in" and value not in operand:
+                    return False
+                if operator == "$nin" and value in operand:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class EmbeddedDatabaseRepository(IDatabaseRepository, IAsyncDatabaseRepository):
+    """In-process vector store: a float32 matrix memory-mapped from disk and searched with NumPy.
+
+    Each flush writes a new snapshot directory and then atomically swaps the CURRENT pointer,
+    so readers never see a partial write. Workers map the same snapshot file, share its pages
+    and reload it when the pointer changes.
+    """
+
+    def __init__(self, path: str = "./vector_store", index_type: str = "flat", reload_interval: float = 1.0, hnsw_m: int = 16, hnsw_ef: int = 64):
+        if index_type not in ("flat", "hnsw"):
+            raise ValueError(f"Unknown vector index type: {index_type}")
+        if index_type == "hnsw" and hnswlib is None:
+            raise RuntimeError("The hnsw vector index requires the hnswlib package")
+        self.path = path
+        self.index_type = index_type
+        self.reload_interval = reload_interval
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef = hnsw_ef
+        self._lock = threading.RLock()
+        self._snapshot: str = None
+        self._last_check = 0.0
+        self._dirty = False
+        self._reset()
+        os.makedirs(path, exist_ok=True)
+        self._load(self._read_pointer())
+
+    def add_chunk(self, chunk: DocumentChunk) -> None:
+        """Adds a document chunk to the in-memory index, visible after the next flush to other workers."""
+        self.add_chunks([chunk])
+
+    def add_chunks(self, chunks: list[DocumentChunk]) -> None:
+        """Upserts many document chunks."""
+        if not chunks:
+            return
+        vectors = _normalize(np.asarray([chunk.embedding for chunk in chunks], dtype=np.float32))
+        with self._lock:
+            self._ensure_writable(len(chunks), vectors.shape[1])
+            # Searches score a view of the first _size rows outside the lock, so rows already there are
+            # never written in place: upserting an existing chunk writes into a copy of the matrix
+            if any(chunk.chunk_id in self._positions for chunk in chunks):
+                self._matrix = self._matrix.copy()
+            for chunk, vector in zip(chunks, vectors):
+                row = self._positions.get(chunk.chunk_id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._ids.append(chunk.chunk_id)
+                    self._documents.append(chunk.text)
+                    self._metadatas.append(None)
+                    self._positions[chunk.chunk_id] = row
+                self._matrix[row] = vector
+                self._documents[row] = chunk.text
+                self._metadatas[row] = {**(chunk.metadata or {}), "source": chunk.source}
+            self._dirty = True
+
+    def search_similar(self, query_embedding: list[float], n_results: int = 5, filter: dict = None) -> dict[str, list[list[Any]]]:
+        """Returns the closest chunks by cosine similarity in the same shape as a Chroma query."""
+        return self.search_similar_many([query_embedding], n_results, filter)
+
+    def search_similar_many(self, query_embeddings: list[list[float]], n_results: int = 5, filter: dict = None) -> dict[str, list[list[Any]]]:
+        """Returns the closest chunks to every query, scoring all of them with a single matrix product."""
+        with self._lock:
+            self._maybe_reload()
+            # Ingestion only appends past size or swaps in a new matrix, so a view of the first size rows
+            # and copies of the lists stay consistent once the lock is released
+            size = self._size
+            matrix = self._matrix[:size] if self._matrix is not None else None
+            ids, documents, metadatas = self._ids[:size], self._documents[:size], self._metadatas[:size]
+            hnsw = self._hnsw if not self._dirty else None
+
+        empty = {key: [[] for _ in query_embeddings] for key in ("ids", "documents", "metadatas", "distances")}
+        if matrix is None or size == 0 or n_results <= 0 or not query_embeddings:
+            return empty
+        queries = _normalize(np.asarray(query_embeddings, dtype=np.float32))
+
+        if hnsw is not None and not filter:
+            labels, distances = hnsw.knn_query(queries, k=min(n_results, size))
+            hits = list(zip(labels, distances))
+        else:
+            rows = np.arange(size)
+            candidates = matrix
+            if filter:
+                rows = np.fromiter((i for i, metadata in enumerate(metadatas) if _matches(metadata or {}, filter)), dtype=np.int64)
+                if len(rows) == 0:
+                    return empty
+                candidates = matrix[rows]
+            scores = queries @ candidates.T
+            k = min(n_results, len(rows))
+            hits = []
+            for query_scores in scores:
+                top = np.argpartition(-query_scores, k - 1)[:k]
+                top = top[np.argsort(-query_scores[top])]
+                hits.append((rows[top], 1 - query_scores[top]))
+
+        return {
+            "ids": [[ids[row] for row in rows] for rows, _ in hits],
+            "documents": [[documents[row] for row in rows] for rows, _ in hits],
+            "metadatas": [[metadatas[row] for row in rows] for rows, _ in hits],
+            "distances": [[float(distance) for distance in distances] for _, distances in hits]
+        }
+
+    async def asearch_similar(self, query_embedding: list[float], n_results: int = 5, filter: dict = None) -> dict[str, list[list[Any]]]:
+        """The search is an in-memory matrix product that takes microseconds, it runs inline."""
+        return self.search_similar(query_embedding, n_results, filter)
+
+    async def asearch_similar_many(self, query_embeddings: list[list[float]], n_results: int = 5, filter: dict = None) -> dict[str, list[list[Any]]]:
+        """The search is an in-memory matrix product, it runs inline."""
+        return self.search_similar_many(query_embeddings, n_results, filter)
+
+    def is_empty(self) -> bool:
+        """Verifies if the database is empty."""
+        with self._lock:
+            return self._size == 0
+
+    def has_source(self, file_name: str) -> bool:
+        """Verifies if a document with the given source exists in the database."""
+        if not file_name:
+            return False
+        with self._lock:
+            return any(metadata and metadata.get("source") == file_name for metadata in self._metadatas)
+
+    def get_manifest(self) -> dict[str, dict]:
+        """Builds the per-source manifest from the metadata stored with each chunk."""
+        with self._lock:
+            return build_manifest(self._metadatas)
+
+    def delete_sources(self, file_names: list[str]) -> None:
+        """Removes the rows of the given sources and compacts the matrix."""
+        targets = set(file_names)
+        if not targets:
+            return
+        with self._lock:
+            keep = [i for i, metadata in enumerate(self._metadatas) if not metadata or metadata.get("source") not in targets]
+            if len(keep) == self._size:
+                return
+            self._matrix = np.array(self._matrix[:self._size][keep], dtype=np.float32)
+            self._ids = [self._ids[i] for i in keep]
+            self._documents = [self._documents[i] for i in keep]
+            self._metadatas = [self._metadatas[i] for i in keep]
+            self._size = len(keep)
+            self._positions = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+            self._dirty = True
+
+    def flush(self) -> None:
+        """Writes a new snapshot and atomically points CURRENT to it."""
+        with self._lock:
+            if not self._dirty:
+                return
+            name = f"snapshot-{time.time_ns()}"
+            directory = os.path.join(self.path, name)
+            os.makedirs(directory)
+            matrix = self._matrix[:self._size] if self._matrix is not None else np.empty((0, 0), dtype=np.float32)
+            with open(os.path.join(directory, _EMBEDDINGS), "wb") as file:
+                np.save(file, matrix)
+                file.flush()
+                os.fsync(file.fileno())
+            with open(os.path.join(directory, _RECORDS), "w", encoding="utf-8") as file:
+                json.dump({"ids": self._ids, "documents": self._documents, "metadatas": self._metadatas}, file, ensure_ascii=False)
+                file.flush()
+                os.fsync(file.fileno())
+            if self.index_type == "hnsw" and self._size:
+                self._build_hnsw(matrix).save_index(os.path.join(directory, _HNSW_INDEX))
+
+            pointer = os.path.join(self.path, _CURRENT)
+            with open(f"{pointer}.tmp", "w") as file:
+                file.write(name)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(f"{pointer}.tmp", pointer)
+            logger.info(f"Vector store snapshot {name} written with {self._size} chunks")
+
+            self._remove_old_snapshots(keep=name)
+            self._load(name)
+
+    def _reset(self) -> None:
+        self._matrix: np.ndarray = None
+        self._size = 0
+        self._ids: list[str] = []
+        self._documents: list[str] = []
+        self._metadatas: list[dict] = []
+        self._positions: dict[str, int] = {}
+        self._hnsw = None
+
+    def _read_pointer(self) -> str:
+        try:
+            with open(os.path.join(self.path, _CURRENT)) as file:
+                return file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _load(self, name: str) -> None:
+        """Maps the snapshot read-only, the pages are shared with every other worker."""
+        if not name:
+            self._snapshot = None
+            return
+        directory = os.path.join(self.path, name)
+        matrix = np.load(os.path.join(directory, _EMBEDDINGS), mmap_mode="r")
+        with open(os.path.join(directory, _RECORDS), encoding="utf-8") as file:
+            records = json.load(file)
+        hnsw = None
+        if self.index_type == "hnsw" and len(records["ids"]):
+            hnsw = hnswlib.Index(space="cosine", dim=matrix.shape[1])
+            hnsw.load_index(os.path.join(directory, _HNSW_INDEX), max_elements=len(records["ids"]))
+            hnsw.set_ef(self.hnsw_ef)
+
+        self._reset()
+        self._matrix = matrix if matrix.size else None
+        self._size = len(records["ids"])
+        self._ids = records["ids"]
+        self._documents = records["documents"]
+        self._metadatas = records["metadatas"]
+        self._positions = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._hnsw = hnsw
+        self._snapshot = name
+        self._dirty = False
+
+    def _maybe_reload(self) -> None:
+        """Picks up snapshots written by other workers, checking the pointer at most once per reload_interval."""
+        now = time.monotonic()
+        if self._dirty or now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        name = self._read_pointer()
+        if name and name != self._snapshot:
+            try:
+                self._load(name)
+                logger.info(f"Reloaded vector store snapshot {name}")
+            except FileNotFoundError:
+                logger.warning(f"Vector store snapshot {name} disappeared before it could be loaded")
+
+    def _ensure_writable(self, extra_rows: int, dimensions: int) -> None:
+        """Copies the read-only mapping into a growable in-memory buffer before the first write."""
+        if self._matrix is None:
+            self._matrix = np.empty((max(extra_rows, 1024), dimensions), dtype=np.float32)
+            return
+        if self._matrix.shape[1] != dimensions:
+            raise ValueError(f"Embedding dimension {dimensions} does not match the store dimension {self._matrix.shape[1]}")
+        capacity = self._matrix.shape[0]
+        if self._matrix.flags.writeable and capacity >= self._size + extra_rows:
+            return
+        grown = np.empty((max(capacity * 2, self._size + extra_rows, 1024), dimensions), dtype=np.float32)
+        grown[:self._size] = self._matrix[:self._size]
+        self._matrix = grown
+
+    def _build_hnsw(self, matrix: np.ndarray):
+        index = hnswlib.Index(space="cosine", dim=matrix.shape[1])
+        index.init_index(max_elements=len(matrix), M=self.hnsw_m, ef_construction=max(self.hnsw_ef, 100))
+        index.add_items(matrix, np.arange(len(matrix)))
+        return index
+
+    def _remove_old_snapshots(self, keep: str) -> None:
+        for entry in os.listdir(self.path):
+            if entry.startswith("snapshot-") and entry != keep:
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
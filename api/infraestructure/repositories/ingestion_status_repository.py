@@ -0,0 +1,56 @@
+import json
+import logging
+import redis
+from api.application.interfaces.ingestion_status_repository import IIngestionStatusRepository
+
+logger = logging.getLogger(__name__)
+
+# Deletes or extends the lock only if it still belongs to the caller
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+_REFRESH_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class IngestionStatusRepository(IIngestionStatusRepository):
+    """Ingestion status and lock stored in Redis, so every replica reports the same progress"""
+
+    def __init__(self, host: str = "redis", port: int = 6379, db: int = 0, key_prefix: str = "ingestion"):
+        self.client = redis.Redis(host, port, db, decode_responses=True)
+        self.status_key = f"{key_prefix}:status"
+        self.lock_key = f"{key_prefix}:lock"
+        self._release = self.client.register_script(_RELEASE_SCRIPT)
+        self._refresh = self.client.register_script(_REFRESH_SCRIPT)
+
+    def get_status(self) -> dict:
+        """Returns the published status, or an idle status if no run was ever recorded"""
+        try:
+            status = self.client.get(self.status_key)
+        except redis.RedisError as e:
+            logger.error(f"Error reading ingestion status from Redis: {str(e)}")
+            return {"state": "unknown"}
+        return json.loads(status) if status else {"state": "idle"}
+
+    def set_status(self, status: dict) -> None:
+        """Publishes the status, a failure only loses a progress update"""
+        try:
+            self.client.set(self.status_key, json.dumps(status))
+        except redis.RedisError as e:
+            logger.error(f"Error saving ingestion status to Redis: {str(e)}")
+
+    def acquire_lock(self, owner: str, ttl: int) -> bool:
+        return bool(self.client.set(self.lock_key, owner, nx=True, ex=ttl))
+
+    def refresh_lock(self, owner: str, ttl: int) -> bool:
+        return bool(self._refresh(keys=[self.lock_key], args=[owner, ttl]))
+
+    def release_lock(self, owner: str) -> None:
+        self._release(keys=[self.lock_key], args=[owner])
@@ -0,0 +1,184 @@
+import asyncio
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Any
+from api.application.interfaces.lexical_index import ILexicalIndex
+from api.domain.entities import DocumentChunk
+from api.infraestructure.repositories.manifest import build_manifest
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercases, strips accents and splits on non-word characters, keeping terms such as code_verifier whole."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _TOKEN_PATTERN.findall(stripped)
+
+
+class LexicalIndexRepository(ILexicalIndex):
+    """BM25 inverted index over the document chunks, persisted as a single JSON file.
+
+    The file is replaced atomically on flush and reloaded by other workers when its mtime changes.
+    """
+
+    def __init__(self, path: str = "./vector_store/lexical_index.json", k1: float = 1.5, b: float = 0.75, reload_interval: float = 1.0):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.reload_interval = reload_interval
+        self._lock = threading.RLock()
+        self._loaded_mtime: float = None
+        self._last_check = 0.0
+        self._dirty = False
+        self._ids: list[str] = []
+        self._documents: list[str] = []
+        self._metadatas: list[dict] = []
+        self._terms: list[dict[str, int]] = []
+        self._postings: dict[str, dict[int, int]] = {}
+        self._lengths: list[int] = []
+        self._load()
+
+    def add_chunks(self, chunks: list[DocumentChunk]) -> None:
+        """Upserts the term frequencies of many chunks."""
+        with self._lock:
+            positions = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+            replaced = False
+            for chunk in chunks:
+                terms = dict(Counter(tokenize(chunk.text)))
+                metadata = {**(chunk.metadata or {}), "source": chunk.source}
+                row = positions.get(chunk.chunk_id)
+                if row is None:
+                    row = len(self._ids)
+                    positions[chunk.chunk_id] = row
+                    self._ids.append(chunk.chunk_id)
+                    self._documents.append(chunk.text)
+                    self._metadatas.append(metadata)
+                    self._terms.append(terms)
+                    self._lengths.append(sum(terms.values()))
+                    for term, frequency in terms.items():
+                        self._postings.setdefault(term, {})[row] = frequency
+                else:
+                    replaced = True
+                    self._documents[row] = chunk.text
+                    self._metadatas[row] = metadata
+                    self._terms[row] = terms
+            if replaced:
+                self._rebuild()
+            self._dirty = True
+
+    def search(self, query: str, n_results: int = 5) -> dict[str, list[list[Any]]]:
+        """Scores the chunks that contain at least one query term with Okapi BM25."""
+        with self._lock:
+            self._maybe_reload()
+            total = len(self._ids)
+            if not total or n_results <= 0:
+                return {"ids": [[]], "documents": [[]], "metadatas": [[]], "scores": [[]]}
+            average_length = sum(self._lengths) / total
+            scores: dict[int, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for row, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[row] / average_length)
+                    scores[row] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+            best = heapq.nlargest(n_results, scores.items(), key=lambda item: item[1])
+            return {
+                "ids": [[self._ids[row] for row, _ in best]],
+                "documents": [[self._documents[row] for row, _ in best]],
+                "metadatas": [[self._metadatas[row] for row, _ in best]],
+                "scores": [[score for _, score in best]]
+            }
+
+    async def asearch(self, query: str, n_results: int = 5) -> dict[str, list[list[Any]]]:
+        """Scores on a worker thread so it overlaps with the vector search."""
+        return await asyncio.to_thread(self.search, query, n_results)
+
+    def get_manifest(self) -> dict[str, dict]:
+        """Builds the per-source manifest from the metadata stored with each chunk."""
+        with self._lock:
+            return build_manifest(self._metadatas)
+
+    def delete_sources(self, file_names: list[str]) -> None:
+        """Removes the chunks of the given sources."""
+        targets = set(file_names)
+        with self._lock:
+            keep = [row for row, metadata in enumerate(self._metadatas) if metadata.get("source") not in targets]
+            if len(keep) == len(self._ids):
+                return
+            self._ids = [self._ids[row] for row in keep]
+            self._documents = [self._documents[row] for row in keep]
+            self._metadatas = [self._metadatas[row] for row in keep]
+            self._terms = [self._terms[row] for row in keep]
+            self._rebuild()
+            self._dirty = True
+
+    def flush(self) -> None:
+        """Writes the index to a temporary file and atomically replaces the previous one."""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temporary = f"{self.path}.tmp"
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump({
+                    "ids": self._ids,
+                    "documents": self._documents,
+                    "metadatas": self._metadatas,
+                    "terms": self._terms
+                }, file, ensure_ascii=False)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary, self.path)
+            self._loaded_mtime = os.path.getmtime(self.path)
+            self._dirty = False
+            logger.info(f"Lexical index written with {len(self._ids)} chunks")
+
+    def _rebuild(self) -> None:
+        """Recomputes the postings lists and document lengths from the per-chunk term frequencies."""
+        postings: dict[str, dict[int, int]] = defaultdict(dict)
+        for row, terms in enumerate(self._terms):
+            for term, frequency in terms.items():
+                postings[term][row] = frequency
+        self._postings = dict(postings)
+        self._lengths = [sum(terms.values()) for terms in self._terms]
+
+    def _load(self) -> None:
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        self._ids = data["ids"]
+        self._documents = data["documents"]
+        self._metadatas = data["metadatas"]
+        self._terms = data["terms"]
+        self._rebuild()
+        self._loaded_mtime = mtime
+
+    def _maybe_reload(self) -> None:
+        """Picks up an index written by another worker, checking at most once per reload_interval."""
+        now = time.monotonic()
+        if self._dirty or now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except FileNotFoundError:
+            return
+        if mtime != self._loaded_mtime:
+            self._load()
+            logger.info("Reloaded lexical index")
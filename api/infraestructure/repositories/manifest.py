@@ -0,0 +1,23 @@
+from collections import Counter
+from typing import Iterable
+
+
+def build_manifest(metadatas: Iterable[dict]) -> dict[str, dict]:
+    """Builds the per-source manifest from the metadata stored with each chunk.
+
+    Every chunk carries the chunk_count of its document, so a document whose ingestion stopped
+    halfway is reported without content_hash and is indexed again from scratch on the next run.
+    """
+    stamps = {}
+    stored = Counter()
+    for metadata in metadatas:
+        if metadata and metadata.get("source"):
+            stamps[metadata["source"]] = metadata
+            stored[metadata["source"]] += 1
+    return {
+        source: {
+            "content_hash": metadata.get("content_hash") if metadata.get("chunk_count") == stored[source] else None,
+            "ingest_signature": metadata.get("ingest_signature")
+        }
+        for source, metadata in stamps.items()
+    }
@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import uuid
+import chromadb
+from chromadb.config import Settings
+from chromadb.errors import ChromaError
+from api.application.interfaces.semantic_cache import ISemanticCache
+
+logger = logging.getLogger(__name__)
+
+class SemanticCacheRepository(ISemanticCache):
+    """Answer cache stored in a dedicated Chroma collection so every worker and replica shares it.
+
+    An answer is reused when the new query is within the cosine similarity threshold of a stored
+    query and the retrieval step returned exactly the same chunk ids. Answers older than ttl are
+    ignored by lookups and deleted by the next store, at most once every purge_interval seconds.
+    """
+
+    def __init__(self, host: str = "chroma-db", port: int = 8000, collection_name: str = "documents_answers", auth_token: str = "", similarity_threshold: float = 0.95, ttl: int = 86400, purge_interval: float = 600):
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0}
+        try:
+            self.client = chromadb.HttpClient(
+                host=host,
+                port=port,
+                settings=Settings(
+                    chroma_client_auth_provider="chromadb.auth.token_authn.TokenAuthClientProvider",
+                    chroma_client_auth_credentials=auth_token
+                )
+            )
+            self.collection = self.client.get_or_create_collection(
+                name=collection_name,
+                metadata={"hnsw:space": "cosine"}
+            )
+        except ChromaError as e:
+            raise RuntimeError(f"Chroma connection failed: {str(e)}") from e
+
+    async def lookup(self, query_embedding: list[float], context_ids: list[str]) -> str | None:
+        """Returns the closest stored answer for the same context if it is similar enough."""
+        try:
+            answer = await asyncio.to_thread(self._lookup, query_embedding, context_ids)
+        except Exception as e:
+            # The cache is optional, an unreachable Chroma only turns lookups into misses
+            logger.warning(f"Semantic cache lookup failed: {str(e)}")
+            answer = None
+        self._count("hits" if answer is not None else "misses")
+        return answer
+
+    def _lookup(self, query_embedding: list[float], context_ids: list[str]) -> str | None:
+        results = self.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=1,
+            where={"$and": [
+                {"context_key": self._context_key(context_ids)},
+                {"created_at": {"$gte": time.time() - self.ttl}}
+            ]},
+            include=["documents", "distances"]
+        )
+        if not results["ids"] or not results["ids"][0]:
+            return None
+        # Chroma cosine distance is 1 - cosine similarity
+        if 1 - results["distances"][0][0] < self.similarity_threshold:
+            return None
+        return results["documents"][0][0]
+
+    async def store(self, query: str, query_embedding: list[float], context_ids: list[str], answer: str) -> None:
+        """Stores an answer, failures are logged and never reach the caller."""
+        try:
+            await asyncio.to_thread(self._store, query, query_embedding, context_ids, answer)
+        except Exception as e:
+            logger.warning(f"Semantic cache store failed: {str(e)}")
+
+    def _store(self, query: str, query_embedding: list[float], context_ids: list[str], answer: str) -> None:
+        now = time.time()
+        self.collection.add(
+            ids=[str(uuid.uuid4())],
+            embeddings=[query_embedding],
+            documents=[answer],
+            metadatas=[{
+                "query": query,
+                "context_key": self._context_key(context_ids),
+                "created_at": now
+            }]
+        )
+        with self._lock:
+            if now - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = now
+        # Expired answers are never returned, deleting them keeps the collection from growing forever
+        self.collection.delete(where={"created_at": {"$lt": now - self.ttl}})
+
+    def clear(self) -> None:
+        """Deletes every stored answer."""
+        try:
+            self.collection.delete(where={"created_at": {"$gte": 0}})
+            logger.info("Semantic cache cleared")
+        except ChromaError as e:
+            raise ValueError(f"Failed to clear semantic cache: {str(e)}") from e
+
+    def stats(self) -> dict:
+        """Return the hit and miss counters."""
+        with self._lock:
+            return dict(self._counters)
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _context_key(self, context_ids: list[str]) -> str:
+        return hashlib.sha1("\n".join(sorted(context_ids)).encode("utf-8")).hexdigest()
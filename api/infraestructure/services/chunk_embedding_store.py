@@ -0,0 +1,169 @@
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+from functools import cached_property
+import numpy as np
+from api.application.interfaces.embedding_service import IEmbeddingService, IAsyncEmbeddingService
+from api.domain.entities import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+_DIGEST_SIZE = 20
+_VECTORS = "vectors.f32"
+_KEYS = "keys.bin"
+_LOCK = "append.lock"
+
+
+class ChunkEmbeddingStore(IEmbeddingService, IAsyncEmbeddingService):
+    """Content-addressed store of document chunk embeddings, keyed by model and sha1 of the chunk text.
+
+    Each model gets a folder with two append-only files: the raw float32 vectors and the digests in
+    the same row order. Vectors are read through a memory map, so rebuilding a vector store from
+    unchanged documents is a disk read instead of a model forward pass. Appends take a file lock,
+    and rows written by other processes are picked up on the next miss. Nothing is read until the
+    first lookup, so a model that is still loading does not hold up startup.
+    """
+
+    def __init__(self, embedding_service: IEmbeddingService, path: str = "./vector_store/embeddings"):
+        self.embedding_service = embedding_service
+        self.directory = os.path.join(path, embedding_service.get_model_name().replace("/", "__"))
+        os.makedirs(self.directory, exist_ok=True)
+        self.vectors_path = os.path.join(self.directory, _VECTORS)
+        self.keys_path = os.path.join(self.directory, _KEYS)
+        self.lock_path = os.path.join(self.directory, _LOCK)
+        self._lock = threading.Lock()
+        self._rows: dict[bytes, int] = {}
+        self._size = 0
+        self._matrix: np.ndarray = None
+        self._counters = {"hits": 0, "misses": 0}
+
+    @cached_property
+    def dimensions(self) -> int:
+        return self.embedding_service.get_dimensions()
+
+    def embed(self, chunk: DocumentChunk) -> None:
+        """Assign the stored embedding of the chunk text, running the model only if it was never encoded."""
+        self.embed_all([chunk])
+
+    def embed_all(self, chunks: list[DocumentChunk]) -> None:
+        """Assign stored embeddings and encode only the chunks whose text is not in the store yet."""
+        digests = [hashlib.sha1(chunk.text.encode("utf-8")).digest() for chunk in chunks]
+        with self._lock:
+            rows = [self._rows.get(digest) for digest in digests]
+            if any(row is None for row in rows):
+                self._refresh()
+                rows = [self._rows.get(digest) for digest in digests]
+            matrix = self._mapped(max((row for row in rows if row is not None), default=-1) + 1)
+        for chunk, row in zip(chunks, rows):
+            if row is not None:
+                chunk.embedding = matrix[row].tolist()
+
+        missing = [(chunk, digest) for chunk, digest, row in zip(chunks, digests, rows) if row is None]
+        self._count(hits=len(chunks) - len(missing), misses=len(missing))
+        if not missing:
+            return
+        self.embedding_service.embed_all([chunk for chunk, _ in missing])
+        unique = {digest: chunk.embedding for chunk, digest in missing}
+        self._append(list(unique.keys()), np.asarray(list(unique.values()), dtype=np.float32))
+
+    def get_embedding(self, text: str) -> list[float]:
+        """Queries are not stored, they go straight to the wrapped service."""
+        return self.embedding_service.get_embedding(text)
+
+    def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Queries are not stored, they go straight to the wrapped service."""
+        return self.embedding_service.get_embeddings(texts)
+
+    async def aget_embedding(self, text: str) -> list[float]:
+        """Queries are not stored, they go straight to the wrapped service."""
+        return await self.embedding_service.aget_embedding(text)
+
+    async def aget_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Queries are not stored, they go straight to the wrapped service."""
+        return await self.embedding_service.aget_embeddings(texts)
+
+    def get_dimensions(self) -> int:
+        """Return the dimensions of the embeddings."""
+        return self.dimensions
+
+    def get_model_name(self) -> str:
+        """Return the name of the embedding model."""
+        return self.embedding_service.get_model_name()
+
+    def stats(self) -> dict:
+        """Return the number of stored embeddings and the hit and miss counters."""
+        with self._lock:
+            return {**self._counters, "size": self._size}
+
+    def _count(self, hits: int, misses: int) -> None:
+        with self._lock:
+            self._counters["hits"] += hits
+            self._counters["misses"] += misses
+
+    def _append(self, digests: list[bytes], vectors: np.ndarray) -> None:
+        """Appends under an exclusive file lock, vectors first so a crash never leaves a digest without its row.
+
+        A write interrupted between the two files leaves orphan vectors or a partial digest behind, so
+        both files are first truncated to the rows they fully share, keeping digest i aligned with row i.
+        """
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                fresh = [i for i, digest in enumerate(digests) if digest not in self._rows]
+                if not fresh:
+                    return
+                self._truncate_to_complete_rows()
+                with open(self.vectors_path, "ab") as file:
+                    file.write(vectors[fresh].tobytes())
+                    file.flush()
+                    os.fsync(file.fileno())
+                with open(self.keys_path, "ab") as file:
+                    file.write(b"".join(digests[i] for i in fresh))
+                    file.flush()
+                    os.fsync(file.fileno())
+                self._refresh()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _truncate_to_complete_rows(self) -> None:
+        """Drops whatever follows the last row present in both files. Only called under the file lock."""
+        row_bytes = 4 * self.dimensions
+        try:
+            key_bytes = os.path.getsize(self.keys_path)
+            vector_bytes = os.path.getsize(self.vectors_path)
+        except FileNotFoundError:
+            key_bytes = vector_bytes = 0
+        rows = min(key_bytes // _DIGEST_SIZE, vector_bytes // row_bytes)
+        for path, size, expected in ((self.keys_path, key_bytes, rows * _DIGEST_SIZE), (self.vectors_path, vector_bytes, rows * row_bytes)):
+            if size > expected:
+                logger.warning(f"Discarding {size - expected} bytes left by an interrupted append to {path}")
+                os.truncate(path, expected)
+
+    def _refresh(self) -> None:
+        """Indexes the digests appended since the last refresh, by this or any other process."""
+        try:
+            key_bytes = os.path.getsize(self.keys_path)
+            vector_bytes = os.path.getsize(self.vectors_path)
+        except FileNotFoundError:
+            return
+        # A row only counts once both its digest and its vector are fully on disk
+        rows = min(key_bytes // _DIGEST_SIZE, vector_bytes // (4 * self.dimensions))
+        if rows <= self._size:
+            return
+        with open(self.keys_path, "rb") as file:
+            file.seek(self._size * _DIGEST_SIZE)
+            data = file.read((rows - self._size) * _DIGEST_SIZE)
+        if not self._size:
+            logger.info(f"Chunk embedding store at {self.directory} holds {rows} embeddings")
+        for offset in range(0, len(data), _DIGEST_SIZE):
+            self._rows[data[offset:offset + _DIGEST_SIZE]] = self._size + offset // _DIGEST_SIZE
+        self._size = rows
+
+    def _mapped(self, rows: int) -> np.ndarray:
+        """Returns a read-only map covering at least the given rows, remapping after the file grew."""
+        if rows and (self._matrix is None or len(self._matrix) < rows):
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self._size, self.dimensions))
+        return self._matrix
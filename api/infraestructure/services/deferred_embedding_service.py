@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Callable
+from api.application.interfaces.embedding_service import IEmbeddingService, IAsyncEmbeddingService
+from api.domain.entities import DocumentChunk
+from api.infraestructure.services.startup_profiler import StartupProfiler
+
+logger = logging.getLogger(__name__)
+
+
+class DeferredEmbeddingService(IEmbeddingService, IAsyncEmbeddingService):
+    """Builds the embedding service on a background thread so importing torch and loading the model
+    do not delay serving.
+
+    Loading starts on start() or on the first call that needs the model, whichever comes first.
+    Synchronous calls block until the model is loaded and async calls await it without blocking
+    the event loop. The model name is known up front, so callers that only need it never wait.
+    """
+
+    def __init__(self, factory: Callable[[], IEmbeddingService], model_name: str, profiler: StartupProfiler = None):
+        self.factory = factory
+        self.model_name = model_name
+        self.profiler = profiler
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-load")
+        self._future: Future = None
+
+    def start(self) -> None:
+        """Starts loading the model in the background if it is not loading yet."""
+        if self._future is None:
+            self._future = self._executor.submit(self._load)
+
+    def is_loaded(self) -> bool:
+        """True once the model is loaded and ready to encode."""
+        return self._future is not None and self._future.done() and self._future.exception() is None
+
+    def get_embedding(self, text: str) -> list[float]:
+        """Generate an embedding for the given text."""
+        return self._service().get_embedding(text)
+
+    def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Generate the embeddings of many texts."""
+        return self._service().get_embeddings(texts)
+
+    async def aget_embedding(self, text: str) -> list[float]:
+        """Generate an embedding for the given text once the model is loaded."""
+        return await (await self._aservice()).aget_embedding(text)
+
+    async def aget_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Generate the embeddings of many texts once the model is loaded."""
+        return await (await self._aservice()).aget_embeddings(texts)
+
+    def embed(self, chunk: DocumentChunk) -> None:
+        """Generate and assign embedding for a single DocumentChunk"""
+        self._service().embed(chunk)
+
+    def embed_all(self, chunks: list[DocumentChunk]) -> None:
+        """Generate and assign embeddings for a list of DocumentChunks"""
+        self._service().embed_all(chunks)
+
+    def get_dimensions(self) -> int:
+        """Return the dimensions of the embeddings, which needs the loaded model."""
+        return self._service().get_dimensions()
+
+    def get_model_name(self) -> str:
+        """Return the name of the embedding model without waiting for it to load."""
+        return self.model_name
+
+    def _load(self) -> IEmbeddingService:
+        try:
+            with self.profiler.phase("embedding model (deferred)") if self.profiler else nullcontext():
+                service = self.factory()
+        except Exception as e:
+            logger.exception(f"Error loading embedding model {self.model_name}: {str(e)}")
+            raise
+        logger.info(f"Embedding model {self.model_name} loaded")
+        return service
+
+    def _service(self) -> IEmbeddingService:
+        self.start()
+        return self._future.result()
+
+    async def _aservice(self) -> IEmbeddingService:
+        self.start()
+        return await asyncio.wrap_future(self._future)
@@ -1,44 +1,112 @@
 import os
-import pdfplumber
+import hashlib
 import logging
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from functools import cached_property
+from typing import Callable, Iterator
 from api.domain.entities import Document, DocumentChunk
 from api.application.interfaces.document_loader import IDocumentLoader
+from api.infraestructure.services.pdf_text_extractor import EXTRACTORS, PageTextCache
 
 logger = logging.getLogger(__name__)
 
+
+def _extract_text(path: str, backend: str = "auto", cache_path: str = None) -> str:
+    """Extracts the text of every page of a PDF, reading it from the page cache when the file was
+    already extracted with the same backend. Runs inside a worker process."""
+    cache = PageTextCache(path=cache_path, backend=backend) if cache_path else None
+    file_hash = _file_hash(path) if cache else None
+    pages = cache.get(file_hash) if cache else None
+    if pages is None:
+        pages = EXTRACTORS[backend](path)
+        if cache:
+            try:
+                cache.put(file_hash, pages)
+            except OSError as e:
+                # The text was extracted, a full or read-only cache only costs parsing it again next time
+                logger.error(f"Error caching the pages of {path}: {str(e)}")
+    return "".join(page_text + "\n" for page_text in pages if page_text)
+
+
+def _file_hash(path: str) -> str:
+    """Returns the sha256 of a file read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
 class DocumentLoader(IDocumentLoader):
     """A service for loading and split pdf documents from a folder."""
 
-    def __init__(self, chunk_size=700, chunk_overlap=50):
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
+    def __init__(self, chunk_size=700, chunk_overlap=50, max_workers: int = None, pdf_backend: str = "auto", page_cache_path: str = None):
+        if pdf_backend not in EXTRACTORS:
+            raise ValueError(f"Unknown PDF extraction backend {pdf_backend}, expected one of {', '.join(EXTRACTORS)}")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pdf_backend = pdf_backend
+        self.page_cache_path = page_cache_path
+
+    @cached_property
+    def splitter(self):
+        # langchain takes most of a second to import, so it is left for the first ingestion instead of startup
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        return RecursiveCharacterTextSplitter(
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
             length_function=len,
             separators=["\n\n", "\n", ". ", " ", ""]
         )
 
-    def load_pdfs(self, folder_path: str) -> list[Document]:
-        documents = []
-        logging.info(f"Loading PDFs from folder: {folder_path}")
-        for filename in os.listdir(folder_path):
-            if filename.endswith(".pdf"):
-                path = os.path.join(folder_path, filename)
-                try:
-                    text = ""
-                    with pdfplumber.open(path) as pdf:
-                        for page in pdf.pages:
-                            page_text = page.extract_text()
-                            if page_text:
-                                text += page_text + "\n"
-                    
-                    documents.append(
-                        Document(content=text, name=filename)
-                    )
-                except Exception as e:
-                    logger.error(f"Error loading {filename}: {str(e)}")
-                    print(f"Error loading {filename}: {str(e)}")
-        return documents
+    def list_sources(self, folder_path: str) -> dict[str, str]:
+        """Hashes every PDF of the folder without extracting its text, and drops the cached pages of
+        the files that are no longer in it."""
+        sources = {
+            filename: _file_hash(os.path.join(folder_path, filename))
+            for filename in sorted(os.listdir(folder_path))
+            if filename.endswith(".pdf")
+        }
+        if self.page_cache_path:
+            PageTextCache(path=self.page_cache_path).prune(set(sources.values()))
+        return sources
+
+    def get_chunk_settings(self) -> dict:
+        """Returns the splitter parameters and the PDF backend, which also changes the chunk texts."""
+        return {"chunk_size": self.chunk_size, "chunk_overlap": self.chunk_overlap, "pdf_backend": self.pdf_backend}
+
+    def load_pdfs(self, folder_path: str, skip: Callable[[str], bool] = None) -> Iterator[Document]:
+        """Extracts the PDFs of a folder across a process pool, yielding each document as soon as it is ready.
+
+        At most two files per worker are in flight, so memory does not grow with the size of the folder.
+        """
+        logger.info(f"Loading PDFs from folder: {folder_path}")
+        # Spawned rather than forked: the API process runs httpx, torch and ingestion threads, and a forked
+        # child can deadlock on a lock one of them held at fork time
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            pending: dict[Future, str] = {}
+            for filename in sorted(os.listdir(folder_path)):
+                if not filename.endswith(".pdf"):
+                    continue
+                if skip and skip(filename):
+                    continue
+                if len(pending) >= self.max_workers * 2:
+                    yield from self._collect(pending)
+                pending[pool.submit(_extract_text, os.path.join(folder_path, filename), self.pdf_backend, self.page_cache_path)] = filename
+            while pending:
+                yield from self._collect(pending)
+
+    def _collect(self, pending: dict[Future, str]) -> Iterator[Document]:
+        """Waits for at least one extraction to finish and yields the finished documents."""
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            filename = pending.pop(future)
+            try:
+                yield Document(content=future.result(), name=filename)
+            except Exception as e:
+                logger.error(f"Error loading {filename}: {str(e)}")
 
     def split_text(self, document: Document) -> list[DocumentChunk]:
         """Splits the content of a document into smaller chunks."""
@@ -52,4 +120,4 @@ class DocumentLoader(IDocumentLoader):
                 metadata={"source": document.name}
             )
             for i, chunk in enumerate(chunks)
-        ]
\ No newline at end of file
+        ]
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+import os
+from watchfiles import Change, awatch
+from api.application.services.ingestion_service import IngestionService
+
+logger = logging.getLogger(__name__)
+
+
+def _is_pdf(change: Change, path: str) -> bool:
+    return path.lower().endswith(".pdf")
+
+
+class DocumentWatcher:
+    """Watches the documents folder and runs an incremental ingestion when PDFs are added, changed or removed.
+
+    Events are debounced, so copying several files triggers a single run. The run itself is the
+    usual manifest diff: only added or modified PDFs are embedded and the chunks of deleted ones evicted.
+    """
+
+    def __init__(self, folder_path: str, ingestion_service: IngestionService, debounce_ms: int = 2000, retry_interval: float = 5.0):
+        self.folder_path = folder_path
+        self.ingestion_service = ingestion_service
+        self.debounce_ms = debounce_ms
+        self.retry_interval = retry_interval
+        self._stop = asyncio.Event()
+        self._task: asyncio.Task = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            await self._task
+
+    async def _run(self) -> None:
+        logger.info(f"Watching {self.folder_path} for document changes")
+        try:
+            async for changes in awatch(self.folder_path, watch_filter=_is_pdf, debounce=self.debounce_ms, stop_event=self._stop):
+                names = sorted({os.path.basename(path) for _, path in changes})
+                logger.info(f"Detected changes in {len(names)} documents: {', '.join(names)}")
+                await self._ingest()
+        except Exception as e:
+            logger.error(f"Document watcher stopped: {str(e)}")
+
+    async def _ingest(self) -> None:
+        """A run already in progress may have listed the folder before these changes, so wait and run again."""
+        while not self._stop.is_set():
+            if await self.ingestion_service.start(trigger="watcher"):
+                await self.ingestion_service.wait()
+                return
+            await self.ingestion_service.wait()
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.retry_interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import threading
+from api.application.interfaces.embedding_service import IEmbeddingService, IAsyncEmbeddingService
+from api.domain.entities import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher(IEmbeddingService, IAsyncEmbeddingService):
+    """Coalesces concurrent query encodes into a single forward pass.
+
+    Each caller enqueues its text and awaits a future. A background task collects up to
+    max_batch_size texts, waiting at most max_wait_ms after the first one, and encodes them together.
+    """
+
+    def __init__(self, embedding_service: IEmbeddingService, max_batch_size: int = 32, max_wait_ms: float = 5, max_concurrent_batches: int = 2):
+        self.embedding_service = embedding_service
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrent_batches = max_concurrent_batches
+        self._queue: asyncio.Queue = None
+        self._loop: asyncio.AbstractEventLoop = None
+        self._worker: asyncio.Task = None
+        self._pending_batches: set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self._counters = {"batches": 0, "texts": 0}
+
+    async def aget_embedding(self, text: str) -> list[float]:
+        """Queue the text for the next batch and wait for its embedding."""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def aget_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Explicit batches are already batched, they skip the queue."""
+        return await self.embedding_service.aget_embeddings(texts)
+
+    def get_embedding(self, text: str) -> list[float]:
+        """Generate an embedding for the given text."""
+        return self.embedding_service.get_embedding(text)
+
+    def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Generate the embeddings of many texts in a single model call."""
+        return self.embedding_service.get_embeddings(texts)
+
+    def embed(self, chunk: DocumentChunk) -> None:
+        """Generate and assign embedding for a single DocumentChunk"""
+        self.embedding_service.embed(chunk)
+
+    def embed_all(self, chunks: list[DocumentChunk]) -> None:
+        """Generate and assign embeddings for a list of DocumentChunks"""
+        self.embedding_service.embed_all(chunks)
+
+    def get_dimensions(self) -> int:
+        """Return the dimensions of the embeddings."""
+        return self.embedding_service.get_dimensions()
+
+    def get_model_name(self) -> str:
+        """Return the name of the embedding model."""
+        return self.embedding_service.get_model_name()
+
+    def stats(self) -> dict:
+        """Return the queue depth and the average batch size so far."""
+        with self._lock:
+            batches, texts = self._counters["batches"], self._counters["texts"]
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "batches": batches,
+            "texts": texts,
+            "avg_batch_size": round(texts / batches, 2) if batches else 0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000
+        }
+
+    def _ensure_worker(self) -> None:
+        """The queue and worker are bound to the running loop, so they are created on first use.
+
+        A worker that stopped is restarted on the same queue, so the texts already waiting in it are
+        still encoded. Only a new loop gets a new queue, the futures of the old one can no longer be awaited.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._queue = asyncio.Queue()
+            self._loop = loop
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            if self._worker is not None:
+                logger.warning(f"Restarting the embedding batcher, {self._queue.qsize()} texts waiting")
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.max_concurrent_batches)
+        while True:
+            # Waiting for a free slot lets the queue fill up, so busy periods produce bigger batches
+            await slots.acquire()
+            batch = [await self._queue.get()]
+            try:
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except BaseException as e:
+                # The texts already taken off the queue would otherwise wait forever
+                error = e if isinstance(e, Exception) else RuntimeError("The embedding batcher stopped")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                raise
+            task = loop.create_task(self._encode(batch, slots))
+            self._pending_batches.add(task)
+            task.add_done_callback(self._pending_batches.discard)
+
+    async def _encode(self, batch: list[tuple[str, asyncio.Future]], slots: asyncio.Semaphore) -> None:
+        try:
+            embeddings = await self.embedding_service.aget_embeddings([text for text, _ in batch])
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+            with self._lock:
+                self._counters["batches"] += 1
+                self._counters["texts"] += len(batch)
+        except Exception as e:
+            logger.error(f"Error encoding embedding batch: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            slots.release()
@@ -0,0 +1,131 @@
+import hashlib
+import logging
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+import redis.asyncio as aioredis
+from redis import RedisError
+from api.application.interfaces.embedding_service import IEmbeddingService, IAsyncEmbeddingService
+from api.domain.entities import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache(IEmbeddingService, IAsyncEmbeddingService):
+    """Two-level cache for query embeddings: a bounded in-process LRU in front of a Redis tier shared by every worker."""
+
+    def __init__(self, embedding_service: IEmbeddingService, redis_client: aioredis.Redis = None, max_size: int = 1024, ttl: int = 86400):
+        self.embedding_service = embedding_service
+        self.redis_client = redis_client
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lru: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"lru_hits": 0, "redis_hits": 0, "misses": 0}
+
+    def get_embedding(self, text: str) -> list[float]:
+        """Return the embedding from the LRU or compute it, the Redis tier is only used on the async path."""
+        normalized = self._normalize(text)
+        key = self._key(normalized)
+        embedding = self._lru_get(key)
+        if embedding is not None:
+            self._count("lru_hits")
+            return embedding
+        self._count("misses")
+        embedding = self.embedding_service.get_embedding(normalized)
+        self._lru_put(key, embedding)
+        return embedding
+
+    async def aget_embedding(self, text: str) -> list[float]:
+        """Return the embedding from the LRU, then Redis, and only run the model on a miss in both."""
+        normalized = self._normalize(text)
+        key = self._key(normalized)
+        embedding = self._lru_get(key)
+        if embedding is not None:
+            self._count("lru_hits")
+            return embedding
+
+        embedding = await self._redis_get(key)
+        if embedding is not None:
+            self._count("redis_hits")
+            self._lru_put(key, embedding)
+            return embedding
+
+        self._count("misses")
+        embedding = await self.embedding_service.aget_embedding(normalized)
+        self._lru_put(key, embedding)
+        await self._redis_set(key, embedding)
+        return embedding
+
+    def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Batches are passed straight to the wrapped service."""
+        return self.embedding_service.get_embeddings(texts)
+
+    async def aget_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Batches are passed straight to the wrapped service."""
+        return await self.embedding_service.aget_embeddings(texts)
+
+    def embed(self, chunk: DocumentChunk) -> None:
+        """Document chunks are not cached, they are embedded once at ingestion."""
+        self.embedding_service.embed(chunk)
+
+    def embed_all(self, chunks: list[DocumentChunk]) -> None:
+        """Document chunks are not cached, they are embedded once at ingestion."""
+        self.embedding_service.embed_all(chunks)
+
+    def get_dimensions(self) -> int:
+        """Return the dimensions of the embeddings."""
+        return self.embedding_service.get_dimensions()
+
+    def get_model_name(self) -> str:
+        """Return the name of the embedding model."""
+        return self.embedding_service.get_model_name()
+
+    def stats(self) -> dict:
+        """Return the hit and miss counters of both tiers."""
+        with self._lock:
+            return {**self._counters, "lru_size": len(self._lru), "lru_max_size": self.max_size}
+
+    def _normalize(self, text: str) -> str:
+        return unicodedata.normalize("NFKC", " ".join(text.split()))
+
+    def _key(self, normalized: str) -> str:
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        return f"embeddings:{self.get_model_name()}:{digest}"
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _lru_get(self, key: str) -> list[float]:
+        with self._lock:
+            embedding = self._lru.get(key)
+            if embedding is not None:
+                self._lru.move_to_end(key)
+            return embedding
+
+    def _lru_put(self, key: str, embedding: list[float]) -> None:
+        with self._lock:
+            self._lru[key] = embedding
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+
+    async def _redis_get(self, key: str) -> list[float]:
+        if not self.redis_client:
+            return None
+        try:
+            value = await self.redis_client.get(key)
+        except RedisError as e:
+            logger.warning(f"Embedding cache read failed, falling back to the model: {str(e)}")
+            return None
+        return array("f", value).tolist() if value else None
+
+    async def _redis_set(self, key: str, embedding: list[float]) -> None:
+        if not self.redis_client:
+            return
+        try:
+            await self.redis_client.set(key, array("f", embedding).tobytes(), ex=self.ttl)
+        except RedisError as e:
+            logger.warning(f"Embedding cache write failed: {str(e)}")
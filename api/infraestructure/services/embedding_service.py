@@ -1,24 +1,43 @@
-from sentence_transformers import SentenceTransformer
-from api.application.interfaces.embedding_service import IEmbeddingService
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from api.application.interfaces.embedding_service import IEmbeddingService, IAsyncEmbeddingService
 from api.domain.entities import DocumentChunk
 
 
-class EmbeddingService(IEmbeddingService):
-    def __init__(self, model_name: str="sentence-transformers/all-MiniLM-L6-v2"):
+class EmbeddingService(IEmbeddingService, IAsyncEmbeddingService):
+    def __init__(self, model_name: str="sentence-transformers/all-MiniLM-L6-v2", max_workers: int = 2):
         """Initialize the embedding service with a specific model."""
+        # Imported here so the ONNX backends never pay for importing torch
+        from sentence_transformers import SentenceTransformer
         self.model = SentenceTransformer(model_name)
         self.model_name = model_name
         self.dimensions = self.model.get_sentence_embedding_dimension()
-        
+        # Bounded pool so CPU-bound encodes never pile up on the event loop or starve the API container
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embedding")
+
     def get_embedding(self, text: str) -> list[float]:
         """Generate an embedding for the given text."""
         return self.model.encode(text).tolist()
 
+    def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Generate the embeddings of many texts in a single forward pass."""
+        return self.model.encode(texts, batch_size=max(len(texts), 1)).tolist()
+
+    async def aget_embedding(self, text: str) -> list[float]:
+        """Generate an embedding for the given text on the bounded encoding executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.get_embedding, text)
+
+    async def aget_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Generate the embeddings of many texts on the bounded encoding executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.get_embeddings, texts)
+
     def embed(self, chunk: DocumentChunk) -> None:
         """Generate and assign embedding for a single DocumentChunk"""
         embedding = self.model.encode(chunk.text).tolist()
         chunk.embedding = embedding
-        
+
     def embed_all(self, chunks: list[DocumentChunk]) -> None:
         """Generate and assign embeddings for a list of DocumentChunks"""
         texts = [chunk.text for chunk in chunks]
@@ -29,7 +48,7 @@ class EmbeddingService(IEmbeddingService):
     def get_dimensions(self) -> int:
         """Return the dimensions of the embeddings."""
         return self.dimensions
-    
+
     def get_model_name(self) -> str:
         """Return the name of the embedding model."""
-        return self.model_name
\ No newline at end of file
+        return self.model_name
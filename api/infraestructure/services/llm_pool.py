@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable
+import httpx
+from api.application.interfaces.llm_service import IAsyncLLMService
+from api.application.interfaces.metrics import IMetrics
+from api.application.services.null_metrics import NullMetrics
+from api.domain.exceptions import OverloadedError
+from api.infraestructure.services.llm_service import LLMService
+
+logger = logging.getLogger(__name__)
+
+# Failures that happen before Ollama could have generated anything, so the request is safe to send elsewhere
+_FAILOVER_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+
+@dataclass
+class OllamaEndpoint:
+    host: str
+    port: int
+    model: str
+    max_concurrency: int
+
+
+def parse_endpoints(spec: str, default_model: str, default_concurrency: int) -> list[OllamaEndpoint]:
+    """Parses "host:port[;model[;max_concurrency]]" entries separated by commas, e.g. "gpu1:11434;phi3:instruct;4,gpu2:11434"."""
+    endpoints = []
+    for entry in filter(None, (item.strip() for item in spec.split(","))):
+        address, *options = [part.strip() for part in entry.split(";")]
+        host, _, port = address.rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"Invalid Ollama endpoint {entry}, expected host:port[;model[;max_concurrency]]")
+        model = options[0] if options and options[0] else default_model
+        max_concurrency = int(options[1]) if len(options) > 1 and options[1] else default_concurrency
+        endpoints.append(OllamaEndpoint(host=host, port=int(port), model=model, max_concurrency=max_concurrency))
+    return endpoints
+
+
+@dataclass(eq=False)
+class LLMNode:
+    name: str
+    service: LLMService
+    max_concurrency: int
+    healthy: bool = True
+    in_flight: int = 0
+    requests: int = 0
+    errors: int = 0
+    failovers: int = 0
+    last_error: str = None
+    latencies: deque = field(default_factory=lambda: deque(maxlen=200))
+
+    def load(self) -> float:
+        return self.in_flight / self.max_concurrency
+
+
+class LLMPool(IAsyncLLMService):
+    """Spreads generations over several Ollama hosts.
+
+    Each request goes to the healthy node with the lowest share of its concurrency limit in use,
+    and waits when every node is at its limit. A background task probes /api/tags on every node,
+    taking out the ones that do not answer or lack their model and bringing them back once they do.
+    Connection failures mark the node down right away and the request is retried on another node;
+    a stream is only retried while it has not produced a token.
+    """
+
+    def __init__(self, nodes: list[LLMNode], probe_interval: float = 10, probe_timeout: float = 2, metrics: IMetrics = None):
+        if not nodes:
+            raise ValueError("The Ollama pool needs at least one endpoint")
+        self.nodes = nodes
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.metrics = metrics or NullMetrics()
+        # Context token arrays are only meaningful to the model that produced them
+        self.shared_model = len({node.service.model_name for node in nodes}) == 1
+        if not self.shared_model:
+            logger.warning("Ollama endpoints serve different models, conversation context reuse is disabled")
+        self._released = asyncio.Condition()
+        self._prober: asyncio.Task = None
+        for node in nodes:
+            node.healthy = self._probe_sync(node)
+        if not any(node.healthy for node in nodes):
+            raise ConnectionError("Error connecting to every Ollama endpoint")
+        logger.info(f"Ollama pool with {len(nodes)} nodes, {sum(node.healthy for node in nodes)} healthy")
+
+    @property
+    def capacity(self) -> int:
+        """Generations the pool can run at once across all nodes."""
+        return sum(node.max_concurrency for node in self.nodes)
+
+    async def agenerate_response(self, prompt: str, max_tokens: int = 500, user_id: str = None, context: list[int] = None, on_context: Callable[[list[int]], None] = None) -> str:
+        """Generates on the least loaded node, retrying on the next one if the connection fails."""
+        tried = []
+        while True:
+            node = await self._acquire(tried)
+            started = time.perf_counter()
+            try:
+                response = await node.service.agenerate_response(prompt, max_tokens, user_id=user_id, **self._continuation(context, on_context))
+            except _FAILOVER_ERRORS as e:
+                await self._release(node)
+                self._mark_down(node, e)
+                tried.append(node)
+                continue
+            except Exception as e:
+                await self._release(node)
+                self._failed(node, e)
+                raise
+            await self._release(node, time.perf_counter() - started)
+            return response
+
+    async def astream_response(self, prompt: str, max_tokens: int = 500, user_id: str = None, context: list[int] = None, on_context: Callable[[list[int]], None] = None) -> AsyncIterator[str]:
+        """Streams from the least loaded node, moving to the next one if it fails before the first token."""
+        tried = []
+        while True:
+            node = await self._acquire(tried)
+            started = time.perf_counter()
+            streamed = False
+            try:
+                async for token in node.service.astream_response(prompt, max_tokens, user_id=user_id, **self._continuation(context, on_context)):
+                    streamed = True
+                    yield token
+            except _FAILOVER_ERRORS as e:
+                await self._release(node)
+                self._mark_down(node, e)
+                if streamed:
+                    raise
+                tried.append(node)
+                continue
+            except BaseException as e:
+                await self._release(node)
+                if isinstance(e, Exception):
+                    self._failed(node, e)
+                raise
+            await self._release(node, time.perf_counter() - started)
+            return
+
+    async def awarm_up(self, prompt_prefix: str = "") -> None:
+        """Warms up every healthy node concurrently."""
+        self._ensure_prober()
+        await asyncio.gather(*(node.service.awarm_up(prompt_prefix) for node in self.nodes if node.healthy))
+
+    async def ais_model_loaded(self) -> bool:
+        """True while at least one healthy node has its model in memory."""
+        self._ensure_prober()
+        loaded = await asyncio.gather(*(node.service.ais_model_loaded() for node in self.nodes if node.healthy))
+        return any(loaded)
+
+    def stats(self) -> dict:
+        """Return per node health, load, request and error counters and latency percentiles."""
+        nodes = {}
+        for node in self.nodes:
+            latencies = sorted(node.latencies)
+            nodes[node.name] = {
+                "model": node.service.model_name,
+                "healthy": node.healthy,
+                "in_flight": node.in_flight,
+                "max_concurrency": node.max_concurrency,
+                "requests": node.requests,
+                "errors": node.errors,
+                "failovers": node.failovers,
+                "last_error": node.last_error,
+                "latency_ms_avg": round(1000 * sum(latencies) / len(latencies), 1) if latencies else 0,
+                "latency_ms_p95": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 1) if latencies else 0
+            }
+        return {"healthy_nodes": sum(node.healthy for node in self.nodes), "nodes": nodes}
+
+    def _continuation(self, context: list[int], on_context: Callable[[list[int]], None]) -> dict:
+        if not self.shared_model:
+            return {}
+        return {"context": context, "on_context": on_context}
+
+    async def _acquire(self, tried: list[LLMNode]) -> LLMNode:
+        """Takes a slot on the healthy untried node with the lowest load, waiting while all of them are full."""
+        self._ensure_prober()
+        async with self._released:
+            while True:
+                candidates = [node for node in self.nodes if node.healthy and node not in tried]
+                if not candidates:
+                    if tried:
+                        raise OverloadedError(f"Every Ollama node failed, last error: {tried[-1].last_error}", retry_after=math.ceil(self.probe_interval))
+                    raise OverloadedError("No healthy Ollama node", retry_after=math.ceil(self.probe_interval))
+                free = [node for node in candidates if node.in_flight < node.max_concurrency]
+                if free:
+                    node = min(free, key=lambda node: (node.load(), node.requests))
+                    node.in_flight += 1
+                    node.requests += 1
+                    if tried:
+                        node.failovers += 1
+                    return node
+                await self._released.wait()
+
+    async def _release(self, node: LLMNode, elapsed: float = None) -> None:
+        if elapsed is not None:
+            node.latencies.append(elapsed)
+            self.metrics.observe("llm.node.duration", elapsed, node=node.name)
+        async with self._released:
+            node.in_flight -= 1
+            self._released.notify_all()
+
+    def _failed(self, node: LLMNode, error: Exception) -> None:
+        node.errors += 1
+        node.last_error = str(error) or type(error).__name__
+        self.metrics.increment("llm.node.errors", node=node.name)
+
+    def _mark_down(self, node: LLMNode, error: Exception) -> None:
+        self._failed(node, error)
+        if node.healthy:
+            logger.warning(f"Ollama node {node.name} failed, taking it out until it answers a probe: {node.last_error}")
+        node.healthy = False
+
+    def _ensure_prober(self) -> None:
+        """The probe task is bound to the running loop, so it is created on first use."""
+        if self._prober is None or self._prober.done():
+            self._prober = asyncio.get_running_loop().create_task(self._probe_loop())
+
+    async def _probe_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            results = await asyncio.gather(*(self._probe(node) for node in self.nodes))
+            changed = False
+            for node, healthy in zip(self.nodes, results):
+                if healthy != node.healthy:
+                    logger.info(f"Ollama node {node.name} is {'back' if healthy else 'down'}")
+                    node.healthy = healthy
+                    changed = True
+            if changed:
+                async with self._released:
+                    self._released.notify_all()
+
+    async def _probe(self, node: LLMNode) -> bool:
+        try:
+            response = await node.service.async_client.get("/api/tags", timeout=self.probe_timeout)
+            response.raise_for_status()
+            return self._serves_model(node, response.json())
+        except (httpx.HTTPError, ValueError) as e:
+            node.last_error = str(e) or type(e).__name__
+            return False
+
+    def _probe_sync(self, node: LLMNode) -> bool:
+        try:
+            response = node.service.client.get("/api/tags", timeout=self.probe_timeout)
+            response.raise_for_status()
+            return self._serves_model(node, response.json())
+        except (httpx.HTTPError, ValueError) as e:
+            node.last_error = str(e) or type(e).__name__
+            logger.warning(f"Ollama node {node.name} is not reachable: {node.last_error}")
+            return False
+
+    def _serves_model(self, node: LLMNode, tags: dict) -> bool:
+        model = node.service.model_name
+        names = {name for entry in tags.get("models", []) for name in (entry.get("name"), entry.get("model"))}
+        if model in names or f"{model}:latest" in names:
+            return True
+        node.last_error = f"model {model} is not available"
+        return False
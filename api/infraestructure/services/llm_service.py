@@ -1,28 +1,41 @@
+import json
 import logging
-import requests
-from requests.exceptions import RequestException
-from api.application.interfaces.llm_service import ILLMService
+import httpx
+from typing import AsyncIterator, Callable
+from api.application.interfaces.llm_service import ILLMService, IAsyncLLMService
+from api.application.interfaces.metrics import IMetrics
+from api.application.services.null_metrics import NullMetrics
 
 logger = logging.getLogger(__name__)
 
-class LLMService(ILLMService):
-    def __init__(self, base_url: str = "localhost", port: int = 11434, model_name: str = "phi3:instruct", timeout: int = 240, prompt_format: str = "<|user|>\n{prompt}<|end|>\n<|assistant|>"):
+class LLMService(ILLMService, IAsyncLLMService):
+    def __init__(self, base_url: str = "localhost", port: int = 11434, model_name: str = "phi3:instruct", timeout: int = 240, prompt_format: str = "<|user|>\n{prompt}<|end|>\n<|assistant|>", num_ctx: int = 1024, keep_alive: str = "30m", pool_size: int = 10, connect_timeout: float = 5, metrics: IMetrics = None, verify_connection: bool = True):
         self.base_url = f"http://{base_url}:{port}"
         self.model_name = model_name
         self.timeout = timeout
         self.prompt_format = prompt_format
-        logger.info(f"Configurando Ollama - Modelo: {model_name}, Endpoint: {self.base_url}, Timeout: {timeout}s")
-        
-        self._verify_connection()
+        self.num_ctx = num_ctx
+        self.metrics = metrics or NullMetrics()
+        # Ollama takes durations such as "30m" or a number of seconds, where -1 keeps the model loaded forever
+        self.keep_alive = int(keep_alive) if str(keep_alive).lstrip("-").isdigit() else keep_alive
+        logger.info(f"Configurando Ollama - Modelo: {model_name}, Endpoint: {self.base_url}, Timeout: {timeout}s, Keep alive: {keep_alive}, Pool: {pool_size}")
+
+        # Pooled keep-alive connections so every call reuses an open TCP connection to Ollama
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        timeouts = httpx.Timeout(timeout, connect=connect_timeout)
+        self.client = httpx.Client(base_url=self.base_url, timeout=timeouts, limits=limits)
+        self.async_client = httpx.AsyncClient(base_url=self.base_url, timeout=timeouts, limits=limits)
+
+        if verify_connection:
+            self._verify_connection()
 
     def _verify_connection(self):
         """Verify connection to the Ollama service"""
         try:
-            health_url = f"{self.base_url}/api/tags"
-            response = requests.get(health_url, timeout=5)
+            response = self.client.get("/api/tags", timeout=5)
             response.raise_for_status()
             logger.info("Connection to Ollama service verified successfully.")
-        except RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Error connecting to Ollama service: {str(e)}")
             raise ConnectionError("Error connecting to Ollama service") from e
 
@@ -30,45 +43,147 @@ class LLMService(ILLMService):
         """Aplica el formato al prompt según la configuración"""
         return self.prompt_format.replace("{prompt}", prompt)
 
+    def _build_payload(self, formatted_prompt: str, max_tokens: int, stream: bool = False, context: list[int] = None) -> dict:
+        """Builds the Ollama generate request body, a previous context makes Ollama continue that conversation"""
+        payload = {
+            "model": self.model_name,
+            "prompt": formatted_prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "num_ctx": self.num_ctx,
+                "num_predict": max_tokens,
+                "num_batch": 256,
+                "temperature": 0.3,
+                "top_p": 0.9,
+                "num_gpu": 1,
+                "main_gpu": 0
+            }
+        }
+        if context:
+            payload["context"] = context
+        return payload
+
+    async def awarm_up(self, prompt_prefix: str = "") -> None:
+        """Loads the model and evaluates the fixed prompt prefix so the first user does not pay for it"""
+        raw_prefix = self.prompt_format.split("{prompt}")[0] + prompt_prefix
+        payload = self._build_payload(raw_prefix, max_tokens=1)
+        payload["raw"] = True
+        try:
+            response = await self.async_client.post("/api/generate", json=payload)
+            response.raise_for_status()
+            logger.info(f"Model {self.model_name} warmed up, load took {response.json().get('load_duration', 0) / 1e9:.2f}s")
+        except httpx.HTTPError as e:
+            logger.warning(f"Model warm-up failed: {str(e)}")
+
+    async def ais_model_loaded(self) -> bool:
+        """Checks Ollama's running models list for the configured model"""
+        try:
+            response = await self.async_client.get("/api/ps", timeout=2)
+            response.raise_for_status()
+            return any(model.get("name") == self.model_name or model.get("model") == self.model_name
+                       for model in response.json().get("models", []))
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not read Ollama running models: {str(e)}")
+            return False
+
+    def _record_usage(self, data: dict) -> None:
+        """Records the token counts and timings Ollama reports in its final response, durations come in nanoseconds"""
+        if data.get("prompt_eval_count") is not None:
+            self.metrics.observe("llm.prompt.tokens", data["prompt_eval_count"])
+        if data.get("prompt_eval_duration"):
+            self.metrics.observe("llm.prompt_eval.duration", data["prompt_eval_duration"] / 1e9)
+        if data.get("eval_count") is not None:
+            self.metrics.observe("llm.completion.tokens", data["eval_count"])
+        if data.get("eval_count") and data.get("eval_duration"):
+            self.metrics.observe("llm.eval.duration", data["eval_duration"] / 1e9)
+            self.metrics.observe("llm.generation.tokens_per_second", data["eval_count"] / (data["eval_duration"] / 1e9))
+        if data.get("load_duration"):
+            self.metrics.observe("llm.load.duration", data["load_duration"] / 1e9)
+
+    def _prepare_prompt(self, prompt: str, max_tokens: int) -> str:
+        """Validates and formats the prompt before sending it to Ollama"""
+        if not prompt.strip():
+            raise ValueError("the prompt cannot be empty")
+
+        formatted_prompt = self._format_prompt(prompt)
+        logger.debug(f"Generating response for prompt: {formatted_prompt[:50]}... (max_tokens={max_tokens})")
+        return formatted_prompt
+
     def generate_response(self, prompt: str, max_tokens: int = 500) -> str:
         """Generate a response from the LLM based on the provided prompt"""
         try:
-            if not prompt.strip():
-                raise ValueError("the prompt cannot be empty")
-            
-            formatted_prompt = self._format_prompt(prompt)
-            
-            logger.info(f"Generating response for prompt: {formatted_prompt[:50]}... (max_tokens={max_tokens})")
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model_name,
-                    "prompt": formatted_prompt,
-                    "stream": False,
-                    "options": {
-                        "num_ctx": 1024,
-                        "num_batch": 256,
-                        "temperature": 0.3,
-                        "top_p": 0.9,
-                        "num_gpu": 1,
-                        "main_gpu": 0
-                    }
-                },
-                timeout=self.timeout
-            )
-            
+            formatted_prompt = self._prepare_prompt(prompt, max_tokens)
+            response = self.client.post("/api/generate", json=self._build_payload(formatted_prompt, max_tokens))
+            response.raise_for_status()
+            data = response.json()
+            self._record_usage(data)
+
+            full_response = data.get("response", "")
+            return full_response.replace(formatted_prompt, "").strip()
+
+        except ValueError as e:
+            logger.error(f"Validation error generating response: {str(e)}")
+            raise
+        except httpx.HTTPError as e:
+            logger.error(f"Error connecting to LLM service: {str(e)}", exc_info=True)
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error generating response: {str(e)}", exc_info=True)
+            raise
+
+    async def agenerate_response(self, prompt: str, max_tokens: int = 500, user_id: str = None, context: list[int] = None, on_context: Callable[[list[int]], None] = None) -> str:
+        """Generate a response from the LLM without blocking the event loop"""
+        try:
+            formatted_prompt = self._prepare_prompt(prompt, max_tokens)
+            response = await self.async_client.post("/api/generate", json=self._build_payload(formatted_prompt, max_tokens, context=context))
             response.raise_for_status()
             data = response.json()
-            
+            self._record_usage(data)
+            if on_context and data.get("context"):
+                on_context(data["context"])
+
             full_response = data.get("response", "")
             return full_response.replace(formatted_prompt, "").strip()
-            
+
         except ValueError as e:
             logger.error(f"Validation error generating response: {str(e)}")
             raise
-        except RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Error connecting to LLM service: {str(e)}", exc_info=True)
             raise
         except Exception as e:
             logger.error(f"Unexpected error generating response: {str(e)}", exc_info=True)
-            raise
\ No newline at end of file
+            raise
+
+    async def astream_response(self, prompt: str, max_tokens: int = 500, user_id: str = None, context: list[int] = None, on_context: Callable[[list[int]], None] = None) -> AsyncIterator[str]:
+        """Yield tokens from Ollama's NDJSON stream as soon as they are generated"""
+        try:
+            formatted_prompt = self._prepare_prompt(prompt, max_tokens)
+            payload = self._build_payload(formatted_prompt, max_tokens, stream=True, context=context)
+            async with self.async_client.stream("POST", "/api/generate", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if data.get("error"):
+                        raise RuntimeError(f"Ollama stream failed: {data['error']}")
+                    token = data.get("response", "")
+                    if token:
+                        yield token
+                    if data.get("done"):
+                        self._record_usage(data)
+                        if on_context and data.get("context"):
+                            on_context(data["context"])
+                        break
+
+        except ValueError as e:
+            logger.error(f"Validation error streaming response: {str(e)}")
+            raise
+        except httpx.HTTPError as e:
+            logger.error(f"Error connecting to LLM service: {str(e)}", exc_info=True)
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error streaming response: {str(e)}", exc_info=True)
+            raise
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import onnxruntime as ort
+from tokenizers import Tokenizer
+from api.application.interfaces.embedding_service import IEmbeddingService, IAsyncEmbeddingService
+from api.domain.entities import DocumentChunk
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model-int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+CONFIG_FILE = "embedding_config.json"
+
+
+def model_directory(base_path: str, model_name: str) -> str:
+    """Folder holding the exported files of a model, e.g. ./models/onnx/sentence-transformers__all-MiniLM-L6-v2"""
+    return os.path.join(base_path, model_name.replace("/", "__"))
+
+
+class OnnxEmbeddingService(IEmbeddingService, IAsyncEmbeddingService):
+    """Runs a sentence-transformers model exported to ONNX, without importing torch.
+
+    Reproduces the sentence-transformers pipeline: tokenization, transformer, pooling and optional
+    normalization. Texts are sorted by length before batching so each batch pads as little as possible.
+    The quantized model produces slightly different vectors, so it reports its own model name and
+    switching to it re-indexes the documents.
+    """
+
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", model_path: str = "./models/onnx", quantized: bool = False, max_workers: int = 2, batch_size: int = 32, intra_op_threads: int = 0):
+        directory = model_directory(model_path, model_name)
+        model_file = os.path.join(directory, QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)
+        if not os.path.exists(model_file):
+            raise RuntimeError(f"ONNX model not found at {model_file}, export it with python -m api.tools.embedding_export")
+        with open(os.path.join(directory, CONFIG_FILE), encoding="utf-8") as file:
+            config = json.load(file)
+        if config["pooling"] not in ("mean", "cls"):
+            raise ValueError(f"Unsupported pooling mode: {config['pooling']}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(directory, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=config.get("pad_token_id", 0))
+        self.pooling = config["pooling"]
+        self.normalize = config["normalize"]
+        self.batch_size = batch_size
+        self.model_name = f"{model_name}@int8" if quantized else model_name
+        self.dimensions = config["dimensions"]
+        # Bounded pool so CPU-bound encodes never pile up on the event loop or starve the API container
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embedding")
+
+    def get_embedding(self, text: str) -> list[float]:
+        """Generate an embedding for the given text."""
+        return self._encode([text])[0].tolist()
+
+    def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Generate the embeddings of many texts."""
+        return self._encode(texts).tolist()
+
+    async def aget_embedding(self, text: str) -> list[float]:
+        """Generate an embedding for the given text on the bounded encoding executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.get_embedding, text)
+
+    async def aget_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Generate the embeddings of many texts on the bounded encoding executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.get_embeddings, texts)
+
+    def embed(self, chunk: DocumentChunk) -> None:
+        """Generate and assign embedding for a single DocumentChunk"""
+        chunk.embedding = self.get_embedding(chunk.text)
+
+    def embed_all(self, chunks: list[DocumentChunk]) -> None:
+        """Generate and assign embeddings for a list of DocumentChunks"""
+        embeddings = self.get_embeddings([chunk.text for chunk in chunks])
+        for chunk, embedding in zip(chunks, embeddings):
+            chunk.embedding = embedding
+
+    def get_dimensions(self) -> int:
+        """Return the dimensions of the embeddings."""
+        return self.dimensions
+
+    def get_model_name(self) -> str:
+        """Return the name of the embedding model."""
+        return self.model_name
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        embeddings = np.empty((len(texts), self.dimensions), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            embeddings[rows] = self._forward([texts[i] for i in rows])
+        return embeddings
+
+    def _forward(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        inputs = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": attention_mask,
+            "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+        }
+        hidden = self.session.run(None, {name: value for name, value in inputs.items() if name in self.input_names})[0]
+        if self.pooling == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = attention_mask[:, :, None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        if self.normalize:
+            pooled = pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled
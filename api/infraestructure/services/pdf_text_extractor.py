@@ -0,0 +1,115 @@
+import logging
+import os
+import shutil
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+_COMPLETE = "complete"
+
+
+def _normalize_pdfium(text: str) -> str:
+    """pdfium ends lines with CRLF and a space, and reports hyphens of compound words as \\x02."""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").replace("\x02", "-").split("\n")
+    return "\n".join(line.rstrip() for line in lines)
+
+
+def extract_pages_pdfium(path: str) -> list[str]:
+    """Text of every page read straight from the PDF text objects by pdfium, without layout analysis."""
+    import pypdfium2 as pdfium
+    pages = []
+    pdf = pdfium.PdfDocument(path)
+    try:
+        for index in range(len(pdf)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                pages.append(_normalize_pdfium(textpage.get_text_bounded()))
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+    return pages
+
+
+def extract_pages_pdfplumber(path: str, page_numbers: list[int] = None) -> list[str]:
+    """Text of every page, or of the given page numbers, rebuilt from the character layout by pdfplumber."""
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        pages = pdf.pages if page_numbers is None else [pdf.pages[number] for number in page_numbers]
+        return [page.extract_text() or "" for page in pages]
+
+
+def extract_pages_auto(path: str) -> list[str]:
+    """pdfium first, re-extracting with pdfplumber only the pages where pdfium found no text."""
+    pages = extract_pages_pdfium(path)
+    empty = [number for number, text in enumerate(pages) if not text.strip()]
+    if empty:
+        logger.debug(f"Falling back to pdfplumber for {len(empty)} pages of {path}")
+        for number, text in zip(empty, extract_pages_pdfplumber(path, empty)):
+            pages[number] = text
+    return pages
+
+
+EXTRACTORS: dict[str, Callable[[str], list[str]]] = {
+    "pdfium": extract_pages_pdfium,
+    "pdfplumber": extract_pages_pdfplumber,
+    "auto": extract_pages_auto
+}
+
+
+class PageTextCache:
+    """Extracted page text on disk, one file per page under {backend}/{file hash}/, so re-chunking
+    or re-indexing an unchanged PDF never parses it again.
+
+    A marker holding the page count is written after the last page, so a document is only read back
+    from the cache once all of its pages were stored. Writes go through a temporary file and a rename,
+    which keeps concurrent extractions of the same file from reading half written pages.
+    """
+
+    def __init__(self, path: str = "./vector_store/pages", backend: str = "auto"):
+        self.path = path
+        self.directory = os.path.join(path, backend)
+
+    def get(self, file_hash: str) -> list[str] | None:
+        """Returns the text of every page, or None when the document is not fully cached."""
+        folder = os.path.join(self.directory, file_hash)
+        try:
+            with open(os.path.join(folder, _COMPLETE), encoding="utf-8") as file:
+                count = int(file.read())
+            pages = []
+            for number in range(count):
+                with open(self._page_path(folder, number), encoding="utf-8") as file:
+                    pages.append(file.read())
+            return pages
+        except (OSError, ValueError):
+            return None
+
+    def put(self, file_hash: str, pages: list[str]) -> None:
+        folder = os.path.join(self.directory, file_hash)
+        os.makedirs(folder, exist_ok=True)
+        for number, text in enumerate(pages):
+            self._write(self._page_path(folder, number), text)
+        self._write(os.path.join(folder, _COMPLETE), str(len(pages)))
+
+    def prune(self, keep_hashes: set[str]) -> None:
+        """Removes the pages of every file hash not in keep_hashes, under every backend, so the cache
+        does not keep the text of documents that were changed or removed from the folder."""
+        try:
+            backends = [entry.path for entry in os.scandir(self.path) if entry.is_dir()]
+        except FileNotFoundError:
+            return
+        for backend in backends:
+            for entry in os.scandir(backend):
+                if entry.is_dir() and entry.name not in keep_hashes:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+
+    def _page_path(self, folder: str, number: int) -> str:
+        return os.path.join(folder, f"{number:05d}.txt")
+
+    def _write(self, path: str, text: str) -> None:
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temporary, path)
@@ -0,0 +1,250 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from typing import Callable
+import numpy as np
+from api.application.interfaces.embedding_service import IEmbeddingService, IAsyncEmbeddingService
+from api.domain.entities import DocumentChunk
+from api.infraestructure.services.embedding_batcher import EmbeddingBatcher
+
+logger = logging.getLogger(__name__)
+
+# Every message is a 4 byte big-endian length followed by the payload. Requests are one JSON frame,
+# responses a JSON header frame followed, when it carries vectors, by a frame of raw float32 rows.
+_LENGTH = struct.Struct("!I")
+_CONNECTION_ERRORS = (ConnectionError, FileNotFoundError, asyncio.IncompleteReadError, socket.timeout)
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    return await reader.readexactly(length)
+
+
+def _write_frames(writer: asyncio.StreamWriter, *payloads: bytes) -> None:
+    writer.write(b"".join(_LENGTH.pack(len(payload)) + payload for payload in payloads))
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionResetError("Embedding server closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    (length,) = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+    return _recv_exactly(sock, length)
+
+
+class EmbeddingServer:
+    """Serves one embedding model to every worker of the host over a Unix socket.
+
+    Runs on a thread of the leader worker with its own event loop. Single query encodes from all the
+    workers go through one EmbeddingBatcher, so concurrent requests share a forward pass no matter
+    which worker received them. The socket is bound only once the model is loaded, so clients simply
+    retry until it answers.
+    """
+
+    def __init__(self, factory: Callable[[], IEmbeddingService], socket_path: str = "/tmp/meli-bot-embedding.sock", max_batch_size: int = 32, max_wait_ms: float = 5, max_concurrent_batches: int = 2):
+        self.factory = factory
+        self.socket_path = socket_path
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_concurrent_batches = max_concurrent_batches
+        self.batcher: EmbeddingBatcher = None
+        self._serving = threading.Event()
+        self._started = threading.Event()
+        self._thread: threading.Thread = None
+
+    def start(self) -> bool:
+        """Loads the model and serves it on a background thread, returning once the socket accepts
+        connections. Returns False when the server could not start."""
+        if not self._thread:
+            self._thread = threading.Thread(target=asyncio.run, args=(self._serve(),), name="embedding-server", daemon=True)
+            self._thread.start()
+        self._started.wait()
+        return self._serving.is_set()
+
+    def stats(self) -> dict:
+        """Return whether this worker serves the model and its batching counters."""
+        if not self._serving.is_set():
+            return {"serving": False}
+        return {"serving": True, "socket_path": self.socket_path, **self.batcher.stats()}
+
+    async def _serve(self) -> None:
+        try:
+            service = await asyncio.to_thread(self.factory)
+            self.batcher = EmbeddingBatcher(service, max_batch_size=self.max_batch_size, max_wait_ms=self.max_wait_ms, max_concurrent_batches=self.max_concurrent_batches)
+            # A socket left behind by a previous leader refuses connections and blocks the bind
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+            self._serving.set()
+        except Exception as e:
+            logger.exception(f"Error starting the embedding server: {str(e)}")
+            return
+        finally:
+            self._started.set()
+        logger.info(f"Serving embedding model {self.batcher.get_model_name()} on {self.socket_path}")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answers the requests of one client connection in order until it disconnects."""
+        try:
+            while True:
+                try:
+                    request = json.loads(await _read_frame(reader))
+                except asyncio.IncompleteReadError:
+                    return
+                _write_frames(writer, *await self._answer(request))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _answer(self, request: dict) -> list[bytes]:
+        try:
+            if request["op"] == "info":
+                return [json.dumps({"ok": True, "model": self.batcher.get_model_name(), "dimensions": self.batcher.get_dimensions()}).encode()]
+            if request["op"] == "embed":
+                vectors = [await self.batcher.aget_embedding(request["text"])]
+            elif request["op"] == "embed_many":
+                vectors = await self.batcher.aget_embeddings(request["texts"])
+            else:
+                raise ValueError(f"Unknown operation {request['op']}")
+        except Exception as e:
+            logger.error(f"Error answering embedding request: {str(e)}")
+            return [json.dumps({"ok": False, "error": str(e) or type(e).__name__}).encode()]
+        matrix = np.asarray(vectors, dtype=np.float32)
+        return [json.dumps({"ok": True, "shape": list(matrix.shape)}).encode(), matrix.tobytes()]
+
+
+class RemoteEmbeddingService(IEmbeddingService, IAsyncEmbeddingService):
+    """Client of the EmbeddingServer of the host, so workers encode without loading the model themselves.
+
+    Async calls reuse pooled connections and sync calls, used by ingestion, open one per call. Requests
+    are idempotent, so any connection failure is retried on a new connection until connect_timeout,
+    which covers the server still loading the model and a new leader taking over.
+    """
+
+    def __init__(self, socket_path: str = "/tmp/meli-bot-embedding.sock", model_name: str = "sentence-transformers/all-MiniLM-L6-v2", connect_timeout: float = 60, pool_size: int = 8):
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.connect_timeout = connect_timeout
+        self.pool_size = pool_size
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._dimensions: int = None
+
+    def get_embedding(self, text: str) -> list[float]:
+        """Generate an embedding for the given text."""
+        return self._request({"op": "embed", "text": text})[0].tolist()
+
+    def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Generate the embeddings of many texts in a single request."""
+        if not texts:
+            return []
+        return self._request({"op": "embed_many", "texts": texts}).tolist()
+
+    async def aget_embedding(self, text: str) -> list[float]:
+        """Generate an embedding for the given text, batched on the server with the other workers' queries."""
+        return (await self._arequest({"op": "embed", "text": text}))[0].tolist()
+
+    async def aget_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Generate the embeddings of many texts in a single request."""
+        if not texts:
+            return []
+        return (await self._arequest({"op": "embed_many", "texts": texts})).tolist()
+
+    def embed(self, chunk: DocumentChunk) -> None:
+        """Generate and assign embedding for a single DocumentChunk"""
+        chunk.embedding = self.get_embedding(chunk.text)
+
+    def embed_all(self, chunks: list[DocumentChunk]) -> None:
+        """Generate and assign embeddings for a list of DocumentChunks"""
+        for chunk, embedding in zip(chunks, self.get_embeddings([chunk.text for chunk in chunks])):
+            chunk.embedding = embedding
+
+    def get_dimensions(self) -> int:
+        """Return the dimensions of the embeddings, asking the server the first time."""
+        if self._dimensions is None:
+            self._dimensions = self._request({"op": "info"})["dimensions"]
+        return self._dimensions
+
+    def get_model_name(self) -> str:
+        """Return the name of the embedding model."""
+        return self.model_name
+
+    def is_available(self) -> bool:
+        """True when the server accepts connections, i.e. the model is loaded."""
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(1)
+                sock.connect(self.socket_path)
+            return True
+        except OSError:
+            return False
+
+    def _request(self, request: dict):
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.settimeout(self.connect_timeout)
+                    sock.connect(self.socket_path)
+                    payload = json.dumps(request).encode()
+                    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+                    header = json.loads(_recv_frame(sock))
+                    return self._result(header, _recv_frame(sock) if "shape" in header else None)
+            except _CONNECTION_ERRORS as e:
+                self._retry_or_raise(deadline, e)
+                time.sleep(0.1)
+
+    async def _arequest(self, request: dict):
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                reader, writer = self._idle.pop() if self._idle else await asyncio.open_unix_connection(self.socket_path)
+            except _CONNECTION_ERRORS as e:
+                self._retry_or_raise(deadline, e)
+                await asyncio.sleep(0.1)
+                continue
+            try:
+                _write_frames(writer, json.dumps(request).encode())
+                await writer.drain()
+                header = json.loads(await _read_frame(reader))
+                result = self._result(header, await _read_frame(reader) if "shape" in header else None)
+            except _CONNECTION_ERRORS as e:
+                # A pooled connection of a leader that went away, or the server closing it mid request
+                writer.close()
+                self._retry_or_raise(deadline, e)
+                continue
+            except BaseException:
+                writer.close()
+                raise
+            if len(self._idle) < self.pool_size:
+                self._idle.append((reader, writer))
+            else:
+                writer.close()
+            return result
+
+    def _retry_or_raise(self, deadline: float, error: Exception) -> None:
+        if time.monotonic() >= deadline:
+            raise ConnectionError(f"Embedding server at {self.socket_path} is not available: {str(error) or type(error).__name__}") from error
+
+    def _result(self, header: dict, body: bytes):
+        if not header["ok"]:
+            raise RuntimeError(f"Embedding server error: {header['error']}")
+        if body is None:
+            return header
+        return np.frombuffer(body, dtype=np.float32).reshape(header["shape"])
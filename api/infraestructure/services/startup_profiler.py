@@ -0,0 +1,59 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """Records how long each startup phase takes and when it started, relative to process start.
+
+    Phases may run concurrently from several threads, and background phases such as loading the
+    embedding model can finish after the API is already serving; those show up in stats() once done.
+    """
+
+    def __init__(self, started: float = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.serving_at: float = None
+        self._phases: list[dict] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Times the block as the named phase, recording it even when it raises."""
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._phases.append({
+                    "phase": name,
+                    "start_ms": round(1000 * (started - self.started), 1),
+                    "duration_ms": round(1000 * (finished - started), 1),
+                    "thread": threading.current_thread().name,
+                    "error": error
+                })
+
+    def mark_serving(self) -> None:
+        """Marks the moment the application starts accepting requests."""
+        self.serving_at = time.perf_counter()
+
+    def report(self) -> None:
+        """Logs every phase recorded so far in start order and the time it took to start serving."""
+        stats = self.stats()
+        lines = [f"{phase['start_ms']:>9.1f} ms {phase['duration_ms']:>9.1f} ms  {phase['phase']}" + (f" ({phase['error']})" if phase["error"] else "") for phase in stats["phases"]]
+        logger.info("Startup phases (start, duration, phase):\n" + "\n".join(lines) + f"\nServing after {stats['serving_ms']} ms")
+
+    def stats(self) -> dict:
+        """Return the recorded phases and the time from process start to serving."""
+        with self._lock:
+            phases = sorted(self._phases, key=lambda phase: phase["start_ms"])
+        serving_ms = round(1000 * (self.serving_at - self.started), 1) if self.serving_at else None
+        return {"serving_ms": serving_ms, "phases": phases}
@@ -0,0 +1,167 @@
+import logging
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import Histogram, InMemoryMetricReader, PeriodicExportingMetricReader, Sum
+from opentelemetry.sdk.metrics.view import ExplicitBucketHistogramAggregation, View
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from api.application.interfaces.metrics import IMetrics
+
+logger = logging.getLogger(__name__)
+
+# Stage durations range from sub-millisecond cache lookups to minute-long generations on CPU
+_DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120)
+_TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 768, 1024, 2048, 4096)
+_RATE_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 150)
+_INVALID_NAME = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _prometheus_name(name: str) -> str:
+    return _INVALID_NAME.sub("_", name)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(attributes: dict, extra: dict = None) -> str:
+    merged = {**(attributes or {}), **(extra or {})}
+    if not merged:
+        return ""
+    return "{" + ",".join(f'{_prometheus_name(key)}="{_escape(value)}"' for key, value in merged.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _bucket_quantile(bounds, counts, quantile: float, maximum: float) -> float:
+    """Upper bound of the bucket holding the quantile, capped by the largest value seen."""
+    target = quantile * sum(counts)
+    cumulative = 0
+    for bound, count in zip(list(bounds) + [math.inf], counts):
+        cumulative += count
+        if cumulative >= target:
+            return min(bound, maximum)
+    return maximum
+
+
+class OpenTelemetryMetrics(IMetrics):
+    """Metrics and spans through the OpenTelemetry SDK.
+
+    An in-memory reader backs the Prometheus /metrics endpoint, and when an OTLP endpoint is set
+    metrics and spans are also pushed to it. Histograms ending in .duration are in seconds,
+    .tokens in tokens and .tokens_per_second in tokens per second.
+    """
+
+    def __init__(self, service_name: str = "meli-bot", otlp_endpoint: str = "", export_interval_ms: int = 15000):
+        self._reader = InMemoryMetricReader()
+        readers = [self._reader]
+        self.tracer_provider = None
+        if otlp_endpoint:
+            from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+            readers.append(PeriodicExportingMetricReader(OTLPMetricExporter(endpoint=otlp_endpoint, insecure=True), export_interval_millis=export_interval_ms))
+            self.tracer_provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+            self.tracer_provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=otlp_endpoint, insecure=True)))
+            logger.info(f"Exporting metrics and spans to {otlp_endpoint}")
+
+        self.meter_provider = MeterProvider(
+            resource=Resource.create({"service.name": service_name}),
+            metric_readers=readers,
+            views=[
+                View(instrument_name="*.duration", aggregation=ExplicitBucketHistogramAggregation(_DURATION_BUCKETS)),
+                View(instrument_name="*.tokens", aggregation=ExplicitBucketHistogramAggregation(_TOKEN_BUCKETS)),
+                View(instrument_name="*.tokens_per_second", aggregation=ExplicitBucketHistogramAggregation(_RATE_BUCKETS))
+            ]
+        )
+        self.meter = self.meter_provider.get_meter(service_name)
+        self.tracer = self.tracer_provider.get_tracer(service_name) if self.tracer_provider else None
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def time(self, name: str, **attributes) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            if self.tracer:
+                with self.tracer.start_as_current_span(name, attributes=attributes):
+                    yield
+            else:
+                yield
+        finally:
+            self.observe(f"{name}.duration", time.perf_counter() - started, **attributes)
+
+    def observe(self, name: str, value: float, **attributes) -> None:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, self.meter.create_histogram(name))
+        histogram.record(value, attributes)
+
+    def increment(self, name: str, value: int = 1, **attributes) -> None:
+        counter = self._counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(name, self.meter.create_counter(name))
+        counter.add(value, attributes)
+
+    def render_prometheus(self) -> str:
+        """Renders the cumulative metrics in the Prometheus text exposition format."""
+        data = self._reader.get_metrics_data()
+        lines = []
+        for resource_metrics in (data.resource_metrics if data else []):
+            for scope_metrics in resource_metrics.scope_metrics:
+                for metric in scope_metrics.metrics:
+                    name = _prometheus_name(metric.name)
+                    if isinstance(metric.data, Histogram):
+                        lines.append(f"# TYPE {name} histogram")
+                        for point in metric.data.data_points:
+                            cumulative = 0
+                            for bound, count in zip(list(point.explicit_bounds) + [math.inf], point.bucket_counts):
+                                cumulative += count
+                                lines.append(f"{name}_bucket{_labels(point.attributes, {'le': _number(bound)})} {cumulative}")
+                            lines.append(f"{name}_sum{_labels(point.attributes)} {_number(point.sum)}")
+                            lines.append(f"{name}_count{_labels(point.attributes)} {point.count}")
+                    elif isinstance(metric.data, Sum) and metric.data.is_monotonic:
+                        lines.append(f"# TYPE {name}_total counter")
+                        for point in metric.data.data_points:
+                            lines.append(f"{name}_total{_labels(point.attributes)} {_number(point.value)}")
+                    else:
+                        lines.append(f"# TYPE {name} gauge")
+                        for point in metric.data.data_points:
+                            lines.append(f"{name}{_labels(point.attributes)} {_number(point.value)}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict[str, dict]:
+        """Count, mean and bucket-estimated percentiles of every histogram, keyed by name and attributes."""
+        data = self._reader.get_metrics_data()
+        result = {}
+        for resource_metrics in (data.resource_metrics if data else []):
+            for scope_metrics in resource_metrics.scope_metrics:
+                for metric in scope_metrics.metrics:
+                    if not isinstance(metric.data, Histogram):
+                        continue
+                    for point in metric.data.data_points:
+                        if not point.count:
+                            continue
+                        result[f"{metric.name}{_labels(point.attributes)}"] = {
+                            "count": point.count,
+                            "mean": point.sum / point.count,
+                            **{f"p{q}": _bucket_quantile(point.explicit_bounds, point.bucket_counts, q / 100, point.max) for q in (50, 95, 99)}
+                        }
+        return result
+
+    def shutdown(self) -> None:
+        self.meter_provider.shutdown()
+        if self.tracer_provider:
+            self.tracer_provider.shutdown()
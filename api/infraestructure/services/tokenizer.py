@@ -0,0 +1,30 @@
+import logging
+from api.application.interfaces.tokenizer import ITokenizer
+
+logger = logging.getLogger(__name__)
+
+class Tokenizer(ITokenizer):
+    """Counts tokens with the Hugging Face tokenizer of the target model.
+
+    When no tokenizer is configured or it cannot be loaded, it falls back to an estimate
+    of one token every chars_per_token characters, which errs on the side of larger counts.
+    """
+
+    def __init__(self, tokenizer_name: str = "", chars_per_token: float = 3.5):
+        self.chars_per_token = chars_per_token
+        self.tokenizer = None
+        if tokenizer_name:
+            try:
+                from tokenizers import Tokenizer as HFTokenizer
+                self.tokenizer = HFTokenizer.from_pretrained(tokenizer_name)
+                logger.info(f"Counting prompt tokens with tokenizer {tokenizer_name}")
+            except Exception as e:
+                logger.warning(f"Could not load tokenizer {tokenizer_name}, estimating tokens from characters: {str(e)}")
+
+    def count_tokens(self, text: str) -> int:
+        """Return the number of tokens the target model uses for the text."""
+        if not text:
+            return 0
+        if self.tokenizer:
+            return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+        return int(len(text) / self.chars_per_token) + 1
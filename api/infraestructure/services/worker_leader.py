@@ -0,0 +1,64 @@
+import fcntl
+import logging
+import os
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerLeaderElection:
+    """Elects one leader among the worker processes of a host through an exclusive flock on a shared file.
+
+    Every worker blocks on the lock in a background thread, and the one holding it is the leader
+    until it exits. The kernel drops the lock with the process, even on a crash, so the next waiting
+    worker takes over and runs the on_elected callback. A worker whose on_elected fails or returns
+    False resigns, releasing the lock to the next worker, and stops competing.
+    """
+
+    def __init__(self, lock_path: str = "/tmp/meli-bot-leader.lock"):
+        self.lock_path = lock_path
+        self._elected = threading.Event()
+        self._thread: threading.Thread = None
+        self._file = None
+
+    def start(self, on_elected: Callable[[], bool]) -> None:
+        """Starts competing for leadership, on_elected runs on the election thread once this worker wins."""
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, args=(on_elected,), name="leader-election", daemon=True)
+        self._thread.start()
+
+    def is_leader(self) -> bool:
+        return self._elected.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Waits until this worker is the leader, returns False on timeout."""
+        return self._elected.wait(timeout)
+
+    def stats(self) -> dict:
+        """Return whether this worker is the leader."""
+        return {"leader": self.is_leader(), "pid": os.getpid()}
+
+    def resign(self) -> None:
+        """Releases the lock so another worker is elected."""
+        self._elected.clear()
+        if self._file:
+            self._file.close()
+            self._file = None
+            logger.warning(f"Worker {os.getpid()} resigned the leadership of {self.lock_path}")
+
+    def _run(self, on_elected: Callable[[], bool]) -> None:
+        os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+        # Kept open for the life of the process, closing it would release the lock
+        self._file = open(self.lock_path, "a")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        self._elected.set()
+        logger.info(f"Worker {os.getpid()} elected leader through {self.lock_path}")
+        try:
+            taken_over = on_elected()
+        except Exception as e:
+            logger.exception(f"Error taking over the leader duties: {str(e)}")
+            taken_over = False
+        if not taken_over:
+            self.resign()
@@ -1,7 +1,10 @@
+import json
 import logging
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from application.interfaces.rag_service import IRAGService
+from api.application.interfaces.rag_service import IRAGService
+from api.domain.exceptions import OverloadedError, UserRateLimitedError
 
 logger = logging.getLogger(__name__)
 
@@ -11,24 +14,132 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     response: str
+    cached: bool = False
 
-def create_router(rag_service: IRAGService) -> APIRouter:
+class BatchChatRequest(BaseModel):
+    requests: list[ChatRequest]
+
+class BatchChatItem(BaseModel):
+    user_id: str
+    status_code: int = 200
+    response: str = None
+    cached: bool = False
+    detail: str = None
+
+class BatchChatResponse(BaseModel):
+    responses: list[BatchChatItem]
+
+def _sse_event(data: dict, event: str = None) -> str:
+    """Formats a Server-Sent Event frame"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _overloaded(e: OverloadedError) -> HTTPException:
+    """A user with too many pending requests gets a 429, a saturated backend a 503, both with Retry-After"""
+    return HTTPException(
+        status_code=429 if isinstance(e, UserRateLimitedError) else 503,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def _batch_item(user_id: str, result) -> dict:
+    """Maps one batch result to the status code it would have had as a single request"""
+    if isinstance(result, OverloadedError):
+        error = _overloaded(result)
+        return {"user_id": user_id, "status_code": error.status_code, "detail": error.detail}
+    if isinstance(result, Exception):
+        logger.error(f"Error processing batched chat request: {str(result)}")
+        return {"user_id": user_id, "status_code": 500, "detail": f"Error processing request: {str(result)}"}
+    return {"user_id": user_id, "response": result.response, "cached": result.cached}
+
+def create_router(rag_service: IRAGService, max_batch_size: int = 64) -> APIRouter:
     router = APIRouter()
-    
+
     @router.post("/chat", response_model=ChatResponse)
     async def chat_endpoint(request: ChatRequest):
         try:
-            logger.info(f"Received chat request from user {request.user_id}: {request.message}")
-            response = rag_service.generate_response(
+            logger.info(f"Received chat request from user {request.user_id}")
+            logger.debug(f"Chat request message: {request.message}")
+            answer = await rag_service.generate_response(
                 user_id=request.user_id,
                 user_query=request.message
             )
-            return {"response": response}
+            return {"response": answer.response, "cached": answer.cached}
+        except OverloadedError as e:
+            logger.warning(f"Rejected chat request from user {request.user_id}: {str(e)}")
+            raise _overloaded(e)
         except Exception as e:
             logger.error(f"Error processing chat request: {str(e)}")
             raise HTTPException(
                 status_code=500,
                 detail=f"Error processing request: {str(e)}"
             )
-    
-    return router
\ No newline at end of file
+
+    @router.post("/chat/batch", response_model=BatchChatResponse)
+    async def chat_batch_endpoint(request: BatchChatRequest):
+        """Answers many messages at once, each item carries its own status code"""
+        if len(request.requests) > max_batch_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch of {len(request.requests)} messages exceeds the limit of {max_batch_size}"
+            )
+        logger.info(f"Received batched chat request with {len(request.requests)} messages")
+        try:
+            results = await rag_service.generate_responses(
+                [(item.user_id, item.message) for item in request.requests]
+            )
+        except Exception as e:
+            logger.error(f"Error processing batched chat request: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error processing request: {str(e)}"
+            )
+        return {"responses": [_batch_item(item.user_id, result) for item, result in zip(request.requests, results)]}
+
+    @router.post("/chat/stream")
+    async def chat_stream_endpoint(request: ChatRequest):
+        logger.info(f"Received streaming chat request from user {request.user_id}")
+        logger.debug(f"Streaming chat request message: {request.message}")
+
+        answers = []
+        tokens = rag_service.stream_response(
+            user_id=request.user_id,
+            user_query=request.message,
+            on_answer=answers.append
+        )
+        # Waiting for the first token before answering lets admission errors become a proper status code
+        try:
+            first_token = await anext(tokens)
+        except StopAsyncIteration:
+            first_token = None
+        except OverloadedError as e:
+            logger.warning(f"Rejected streaming chat request from user {request.user_id}: {str(e)}")
+            raise _overloaded(e)
+        except Exception as e:
+            logger.error(f"Error processing streaming chat request: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error processing request: {str(e)}"
+            )
+
+        async def event_stream():
+            try:
+                if first_token is not None:
+                    yield _sse_event({"token": first_token})
+                    async for token in tokens:
+                        yield _sse_event({"token": token})
+                # Like /chat, the final event tells whether the answer came from the semantic cache
+                yield _sse_event({"cached": bool(answers) and answers[0].cached}, event="done")
+            except Exception as e:
+                logger.error(f"Error processing streaming chat request: {str(e)}")
+                yield _sse_event({"detail": f"Error processing request: {str(e)}"}, event="error")
+            finally:
+                await tokens.aclose()
+
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    return router
@@ -1,14 +1,26 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager, nullcontext
+from typing import Callable
 from fastapi import FastAPI
 from api.infraestructure.config import AppSettings
-from api.infraestructure.web import chat_router, health_router
+from api.infraestructure.web import chat_router, health_router, ingest_router, metrics_router
+from api.infraestructure.services.document_watcher import DocumentWatcher
+from api.infraestructure.services.startup_profiler import StartupProfiler
+from api.infraestructure.services.worker_leader import WorkerLeaderElection
+from api.infraestructure.services.telemetry import OpenTelemetryMetrics
 from api.application.services.rag_service import RAGService
 from api.application.services.train_service import TrainService
+from api.application.services.ingestion_service import IngestionService
 from api.application.interfaces.llm_service import ILLMService
 from api.application.interfaces.embedding_service import IEmbeddingService  
 from api.application.interfaces.conversation_repository import IConversationRepository
 from api.application.interfaces.database_repository import IDatabaseRepository
 from api.application.interfaces.document_loader import IDocumentLoader
+from api.application.interfaces.ingestion_status_repository import IIngestionStatusRepository
+from api.application.interfaces.semantic_cache import ISemanticCache
+from api.application.interfaces.lexical_index import ILexicalIndex
+from api.application.interfaces.tokenizer import ITokenizer
 
 logger = logging.getLogger(__name__)
 
@@ -18,40 +30,134 @@ def create_application(
         embedding_service:IEmbeddingService, 
         llm_service: ILLMService, 
         document_loader: IDocumentLoader, 
-        settings: AppSettings
+        settings: AppSettings,
+        ingestion_status_repo: IIngestionStatusRepository,
+        semantic_cache: ISemanticCache = None,
+        lexical_index: ILexicalIndex = None,
+        tokenizer: ITokenizer = None,
+        stats_providers: dict[str, Callable[[], dict]] = None,
+        metrics: OpenTelemetryMetrics = None,
+        profiler: StartupProfiler = None,
+        readiness_checks: list[Callable[[], bool]] = None,
+        leader_election: WorkerLeaderElection = None,
+        leader_tasks: list[Callable[[], bool]] = None
         ):
     """Create Chat bot FastAPI"""
+
+    async def lead():
+        """Duties of a single worker per host, the ingestion lock still serializes runs across replicas"""
+        if settings.ingest_on_startup:
+            # Serving starts right away, /health/ready reports when there is something to answer from
+            await ingestion_service.start(trigger="startup")
+        if watcher:
+            watcher.start()
+
+    def elected(loop: asyncio.AbstractEventLoop) -> bool:
+        """Runs on the election thread, so the async duties are handed to the application loop.
+        Returns False when a leader task fails, which hands the leadership to another worker"""
+        for task in leader_tasks or []:
+            if not task():
+                return False
+        asyncio.run_coroutine_threadsafe(lead(), loop)
+        return True
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        with profiler.phase("lifespan") if profiler else nullcontext():
+            warm_up = asyncio.create_task(rag_service.warm_up()) if settings.ollama_warm_up else None
+            if leader_election:
+                loop = asyncio.get_running_loop()
+                leader_election.start(on_elected=lambda: elected(loop))
+            else:
+                await lead()
+        if profiler:
+            profiler.mark_serving()
+            profiler.report()
+        yield
+        if watcher:
+            await watcher.stop()
+        if metrics:
+            metrics.shutdown()
+        if warm_up and not warm_up.done():
+            warm_up.cancel()
     
     app = FastAPI(
         title=settings.app_name,
         description=settings.description,
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan
     )
 
     logger.info("Starting application with settings: %s", settings.model_dump())
-    rag_service = RAGService(
-        conversation_repo=conversation_repo,
-        database_repo=database_repo,
-        embedding_service=embedding_service,
-        llm_service=llm_service
-    )
-    
     train_service = TrainService(
         folder_path=settings.folder_path,
         document_loader=document_loader,
         database_repo=database_repo,
         embedding_service=embedding_service,
+        batch_size=settings.ingest_batch_size,
+        semantic_cache=semantic_cache,
+        lexical_index=lexical_index,
+        metrics=metrics
+    )
+    ingestion_service = IngestionService(
+        train_service=train_service,
+        status_repo=ingestion_status_repo,
+        database_repo=database_repo,
+        lock_ttl=settings.ingest_lock_ttl,
+        nice=settings.ingest_nice
+    )
+    rag_service = RAGService(
+        conversation_repo=conversation_repo,
+        database_repo=database_repo,
+        embedding_service=embedding_service,
+        llm_service=llm_service,
+        semantic_cache=semantic_cache,
+        lexical_index=lexical_index,
+        n_results=settings.rag_n_results,
+        n_candidates=settings.rag_n_candidates,
+        tokenizer=tokenizer,
+        prompt_token_budget=settings.prompt_token_budget,
+        chunk_overlap=settings.chunk_overlap,
+        metrics=metrics,
+        batch_concurrency=settings.chat_batch_concurrency,
+        context_reuse=settings.llm_context_reuse,
+        context_reuse_max_tokens=settings.llm_context_reuse_max_tokens,
+        # A reused LLM context is only valid for the model and the documents it was built with
+        session_version=lambda: f"{settings.ollama_model}:{ingestion_service.corpus_version()}",
+        max_tokens=settings.llm_max_tokens,
+        num_ctx=settings.ollama_num_ctx
     )
-    train_service.train()
+    
+    watcher = None
+    if settings.document_watcher_enabled:
+        watcher = DocumentWatcher(
+            folder_path=settings.folder_path,
+            ingestion_service=ingestion_service,
+            debounce_ms=settings.document_watcher_debounce_ms
+        )
 
     app.include_router(
-        chat_router.create_router(rag_service=rag_service),
+        chat_router.create_router(rag_service=rag_service, max_batch_size=settings.chat_batch_max_size),
         prefix="/api/v1",
         tags=["chat"]
     )
     app.include_router(
-        health_router.create_router(),
+        ingest_router.create_router(ingestion_service=ingestion_service),
+        prefix="/api/v1",
+        tags=["ingest"]
+    )
+    app.include_router(
+        health_router.create_router(stats_providers=stats_providers, llm_service=llm_service, readiness=lambda: ingestion_service.is_ready() and all(check() for check in readiness_checks or [])),
         prefix="/health"
     )
+    if metrics:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        FastAPIInstrumentor.instrument_app(
+            app,
+            meter_provider=metrics.meter_provider,
+            tracer_provider=metrics.tracer_provider,
+            excluded_urls="health,metrics"
+        )
+        app.include_router(metrics_router.create_router(metrics=metrics))
     
     return app
\ No newline at end of file
@@ -1,10 +1,27 @@
+import asyncio
+from typing import Callable
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from api.application.interfaces.llm_service import IAsyncLLMService
 
-def create_router() -> APIRouter:
+def create_router(stats_providers: dict[str, Callable[[], dict]] = None, llm_service: IAsyncLLMService = None, readiness: Callable[[], bool] = None) -> APIRouter:
     router = APIRouter()
     
     @router.get("/health", include_in_schema=False)
     async def health_check():
-        return {"status": "ok"}
+        if not llm_service:
+            return {"status": "ok"}
+        return {"status": "ok", "model_loaded": await llm_service.ais_model_loaded()}
+
+    @router.get("/ready", include_in_schema=False)
+    async def ready_check():
+        """Unlike /health, answers 503 until there are documents to answer from"""
+        if readiness and not await asyncio.to_thread(readiness):
+            return JSONResponse(status_code=503, content={"status": "not ready"})
+        return {"status": "ready"}
+
+    @router.get("/stats", include_in_schema=False)
+    async def stats():
+        return {name: provider() for name, provider in (stats_providers or {}).items()}
     
-    return router
\ No newline at end of file
+    return router
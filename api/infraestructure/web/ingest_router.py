@@ -0,0 +1,26 @@
+import asyncio
+import logging
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from api.application.services.ingestion_service import IngestionService
+
+logger = logging.getLogger(__name__)
+
+def create_router(ingestion_service: IngestionService) -> APIRouter:
+    router = APIRouter()
+
+    @router.post("/ingest", status_code=202)
+    async def ingest_endpoint():
+        """Starts an incremental ingestion of the documents folder in the background"""
+        if not await ingestion_service.start(trigger="api"):
+            return JSONResponse(status_code=409, content={"detail": "Ingestion already running", **await asyncio.to_thread(ingestion_service.status)})
+        logger.info("Ingestion triggered through the API")
+        return await asyncio.to_thread(ingestion_service.status)
+
+    @router.get("/ingest")
+    async def ingest_status():
+        """Returns the progress of the current or last ingestion, as seen by every replica.
+        The status is read from Redis with a blocking client, so off the event loop"""
+        return await asyncio.to_thread(ingestion_service.status)
+
+    return router
@@ -0,0 +1,58 @@
+import logging
+import sys
+from api.infraestructure.config import load_settings
+from api.application.services.train_service import TrainService
+from api.application.services.ingestion_service import IngestionService
+from api.infraestructure.factory import (
+    build_chunk_embedding_store,
+    build_database_repo,
+    build_document_loader,
+    build_embedding_model,
+    build_lexical_index,
+    build_semantic_cache
+)
+from api.infraestructure.repositories.ingestion_status_repository import IngestionStatusRepository
+from api.infraestructure.services.telemetry import OpenTelemetryMetrics
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> int:
+    """Runs one incremental ingestion outside of the API, e.g. as a job: python -m api.ingest"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    settings = load_settings()
+    # Without a scrape endpoint, the step timings of a job only leave the process through OTLP
+    metrics = None
+    if settings.metrics_enabled and settings.otel_exporter_otlp_endpoint:
+        metrics = OpenTelemetryMetrics(service_name= f"{settings.otel_service_name}-ingest", otlp_endpoint= settings.otel_exporter_otlp_endpoint)
+
+    database_repo = build_database_repo(settings)
+    train_service = TrainService(
+        folder_path= settings.folder_path,
+        document_loader= build_document_loader(settings),
+        database_repo= database_repo,
+        embedding_service= build_chunk_embedding_store(build_embedding_model(settings), settings),
+        batch_size= settings.ingest_batch_size,
+        semantic_cache= build_semantic_cache(settings),
+        lexical_index= build_lexical_index(settings),
+        metrics= metrics
+    )
+    ingestion_service = IngestionService(
+        train_service= train_service,
+        status_repo= IngestionStatusRepository(host= settings.redis_host, port= settings.redis_port, db= settings.redis_db),
+        database_repo= database_repo,
+        lock_ttl= settings.ingest_lock_ttl,
+        nice= settings.ingest_nice
+    )
+
+    status = ingestion_service.run(trigger="cli")
+    if metrics:
+        metrics.shutdown()
+    if status is None:
+        logger.warning("Another ingestion is already running")
+        return 1
+    return 0 if status["state"] == "completed" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
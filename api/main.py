@@ -1,11 +1,36 @@
-import logging
-from api.infraestructure.config import load_settings
-from api.infraestructure.web.fastapi import create_application
-from api.infraestructure.repositories.conversation_repository import ConversationRepository
-from api.infraestructure.repositories.database_repository import DatabaseRepository
-from api.infraestructure.services.document_loader import DocumentLoader
-from api.infraestructure.services.embedding_service import EmbeddingService
-from api.infraestructure.services.llm_service import LLMService
+import time
+from api.infraestructure.services.startup_profiler import StartupProfiler
+
+# Created before anything else is imported so the report covers the whole import time
+profiler = StartupProfiler(started=time.perf_counter())
+
+with profiler.phase("imports"):
+    import logging
+    from concurrent.futures import ThreadPoolExecutor
+    from typing import Callable
+    import redis.asyncio as aioredis
+    from api.infraestructure.config import load_settings
+    from api.infraestructure.factory import (
+        build_chunk_embedding_store,
+        build_database_repo,
+        build_document_loader,
+        build_embedding_model,
+        build_lexical_index,
+        build_llm_scheduler,
+        build_llm_service,
+        build_query_embedding_service,
+        build_semantic_cache,
+        check_context_window,
+        embedding_model_name
+    )
+    from api.infraestructure.web.fastapi import create_application
+    from api.infraestructure.repositories.conversation_repository import ConversationRepository
+    from api.infraestructure.repositories.ingestion_status_repository import IngestionStatusRepository
+    from api.infraestructure.services.deferred_embedding_service import DeferredEmbeddingService
+    from api.infraestructure.services.shared_embedding import EmbeddingServer, RemoteEmbeddingService
+    from api.infraestructure.services.worker_leader import WorkerLeaderElection
+    from api.infraestructure.services.tokenizer import Tokenizer
+    from api.infraestructure.services.telemetry import OpenTelemetryMetrics
 
 
 def configure_logging():
@@ -24,38 +49,119 @@ configure_logging()
 logger = logging.getLogger(__name__)
 
 
+def build_concurrently(builders: dict[str, Callable[[], object]]) -> dict[str, object]:
+    """Runs the builders on a thread each, since they mostly wait on the network or the disk, and times each one."""
+    def timed(name: str, builder: Callable[[], object]) -> object:
+        with profiler.phase(name):
+            return builder()
+
+    with ThreadPoolExecutor(max_workers=len(builders), thread_name_prefix="startup") as pool:
+        futures = {name: pool.submit(timed, name, builder) for name, builder in builders.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
 def main():
     """Main function to initialize the FastAPI application and its components."""
-    
-    settings = load_settings()
+
+    with profiler.phase("settings"):
+        settings = load_settings()
     logger.info("Configuration loaded: %s", settings.model_dump())
-    
+
     try:
-        conversation_repo = ConversationRepository(host= settings.redis_host, port= settings.redis_port, db= settings.redis_db)
-        database_repo = DatabaseRepository(host= settings.chroma_host, port= settings.chroma_port, collection_name= settings.chroma_collection, auth_token= settings.chroma_auth_token)
-        document_loader = DocumentLoader(chunk_size= settings.chunk_size, chunk_overlap= settings.chunk_overlap)
-        embadding_service = EmbeddingService(model_name= settings.embedding_model_name)
-        llm_service = LLMService(base_url= settings.ollama_host, port= settings.ollama_port, model_name=settings.ollama_model, timeout=settings.ollama_timeout, prompt_format=settings.ollama_model_prompt_format)
+        metrics = OpenTelemetryMetrics(service_name= settings.otel_service_name, otlp_endpoint= settings.otel_exporter_otlp_endpoint) if settings.metrics_enabled else None
+        conversation_repo = ConversationRepository(host= settings.redis_host, port= settings.redis_port, db= settings.redis_db, session_ttl= settings.llm_context_reuse_ttl)
+        ingestion_status_repo = IngestionStatusRepository(host= settings.redis_host, port= settings.redis_port, db= settings.redis_db)
+        document_loader = build_document_loader(settings)
+        stats_providers = {"startup": profiler.stats}
+        readiness_checks = []
+        leader_election = WorkerLeaderElection(lock_path= settings.worker_leader_lock_path) if settings.worker_leader_lock_path else None
+        leader_tasks = []
+        builders = {
+            "vector store": lambda: build_database_repo(settings),
+            "semantic cache": lambda: build_semantic_cache(settings),
+            "lexical index": lambda: build_lexical_index(settings),
+            "ollama": lambda: build_llm_service(settings, metrics, verify_connection= not settings.fast_startup),
+            "tokenizer": lambda: Tokenizer(tokenizer_name= settings.prompt_tokenizer)
+        }
+        embadding_service = None
+        if settings.embedding_shared:
+            if not leader_election:
+                raise ValueError("EMBEDDING_SHARED needs WORKER_LEADER_LOCK_PATH, the leader worker is the one serving the model")
+            embedding_server = EmbeddingServer(
+                lambda: build_embedding_model(settings),
+                socket_path= settings.embedding_socket_path,
+                max_batch_size= settings.embedding_batch_max_size,
+                max_wait_ms= settings.embedding_batch_max_wait_ms,
+                max_concurrent_batches= settings.embedding_max_workers
+            )
+            leader_tasks.append(embedding_server.start)
+            embadding_service = RemoteEmbeddingService(socket_path= settings.embedding_socket_path, model_name= embedding_model_name(settings), connect_timeout= settings.embedding_connect_timeout)
+            readiness_checks.append(embadding_service.is_available)
+            stats_providers["embedding_server"] = embedding_server.stats
+        elif settings.fast_startup:
+            embadding_service = DeferredEmbeddingService(lambda: build_embedding_model(settings), model_name= embedding_model_name(settings), profiler= profiler)
+            embadding_service.start()
+            # Replicas only take traffic once queries no longer wait for the model
+            readiness_checks.append(embadding_service.is_loaded)
+        else:
+            builders["embedding model"] = lambda: build_embedding_model(settings)
+        with profiler.phase("clients"):
+            built = build_concurrently(builders)
+        database_repo = built["vector store"]
+        semantic_cache = built["semantic cache"]
+        lexical_index = built["lexical index"]
+        llm_service, llm_max_concurrency = built["ollama"]
+        tokenizer = built["tokenizer"]
+        check_context_window(settings, tokenizer)
+        if embadding_service is None:
+            embadding_service = built["embedding model"]
+        if leader_election:
+            stats_providers["leader"] = leader_election.stats
+
+        embadding_service = build_chunk_embedding_store(embadding_service, settings, stats_providers)
+        embadding_service = build_query_embedding_service(
+            embadding_service,
+            settings,
+            stats_providers,
+            redis_client= aioredis.Redis(host= settings.redis_host, port= settings.redis_port, db= settings.redis_db) if settings.embedding_cache_enabled else None,
+            # Shared embeddings are already batched across all the workers by the server
+            batching= not settings.embedding_shared
+        )
+        if semantic_cache:
+            stats_providers["semantic_cache"] = semantic_cache.stats
+        llm_service = build_llm_scheduler(llm_service, llm_max_concurrency, settings, stats_providers)
 
         logger.info("Main components initialized successfully")
-        
+
     except Exception as e:
         logger.exception("Error initializing main components: %s", str(e))
         raise RuntimeError("Critical error during application startup") from e
 
-    app = create_application(
-        conversation_repo= conversation_repo, 
-        database_repo= database_repo, 
-        llm_service= llm_service, 
-        embedding_service= embadding_service, 
-        document_loader= document_loader,
-        settings= settings
-        )
+    with profiler.phase("application"):
+        app = create_application(
+            conversation_repo= conversation_repo,
+            database_repo= database_repo,
+            llm_service= llm_service,
+            embedding_service= embadding_service,
+            document_loader= document_loader,
+            settings= settings,
+            ingestion_status_repo= ingestion_status_repo,
+            semantic_cache= semantic_cache,
+            lexical_index= lexical_index,
+            tokenizer= tokenizer,
+            stats_providers= stats_providers,
+            metrics= metrics,
+            profiler= profiler,
+            readiness_checks= readiness_checks,
+            leader_election= leader_election,
+            leader_tasks= leader_tasks
+            )
+
 
-    
     return app
 
-app = main()
+# Spawned worker processes, such as the PDF extraction pool, import the main module again as __mp_main__
+app = main() if __name__ != "__mp_main__" else None
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -64,4 +170,4 @@ if __name__ == "__main__":
         port=8000,
         log_level="info",
         reload=False
-    )
\ No newline at end of file
+    )
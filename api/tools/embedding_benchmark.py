@@ -0,0 +1,101 @@
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from api.infraestructure.config import load_settings
+from api.tools.embedding_export import PARITY_TEXTS
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def _rss_mb() -> float:
+    """Resident memory of the current process, read from /proc so no extra dependency is needed."""
+    with open("/proc/self/status") as file:
+        for line in file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _sample_texts(folder_path: str, count: int) -> list[str]:
+    """Real chunks from the documents folder, falling back to the parity sentences."""
+    texts = []
+    try:
+        from api.infraestructure.services.document_loader import DocumentLoader
+        loader = DocumentLoader(chunk_size=700, chunk_overlap=50, max_workers=1)
+        for document in loader.load_pdfs(folder_path):
+            texts.extend(chunk.text for chunk in loader.split_text(document))
+            if len(texts) >= count:
+                break
+    except Exception:
+        pass
+    texts = texts or PARITY_TEXTS
+    return [texts[i % len(texts)] for i in range(count)]
+
+
+def _run(backend: str, model_name: str, model_path: str, texts: list[str], batch_size: int, results) -> None:
+    """Measures a single backend in a fresh process, so imports and model weights are counted separately."""
+    baseline = _rss_mb()
+    started = time.perf_counter()
+    if backend == "torch":
+        from api.infraestructure.services.embedding_service import EmbeddingService
+        service = EmbeddingService(model_name=model_name)
+    else:
+        from api.infraestructure.services.onnx_embedding_service import OnnxEmbeddingService
+        service = OnnxEmbeddingService(model_name=model_name, model_path=model_path, quantized=backend == "onnx-int8")
+    load_seconds = time.perf_counter() - started
+    loaded = _rss_mb()
+
+    service.get_embeddings(texts[:batch_size])
+    started = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        service.get_embeddings(texts[start:start + batch_size])
+    elapsed = time.perf_counter() - started
+
+    single = texts[:min(len(texts), 50)]
+    started = time.perf_counter()
+    for text in single:
+        service.get_embedding(text)
+    single_ms = 1000 * (time.perf_counter() - started) / len(single)
+
+    results.put({
+        "backend": backend,
+        "load_s": round(load_seconds, 2),
+        "texts_per_s": round(len(texts) / elapsed, 1),
+        "single_query_ms": round(single_ms, 2),
+        "rss_model_mb": round(loaded - baseline, 1),
+        "rss_peak_mb": round(_rss_mb(), 1)
+    })
+
+
+def main() -> int:
+    """python -m api.tools.embedding_benchmark --backends torch onnx onnx-int8"""
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description="Encode throughput and memory per embedding backend")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--model-name", default=settings.embedding_model_name)
+    parser.add_argument("--model-path", default=settings.embedding_onnx_path)
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--folder-path", default=settings.folder_path)
+    args = parser.parse_args()
+
+    texts = _sample_texts(args.folder_path, args.texts)
+    context = multiprocessing.get_context("spawn")
+    report = []
+    for backend in args.backends:
+        results = context.Queue()
+        process = context.Process(target=_run, args=(backend, args.model_name, args.model_path, texts, args.batch_size, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            report.append({"backend": backend, "error": f"exited with code {process.exitcode}"})
+            continue
+        report.append(results.get())
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
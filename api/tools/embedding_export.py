@@ -0,0 +1,128 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import numpy as np
+from api.infraestructure.config import load_settings
+from api.infraestructure.services.onnx_embedding_service import (
+    CONFIG_FILE, MODEL_FILE, QUANTIZED_MODEL_FILE, OnnxEmbeddingService, model_directory
+)
+
+logger = logging.getLogger(__name__)
+
+PARITY_TEXTS = [
+    "¿Qué es OAuth2 y para qué se utiliza?",
+    "El flujo authorization code con PKCE utiliza un code_verifier y un code_challenge.",
+    "Las contraseñas deben rotarse cada 90 días y no pueden reutilizarse.",
+    "Reportar cualquier incidente de seguridad al equipo de SOC dentro de las 24 horas.",
+    "Multi-factor authentication is required for every production access.",
+    "hola",
+    "La política de clasificación de datos define cuatro niveles: público, interno, confidencial y restringido. "
+    "Cada nivel determina los controles de cifrado, retención y acceso que deben aplicarse a la información."
+]
+
+
+def export(model_name: str, model_path: str, opset: int = 17) -> str:
+    """Exports the transformer of a sentence-transformers model to ONNX along with its tokenizer and pooling settings."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    directory = model_directory(model_path, model_name)
+    os.makedirs(directory, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    pooling = next(module for module in model if isinstance(module, Pooling))
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            os.path.join(directory, MODEL_FILE),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+    tokenizer.save_pretrained(directory)
+    with open(os.path.join(directory, CONFIG_FILE), "w", encoding="utf-8") as file:
+        json.dump({
+            "model_name": model_name,
+            "dimensions": model.get_sentence_embedding_dimension(),
+            "max_seq_length": model.max_seq_length,
+            "pooling": pooling.get_pooling_mode_str(),
+            "normalize": any(isinstance(module, Normalize) for module in model),
+            "pad_token_id": tokenizer.pad_token_id or 0
+        }, file, indent=2)
+    logger.info(f"Exported {model_name} to {directory}")
+    return directory
+
+
+def quantize(model_name: str, model_path: str) -> str:
+    """Writes a dynamically quantized int8 copy of the exported model, weights are int8 and activations quantized at run time."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    directory = model_directory(model_path, model_name)
+    target = os.path.join(directory, QUANTIZED_MODEL_FILE)
+    quantize_dynamic(os.path.join(directory, MODEL_FILE), target, weight_type=QuantType.QInt8)
+    logger.info(f"Quantized model written to {target}")
+    return target
+
+
+def check_parity(model_name: str, model_path: str, quantized: bool, texts: list[str] = None, threshold: float = 0.99) -> dict:
+    """Compares the ONNX vectors with the torch ones, failing if any pair falls below the cosine threshold."""
+    from api.infraestructure.services.embedding_service import EmbeddingService
+
+    texts = texts or PARITY_TEXTS
+    expected = np.asarray(EmbeddingService(model_name=model_name).get_embeddings(texts), dtype=np.float32)
+    actual = np.asarray(OnnxEmbeddingService(model_name=model_name, model_path=model_path, quantized=quantized).get_embeddings(texts), dtype=np.float32)
+    cosine = (expected * actual).sum(axis=1) / (np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1))
+    result = {
+        "backend": "onnx-int8" if quantized else "onnx",
+        "texts": len(texts),
+        "min_cosine": round(float(cosine.min()), 5),
+        "mean_cosine": round(float(cosine.mean()), 5),
+        "threshold": threshold
+    }
+    if cosine.min() < threshold:
+        raise AssertionError(f"Cosine agreement below {threshold}: {result}")
+    return result
+
+
+def main() -> int:
+    """python -m api.tools.embedding_export [--quantize] [--check]"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX and verify it against torch")
+    parser.add_argument("--model-name", default=settings.embedding_model_name)
+    parser.add_argument("--model-path", default=settings.embedding_onnx_path)
+    parser.add_argument("--quantize", action="store_true", help="also write the int8 model")
+    parser.add_argument("--check", action="store_true", help="assert cosine agreement with the torch vectors")
+    parser.add_argument("--threshold", type=float, default=0.99)
+    parser.add_argument("--int8-threshold", type=float, default=0.97, help="quantization costs some agreement")
+    parser.add_argument("--skip-export", action="store_true", help="only quantize or check an existing export")
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        export(args.model_name, args.model_path)
+    if args.quantize:
+        quantize(args.model_name, args.model_path)
+    if args.check:
+        try:
+            for quantized in ([False, True] if args.quantize else [False]):
+                threshold = args.int8_threshold if quantized else args.threshold
+                print(json.dumps(check_parity(args.model_name, args.model_path, quantized, threshold=threshold)))
+        except AssertionError as e:
+            logger.error(str(e))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import argparse
+import asyncio
+import json
+import socket
+import threading
+import time
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+_WORDS = "la autenticación multifactor protege el acceso a los sistemas críticos de la compañía".split()
+
+
+def create_app(model_name: str = "fake", ttft_ms: float = 200, tokens_per_second: float = 20, max_tokens: int = 64, prefill_tokens_per_second: float = 0) -> FastAPI:
+    """An Ollama stand-in for /api/tags, /api/ps and /api/generate with a fixed time to first token and token rate.
+
+    With prefill_tokens_per_second the time to first token also grows with the prompt, counted as
+    four characters per token. A context passed back is treated as cached, only the new prompt is evaluated.
+    """
+    app = FastAPI()
+
+    def prompt_tokens(prompt: str) -> int:
+        return max(len(prompt) // 4, 1)
+
+    def first_token_delay(prompt: str) -> float:
+        return ttft_ms / 1000 + (prompt_tokens(prompt) / prefill_tokens_per_second if prefill_tokens_per_second else 0)
+
+    def usage(prompt: str, tokens: int, started: float, context: list[int]) -> dict:
+        generation = tokens / tokens_per_second
+        return {
+            "done": True,
+            "context": context + list(range(prompt_tokens(prompt) + tokens)),
+            "prompt_eval_count": prompt_tokens(prompt),
+            "prompt_eval_duration": int(first_token_delay(prompt) * 1e9),
+            "eval_count": tokens,
+            "eval_duration": int(generation * 1e9),
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "load_duration": 0
+        }
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": model_name, "model": model_name}]}
+
+    @app.get("/api/ps")
+    async def ps():
+        return {"models": [{"name": model_name, "model": model_name}]}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        payload = await request.json()
+        prompt = payload.get("prompt", "")
+        tokens = min(max_tokens, payload.get("options", {}).get("num_predict") or max_tokens)
+        context = payload.get("context") or []
+        started = time.perf_counter()
+
+        if not payload.get("stream", True):
+            await asyncio.sleep(first_token_delay(prompt) + tokens / tokens_per_second)
+            text = " ".join(_WORDS[i % len(_WORDS)] for i in range(tokens))
+            return {"model": model_name, "response": text, **usage(prompt, tokens, started, context)}
+
+        async def stream():
+            await asyncio.sleep(first_token_delay(prompt))
+            for i in range(tokens):
+                if i:
+                    await asyncio.sleep(1 / tokens_per_second)
+                yield json.dumps({"model": model_name, "response": _WORDS[i % len(_WORDS)] + " ", "done": False}) + "\n"
+            yield json.dumps({"model": model_name, "response": "", **usage(prompt, tokens, started, context)}) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BackgroundServer:
+    """Serves an ASGI app with uvicorn on a background thread, so clients talk to it over real HTTP."""
+
+    def __init__(self, app, port: int = None, name: str = "background-server"):
+        self.port = port or _free_port()
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=self.server.run, name=name, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "BackgroundServer":
+        self._thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+class FakeOllamaServer(BackgroundServer):
+    """Runs the stand-in on a background thread, so LLMService talks to it over real HTTP."""
+
+    def __init__(self, port: int = None, **options):
+        super().__init__(create_app(**options), port=port, name="fake-ollama")
+
+
+def main() -> None:
+    """python -m api.tools.fake_ollama --port 11434 --ttft-ms 200 --tokens-per-second 20"""
+    parser = argparse.ArgumentParser(description="Fake Ollama server for offline benchmarks")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--model-name", default="fake")
+    parser.add_argument("--ttft-ms", type=float, default=200)
+    parser.add_argument("--tokens-per-second", type=float, default=20)
+    parser.add_argument("--max-tokens", type=int, default=64)
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=0, help="prompt evaluation rate, 0 keeps the time to first token fixed")
+    args = parser.parse_args()
+    app = create_app(args.model_name, args.ttft_ms, args.tokens_per_second, args.max_tokens, args.prefill_tokens_per_second)
+    uvicorn.run(app, host="0.0.0.0", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import httpx
+from api.infraestructure.config import AppSettings, load_settings
+from api.tools.fake_ollama import BackgroundServer, FakeOllamaServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKLOAD = [
+    "¿Qué es OAuth2?",
+    "¿Cada cuánto tiempo debo cambiar mi contraseña?",
+    "¿Cómo reporto un incidente de seguridad?",
+    "¿Qué es el code_verifier en PKCE?",
+    "¿Es obligatorio usar autenticación multifactor?",
+    "¿Qué niveles de clasificación de datos existen?"
+]
+
+
+def load_workload(path: str, users: int) -> list[dict]:
+    """Reads a JSONL workload, one request per line with a message (or query, or title) and an optional user_id."""
+    if not path:
+        return [{"user_id": f"user-{i % users}", "message": message} for i, message in enumerate(DEFAULT_WORKLOAD)]
+    workload = []
+    with open(path, encoding="utf-8") as file:
+        for i, line in enumerate(file):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            message = entry.get("message") or entry.get("query") or entry.get("title")
+            if message:
+                workload.append({"user_id": entry.get("user_id") or f"user-{i % users}", "message": message})
+    return workload
+
+
+def percentiles(values: list[float]) -> dict:
+    """Nearest-rank percentiles in milliseconds."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    rank = lambda q: ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+    return {
+        "p50": round(rank(0.50) * 1000, 1),
+        "p95": round(rank(0.95) * 1000, 1),
+        "p99": round(rank(0.99) * 1000, 1),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 1),
+        "max": round(ordered[-1] * 1000, 1)
+    }
+
+
+def build_app(args: argparse.Namespace, settings: AppSettings, workdir: str, ollama_port: int):
+    """Builds the application like api.main does, swapping external services for the requested stand-ins."""
+    from api.infraestructure import factory
+    from api.infraestructure.web.fastapi import create_application
+    from api.infraestructure.services.telemetry import OpenTelemetryMetrics
+    from api.infraestructure.services.tokenizer import Tokenizer
+    from api.tools import stand_ins
+
+    # Everything the run writes stays in the work directory, and the PDFs are parsed on every run
+    settings = settings.model_copy(update={
+        "vector_store_backend": args.vector_store,
+        "vector_store_path": os.path.join(workdir, "vector_store"),
+        "chroma_collection": f"{settings.chroma_collection}_load_test",
+        "lexical_index_path": os.path.join(workdir, "lexical_index.json"),
+        "chunk_embedding_store_path": os.path.join(workdir, "embeddings"),
+        "pdf_page_cache_enabled": False
+    })
+    if args.ollama == "fake":
+        settings = settings.model_copy(update={"ollama_host": "127.0.0.1", "ollama_port": ollama_port, "ollama_model": "fake", "ollama_endpoints": ""})
+
+    metrics = OpenTelemetryMetrics(service_name="load-test")
+    if args.redis:
+        from api.infraestructure.repositories.conversation_repository import ConversationRepository
+        from api.infraestructure.repositories.ingestion_status_repository import IngestionStatusRepository
+        conversation_repo = ConversationRepository(host=settings.redis_host, port=settings.redis_port, db=settings.redis_db, session_ttl=settings.llm_context_reuse_ttl)
+        ingestion_status_repo = IngestionStatusRepository(host=settings.redis_host, port=settings.redis_port, db=settings.redis_db, key_prefix="load-test:ingestion")
+    else:
+        conversation_repo = stand_ins.InMemoryConversationRepository()
+        ingestion_status_repo = stand_ins.InMemoryIngestionStatusRepository()
+
+    stats_providers = {}
+    embedding_service = factory.build_embedding_model(settings) if args.embeddings == "model" else stand_ins.HashingEmbeddingService()
+    embedding_service = factory.build_chunk_embedding_store(embedding_service, settings, stats_providers)
+    embedding_service = factory.build_query_embedding_service(embedding_service, settings, stats_providers)
+    llm_service, llm_max_concurrency = factory.build_llm_service(settings, metrics)
+    llm_service = factory.build_llm_scheduler(llm_service, llm_max_concurrency, settings, stats_providers)
+    tokenizer = Tokenizer(tokenizer_name=settings.prompt_tokenizer)
+    factory.check_context_window(settings, tokenizer)
+
+    app = create_application(
+        conversation_repo=conversation_repo,
+        database_repo=factory.build_database_repo(settings),
+        embedding_service=embedding_service,
+        llm_service=llm_service,
+        document_loader=factory.build_document_loader(settings),
+        settings=settings,
+        ingestion_status_repo=ingestion_status_repo,
+        lexical_index=factory.build_lexical_index(settings),
+        tokenizer=tokenizer,
+        stats_providers=stats_providers,
+        metrics=metrics
+    )
+    return app, metrics
+
+
+async def ingest(client: httpx.AsyncClient, timeout: float) -> dict:
+    """Triggers an ingestion through the API and waits for it to finish."""
+    started = time.perf_counter()
+    response = await client.post("/api/v1/ingest")
+    if response.status_code not in (202, 409):
+        raise RuntimeError(f"Could not start ingestion: {response.status_code} {response.text}")
+    while time.perf_counter() - started < timeout:
+        status = (await client.get("/api/v1/ingest")).json()
+        if status.get("state") in ("completed", "failed"):
+            return {"wall_s": round(time.perf_counter() - started, 2), **status}
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Ingestion did not finish within {timeout}s")
+
+
+async def send(client: httpx.AsyncClient, request: dict, stream: bool) -> dict:
+    started = time.perf_counter()
+    first_token = None
+    try:
+        if stream:
+            async with client.stream("POST", "/api/v1/chat/stream", json=request) as response:
+                async for line in response.aiter_lines():
+                    if first_token is None and line.startswith("data:"):
+                        first_token = time.perf_counter() - started
+                status = response.status_code
+        else:
+            status = (await client.post("/api/v1/chat", json=request)).status_code
+    except httpx.HTTPError as e:
+        logger.warning(f"Request failed: {str(e)}")
+        status = 0
+    return {"latency": time.perf_counter() - started, "ttft": first_token, "status": status}
+
+
+async def drive(client: httpx.AsyncClient, workload: list[dict], total: int, concurrency: int, stream: bool) -> tuple[list[dict], float]:
+    """Replays the workload round-robin until total requests were sent, keeping concurrency requests in flight."""
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(workload[i % len(workload)])
+    results = []
+
+    async def worker():
+        while not queue.empty():
+            results.append(await send(client, queue.get_nowait(), stream))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, time.perf_counter() - started
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Lists the headline numbers that got worse than the baseline by more than the tolerance."""
+    regressions = []
+    checks = [
+        ("chat.latency_ms.p95", lambda r: r["chat"]["latency_ms"].get("p95"), True),
+        ("chat.throughput_rps", lambda r: r["chat"]["throughput_rps"], False),
+        ("ingestion.duration_s", lambda r: (r.get("ingestion") or {}).get("duration_s"), True)
+    ]
+    for name, read, lower_is_better in checks:
+        try:
+            current, previous = read(report), read(baseline)
+        except (KeyError, TypeError):
+            continue
+        if not current or not previous:
+            continue
+        worse = current > previous * (1 + tolerance) if lower_is_better else current < previous * (1 - tolerance)
+        if worse:
+            regressions.append(f"{name}: {previous} -> {current}")
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> dict:
+    settings = load_settings().model_copy(update={
+        "folder_path": args.documents or load_settings().folder_path,
+        "ingest_on_startup": False,
+        "ollama_warm_up": False,
+        "document_watcher_enabled": False,
+        "metrics_enabled": True
+    })
+    workload = load_workload(args.workload, args.users)
+    report = {"config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}}
+
+    fake_ollama = None
+    api_server = None
+    metrics = None
+    workdir = tempfile.TemporaryDirectory(prefix="load-test-")
+    try:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        else:
+            if args.ollama == "fake":
+                fake_ollama = FakeOllamaServer(ttft_ms=args.ttft_ms, tokens_per_second=args.tokens_per_second, max_tokens=args.max_tokens, prefill_tokens_per_second=args.prefill_tokens_per_second).start()
+            app, metrics = build_app(args, settings, workdir.name, fake_ollama.port if fake_ollama else None)
+            # Served over a real socket rather than httpx.ASGITransport, which buffers streamed bodies and runs no lifespan
+            api_server = BackgroundServer(app, name="load-test-api").start()
+            client = httpx.AsyncClient(base_url=api_server.url, timeout=args.timeout)
+
+        async with client:
+            if not args.skip_ingest:
+                status = await ingest(client, args.timeout)
+                report["ingestion"] = {
+                    "state": status.get("state"),
+                    "duration_s": status.get("duration_s"),
+                    "documents": status.get("documents_total"),
+                    "chunks": status.get("chunks_indexed")
+                }
+            for _ in range(args.warmup):
+                await send(client, workload[0], args.stream)
+            results, elapsed = await drive(client, workload, args.requests, args.concurrency, args.stream)
+
+        ok = [result for result in results if 200 <= result["status"] < 300]
+        status_codes = {}
+        for result in results:
+            status_codes[str(result["status"])] = status_codes.get(str(result["status"]), 0) + 1
+        report["chat"] = {
+            "mode": "stream" if args.stream else "chat",
+            "requests": len(results),
+            "errors": len(results) - len(ok),
+            "status_codes": status_codes,
+            "duration_s": round(elapsed, 2),
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0,
+            "latency_ms": percentiles([result["latency"] for result in ok]),
+            "ttft_ms": percentiles([result["ttft"] for result in ok if result["ttft"] is not None])
+        }
+        if metrics:
+            # Durations in milliseconds, token counts and rates as recorded; the warm-up requests are included.
+            # http.server.* comes from the FastAPI instrumentation, already in milliseconds and covered by chat above
+            report["stages"] = {
+                name: {key: value if key == "count" else round(value * 1000 if ".duration" in name else value, 2) for key, value in stage.items()}
+                for name, stage in metrics.summary().items() if not name.startswith("http.")
+            }
+    finally:
+        if api_server:
+            api_server.stop()
+        if fake_ollama:
+            fake_ollama.stop()
+        workdir.cleanup()
+    return report
+
+
+def main() -> int:
+    """python -m api.tools.load_test --requests 200 --concurrency 16 --output report.json"""
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Replay a chat workload against the API and report latency percentiles as JSON")
+    parser.add_argument("--workload", help="JSONL file with one request per line, default is a built-in set of questions")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--users", type=int, default=8, help="distinct user_ids for workload lines without one")
+    parser.add_argument("--stream", action="store_true", help="use /chat/stream and report time to first token")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--url", help="drive a running API instead of building one in-process (no stage breakdown)")
+    parser.add_argument("--documents", help="documents folder to ingest, default is the configured folder")
+    parser.add_argument("--skip-ingest", action="store_true")
+    parser.add_argument("--ollama", choices=("fake", "real"), default="fake")
+    parser.add_argument("--ttft-ms", type=float, default=200)
+    parser.add_argument("--tokens-per-second", type=float, default=20)
+    parser.add_argument("--max-tokens", type=int, default=64)
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=0, help="fake ollama prompt evaluation rate, 0 keeps the time to first token fixed")
+    parser.add_argument("--embeddings", choices=("hashing", "model"), default="hashing")
+    parser.add_argument("--vector-store", choices=("embedded", "chroma"), default="embedded")
+    parser.add_argument("--redis", action="store_true", help="use the configured Redis instead of the in-memory stand-in")
+    parser.add_argument("--output", help="write the JSON report to this file as well")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression against the baseline")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            report["regressions"] = compare(report, json.load(file), args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from api.infraestructure.config import load_settings
+from api.infraestructure.services.pdf_text_extractor import EXTRACTORS, PageTextCache
+
+
+def _pdfs(folder_path: str) -> list[str]:
+    return [os.path.join(folder_path, name) for name in sorted(os.listdir(folder_path)) if name.endswith(".pdf")]
+
+
+def _run(backend: str, paths: list[str], repeat: int) -> dict:
+    """Extracts every PDF repeat times with one backend, then reads the same pages back from a page cache."""
+    extract = EXTRACTORS[backend]
+    # Imports are paid once per worker process, so they are left out of the timing
+    extract(paths[0])
+    started = time.perf_counter()
+    for _ in range(repeat):
+        documents = [extract(path) for path in paths]
+    elapsed = time.perf_counter() - started
+    pages = sum(len(document) for document in documents)
+
+    with tempfile.TemporaryDirectory() as cache_path:
+        cache = PageTextCache(path=cache_path, backend=backend)
+        for number, document in enumerate(documents):
+            cache.put(str(number), document)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for number in range(len(documents)):
+                cache.get(str(number))
+        cached = time.perf_counter() - started
+
+    return {
+        "backend": backend,
+        "documents": len(paths),
+        "pages": pages,
+        "empty_pages": sum(1 for document in documents for text in document if not text.strip()),
+        "chars": sum(len(text) for document in documents for text in document),
+        "pages_per_s": round(repeat * pages / elapsed, 1),
+        "cached_pages_per_s": round(repeat * pages / cached, 1)
+    }
+
+
+def main() -> int:
+    """python -m api.tools.pdf_benchmark --backends pdfium pdfplumber auto"""
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description="PDF text extraction throughput per backend")
+    parser.add_argument("--backends", nargs="+", choices=list(EXTRACTORS), default=list(EXTRACTORS))
+    parser.add_argument("--folder-path", default=settings.folder_path)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = _pdfs(args.folder_path)
+    if not paths:
+        print(f"No PDFs found in {args.folder_path}", file=sys.stderr)
+        return 1
+    report = []
+    for backend in args.backends:
+        try:
+            report.append(_run(backend, paths, args.repeat))
+        except Exception as e:
+            report.append({"backend": backend, "error": str(e)})
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
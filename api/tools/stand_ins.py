@@ -0,0 +1,129 @@
+import re
+import threading
+import zlib
+from collections import defaultdict
+import numpy as np
+from api.application.interfaces.conversation_repository import IConversationRepository, IAsyncConversationRepository
+from api.application.interfaces.embedding_service import IEmbeddingService, IAsyncEmbeddingService
+from api.application.interfaces.ingestion_status_repository import IIngestionStatusRepository
+from api.domain.entities import Conversation, ConversationSession, DocumentChunk
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class InMemoryConversationRepository(IConversationRepository, IAsyncConversationRepository):
+    """Redis stand-in keeping the last 10 interactions per user, newest first like LPUSH + LTRIM."""
+
+    def __init__(self):
+        self._history: dict[str, list[Conversation]] = defaultdict(list)
+        self._sessions: dict[str, ConversationSession] = {}
+        self._lock = threading.Lock()
+
+    def get_conversation_history(self, user_id: str) -> list[Conversation]:
+        with self._lock:
+            return list(self._history[user_id])
+
+    def get_conversation_histories(self, user_ids: list[str]) -> dict[str, list[Conversation]]:
+        return {user_id: self.get_conversation_history(user_id) for user_id in user_ids}
+
+    def save_conversation(self, conversation: Conversation) -> None:
+        with self._lock:
+            history = self._history[conversation.user_id]
+            history.insert(0, conversation)
+            del history[10:]
+
+    def get_session(self, user_id: str) -> ConversationSession | None:
+        return self._sessions.get(user_id)
+
+    def save_session(self, session: ConversationSession) -> None:
+        self._sessions[session.user_id] = session
+
+    def clear_session(self, user_id: str) -> None:
+        self._sessions.pop(user_id, None)
+
+    async def aget_conversation_history(self, user_id: str) -> list[Conversation]:
+        return self.get_conversation_history(user_id)
+
+    async def aget_conversation_histories(self, user_ids: list[str]) -> dict[str, list[Conversation]]:
+        return self.get_conversation_histories(user_ids)
+
+    async def asave_conversation(self, conversation: Conversation) -> None:
+        self.save_conversation(conversation)
+
+    async def aget_session(self, user_id: str) -> ConversationSession | None:
+        return self.get_session(user_id)
+
+    async def asave_session(self, session: ConversationSession) -> None:
+        self.save_session(session)
+
+    async def aclear_session(self, user_id: str) -> None:
+        self.clear_session(user_id)
+
+
+class InMemoryIngestionStatusRepository(IIngestionStatusRepository):
+    """Redis stand-in for a single process."""
+
+    def __init__(self):
+        self._status = {"state": "idle"}
+        self._owner: str = None
+        self._lock = threading.Lock()
+
+    def get_status(self) -> dict:
+        return dict(self._status)
+
+    def set_status(self, status: dict) -> None:
+        self._status = dict(status)
+
+    def acquire_lock(self, owner: str, ttl: int) -> bool:
+        with self._lock:
+            if self._owner:
+                return False
+            self._owner = owner
+            return True
+
+    def refresh_lock(self, owner: str, ttl: int) -> bool:
+        return self._owner == owner
+
+    def release_lock(self, owner: str) -> None:
+        with self._lock:
+            if self._owner == owner:
+                self._owner = None
+
+
+class HashingEmbeddingService(IEmbeddingService, IAsyncEmbeddingService):
+    """Deterministic embeddings without a model: the normalized sum of one pseudo-random vector per word.
+
+    Texts sharing words get similar vectors, which is enough to exercise retrieval offline.
+    """
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+
+    def get_embedding(self, text: str) -> list[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in _TOKEN_PATTERN.findall(text.lower()):
+            vector += np.random.default_rng(zlib.crc32(word.encode("utf-8"))).standard_normal(self.dimensions, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        return [self.get_embedding(text) for text in texts]
+
+    async def aget_embedding(self, text: str) -> list[float]:
+        return self.get_embedding(text)
+
+    async def aget_embeddings(self, texts: list[str]) -> list[list[float]]:
+        return self.get_embeddings(texts)
+
+    def embed(self, chunk: DocumentChunk) -> None:
+        chunk.embedding = self.get_embedding(chunk.text)
+
+    def embed_all(self, chunks: list[DocumentChunk]) -> None:
+        for chunk in chunks:
+            chunk.embedding = self.get_embedding(chunk.text)
+
+    def get_dimensions(self) -> int:
+        return self.dimensions
+
+    def get_model_name(self) -> str:
+        return f"hashing-{self.dimensions}"
@@ -105,8 +105,8 @@ for (( i=0; i<${#MODELS[@]}; i++ )); do
 
   echo "⏳ Esperando que la API esté lista..."
   
-  timeout=30
-  while ! curl -s http://localhost:8001/health > /dev/null; do
+  timeout=300
+  while ! curl -sf http://localhost:8001/health/ready > /dev/null; do
     sleep 1
     ((timeout--))
     if [ $timeout -eq 0 ]; then